@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     DB_NAME: str = os.getenv("DB_NAME", "medisync")
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "postgres")
+    DB_POOL_MIN: int = int(os.getenv("DB_POOL_MIN", "1"))
+    DB_POOL_MAX: int = int(os.getenv("DB_POOL_MAX", "20"))
     
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
@@ -19,6 +21,58 @@ class Settings(BaseSettings):
     # API settings
     API_V1_STR: str = "/api/v1"
     
+    # Budget for a whole dashboard request (the patient dashboard is a single
+    # statement; the doctor dashboard's queries share it as a deadline)
+    DASHBOARD_TIMEOUT_MS: int = 2000
+    
+    # Retries for batch payments that lose a race with a concurrent payment
+    PAYMENT_BATCH_ATTEMPTS: int = 3
+    
+    # How often the balance ledger is rolled forward into snapshots
+    BALANCE_SNAPSHOT_INTERVAL_SECONDS: int = 600
+    # Patients snapshotted per transaction (their rows stay locked until it commits)
+    BALANCE_SNAPSHOT_BATCH_SIZE: int = 500
+    
+    # In-process typeahead indexes are rebuilt at least this often
+    SEARCH_INDEX_TTL_SECONDS: int = 60
+    
+    # Micro-cache for the unauthenticated public endpoints
+    PUBLIC_CACHE_TTL_SECONDS: float = 3
+    PUBLIC_CACHE_STALE_SECONDS: float = 10
+    PUBLIC_ACTIVITY_LIMIT_BUCKETS: list = [10, 25, 50]
+    
+    # Read-through response cache for rarely changing GET endpoints
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_BYPASS_HEADER: str = "X-Cache-Bypass"
+    
+    # Large list endpoints encode trusted query rows directly (orjson when installed)
+    FAST_JSON_ENABLED: bool = True
+    
+    # Queries slower than this are logged with redacted params
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    # Fraction of slow queries whose plan is logged (EXPLAIN ANALYZE for read-only SELECTs,
+    # plain EXPLAIN otherwise); 0 disables it
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 5000
+    
+    # Response compression: bodies smaller than this go out uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    # Used instead of gzip when the optional brotli package is installed
+    BROTLI_QUALITY: int = 4
+    
+    # Identical concurrent reads share one query; followers give up waiting after this long
+    COALESCE_MAX_WAIT_SECONDS: float = 2.0
+    
+    # Longest window accepted by the reservation and free-window queries
+    RESERVATION_WINDOW_MAX_DAYS: int = 31
+    
+    # Live event settings (server-sent events fed by Postgres LISTEN/NOTIFY)
+    EVENTS_CHANNEL: str = "medisync_events"
+    EVENT_QUEUE_SIZE: int = 100
+    EVENT_HEARTBEAT_SECONDS: int = 15
+    EVENT_LISTENER_RETRY_SECONDS: int = 5
+    
     # CORS settings
     CORS_ORIGINS: list = [
         "http://localhost:8080",
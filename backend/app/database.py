@@ -1,40 +1,120 @@
 # app/database.py
 import psycopg2
+from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 import logging
+import threading
+import time
 from .config import settings
+from .utils.query_stats import query_stats, redact_params
 
 logger = logging.getLogger(__name__)
 
+_pool = None
+_pool_lock = threading.Lock()
+_extensions = None
+
+def _connection_params():
+    return {
+        "host": settings.DB_HOST,
+        "port": settings.DB_PORT,
+        "database": settings.DB_NAME,
+        "user": settings.DB_USER,
+        "password": settings.DB_PASSWORD
+    }
+
+class InstrumentedCursor(RealDictCursor):
+    """Dictionary cursor that times every statement into query_stats"""
+
+    def execute(self, query, vars=None):
+        if not isinstance(query, (str, bytes)):
+            # psycopg2.sql.Composed and friends
+            query = query.as_string(self)
+        if query.lstrip()[:4].upper() in ("SET ", b"SET "):
+            # Session settings such as SET LOCAL statement_timeout are not ranked as queries
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception as e:
+            query_stats.record(query, vars, (time.perf_counter() - start) * 1000, None, error=e)
+            raise
+        rows = self.rowcount if self.rowcount >= 0 else None
+        query_stats.record(query, vars, (time.perf_counter() - start) * 1000, rows)
+        return result
+
+def create_connection():
+    """Open a dedicated connection outside the pool"""
+    return psycopg2.connect(**_connection_params())
+
+def get_pool():
+    """Lazily create the shared thread-safe connection pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pool.ThreadedConnectionPool(
+                    settings.DB_POOL_MIN,
+                    settings.DB_POOL_MAX,
+                    **_connection_params()
+                )
+    return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
 @contextmanager
 def get_db_connection():
     """Get database connection with dictionary cursor"""
     conn = None
+    pooled = True
     try:
-        conn = psycopg2.connect(
-            host=settings.DB_HOST,
-            port=settings.DB_PORT,
-            database=settings.DB_NAME,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD
-        )
+        try:
+            conn = get_pool().getconn()
+        except pool.PoolError:
+            # Pool exhausted: fall back to a one-off connection rather than failing the request
+            pooled = False
+            conn = create_connection()
         conn.autocommit = False
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with conn.cursor(cursor_factory=InstrumentedCursor) as cursor:
             yield conn, cursor
     except Exception as e:
         logger.error(f"Database connection error: {str(e)}")
-        if conn:
+        if conn and not conn.closed:
             conn.rollback()
         raise e
     finally:
         if conn:
-            conn.close()
+            if not pooled:
+                conn.close()
+            else:
+                # Never hand a connection with an open transaction back to the pool
+                if not conn.closed:
+                    conn.rollback()
+                get_pool().putconn(conn, close=bool(conn.closed))
+
+def execute_query(query, params=None, fetch=True, timeout_ms=None, deadline=None):
+    """Execute a query and return results as dictionaries.
 
-def execute_query(query, params=None, fetch=True):
-    """Execute a query and return results as dictionaries"""
+    `timeout_ms` bounds this one statement. A handler that runs several
+    queries against one budget passes `deadline` (a time.monotonic() value)
+    instead: each statement gets whatever time is left when it starts.
+    """
     with get_db_connection() as (conn, cursor):
         try:
+            if deadline is not None:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    raise psycopg2.errors.QueryCanceled("request deadline passed before the query started")
+                timeout_ms = min(timeout_ms, remaining_ms) if timeout_ms else remaining_ms
+            if timeout_ms:
+                # Scoped to this transaction only
+                cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
             cursor.execute(query, params or ())
             if fetch:
                 try:
@@ -51,7 +131,8 @@ def execute_query(query, params=None, fetch=True):
                 return None
         except Exception as e:
             conn.rollback()
-            logger.error(f"Query execution error: {str(e)}, Query: {query}, Params: {params}")
+            # Name and redacted params only: the SQL is in app.models and params may hold patient data
+            logger.error(f"Query execution error in {query_stats.registry.name(query)}: {str(e)}, Params: {redact_params(params)}")
             raise e
 
 def execute_transaction(queries_and_params):
@@ -65,4 +146,34 @@ def execute_transaction(queries_and_params):
         except Exception as e:
             conn.rollback()
             logger.error(f"Transaction error: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+def has_extension(name):
+    """Whether a Postgres extension is installed (looked up once per process)"""
+    global _extensions
+    if _extensions is None:
+        _extensions = {row["extname"] for row in execute_query("SELECT extname FROM pg_extension")}
+    return name in _extensions
+
+def explain_analyze(query, params=None, analyze=True):
+    """EXPLAIN a query on a pooled connection, then roll back.
+
+    With `analyze` the query is run (EXPLAIN (ANALYZE, BUFFERS)) inside a
+    READ ONLY transaction, so a write that slipped past the caller's check
+    fails instead of happening twice; without it only the estimated plan is
+    returned and nothing is executed.
+    """
+    with get_db_connection() as (conn, _):
+        # A plain cursor, so the EXPLAIN itself is not counted as a query
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            if analyze:
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute("SET LOCAL statement_timeout = %s", (int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS),))
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params or ())
+            else:
+                cursor.execute("EXPLAIN " + query, params or ())
+            plan = "\n".join(row["QUERY PLAN"] for row in cursor.fetchall())
+        conn.rollback()
+        return plan
+
+query_stats.explain_runner = explain_analyze
@@ -1,8 +1,14 @@
 # app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import logging
-from .routers import auth, patients, doctors, admin, appointments, resources, processes, medications, reports
+from .routers import auth, patients, doctors, admin, appointments, resources, processes, medications, reports, events, internal
+from .utils.compression import CompressionMiddleware
+from .utils.events import broker, NotificationListener
+from .utils.ledger import snapshot_balances_periodically
+from .database import close_pool
 from .config import settings
 
 # Configure logging
@@ -12,11 +18,26 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the LISTEN connection that feeds server-sent events
+    broker.bind_loop(asyncio.get_running_loop())
+    listener = NotificationListener(broker)
+    listener.start()
+    snapshots = asyncio.create_task(
+        snapshot_balances_periodically(settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS)
+    )
+    yield
+    snapshots.cancel()
+    listener.stop()
+    close_pool()
+
 # Create FastAPI app
 app = FastAPI(
     title="MediSync API",
     description="Hospital Appointment Management System API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS - simplified permissive configuration
@@ -28,6 +49,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Compress large JSON responses (brotli when installed, otherwise gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
 # Include routers with versioned prefix
 api_prefix = settings.API_V1_STR
 app.include_router(auth.router, prefix=api_prefix)
@@ -40,6 +69,8 @@ app.include_router(resources.public_router, prefix=api_prefix)
 app.include_router(processes.router, prefix=api_prefix)
 app.include_router(reports.router, prefix=api_prefix)
 app.include_router(medications.router, prefix=api_prefix)
+app.include_router(events.router, prefix=api_prefix)
+app.include_router(internal.router, prefix=api_prefix)
 
 @app.get("/")
 async def root():
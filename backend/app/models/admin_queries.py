@@ -175,26 +175,34 @@ SELECT
 FROM doctor_metrics
 """
 
-# Generate equipment statistics
+# Generate equipment statistics from the request event log: approvals in the
+# window count as uses, Pending events as requests
 GENERATE_EQUIPMENT_STATS = """
-WITH equipment_metrics AS (
-    SELECT 
-        mr.resourceID,
-        COUNT(DISTINCT r.doctorID) as usageCount,
-        MAX(r.status) as lastStatus,
-        COUNT(DISTINCT r.doctorID) as totalRequests
-    FROM MedicalResources mr
-    LEFT JOIN Request r ON mr.resourceID = r.resourceID
-    WHERE r.status IS NOT NULL
-    GROUP BY mr.resourceID
-)
 INSERT INTO EquipmentStatistics (statID, reportID, resourceID, usageCount, lastUsedDate, totalRequests)
 SELECT 
-    ROW_NUMBER() OVER () as statID,
-    %s as reportID,
-    resourceID,
-    usageCount,
-    CURRENT_DATE as lastUsedDate,
-    totalRequests
-FROM equipment_metrics
+    ROW_NUMBER() OVER (ORDER BY mr.resourceID) as statID,
+    %(report_id)s as reportID,
+    mr.resourceID,
+    COALESCE(w.approvals, 0) as usageCount,
+    COALESCE(last_use.day, CURRENT_DATE) as lastUsedDate,
+    COALESCE(w.requests, 0) as totalRequests
+FROM MedicalResources mr
+LEFT JOIN (
+    SELECT resourceID,
+           COUNT(*) FILTER (WHERE status = 'Approved') as approvals,
+           COUNT(*) FILTER (WHERE status = 'Pending') as requests
+    FROM RequestEvent
+    WHERE resourceID = ANY(%(resource_ids)s)
+      AND createdAt BETWEEN %(start)s AND %(end)s
+    GROUP BY resourceID
+) w ON w.resourceID = mr.resourceID
+LEFT JOIN LATERAL (
+    SELECT DATE(e.createdAt) as day
+    FROM RequestEvent e
+    WHERE e.resourceID = mr.resourceID AND e.status = 'Approved' AND e.createdAt <= %(end)s
+    ORDER BY e.createdAt DESC
+    LIMIT 1
+) last_use ON TRUE
+WHERE mr.resourceID = ANY(%(resource_ids)s)
+ORDER BY mr.resourceID
 """
\ No newline at end of file
@@ -81,6 +81,15 @@ SET availability = 'booked'
 WHERE doctorid = %s AND starttime = %s AND endtime = %s
 """
 
+# Free a cancelled appointment's slot; returns nothing if it was not booked
+RELEASE_SLOT = """
+UPDATE Slots
+SET availability = 'available'
+WHERE doctorid = %s AND starttime = %s AND endtime = %s
+AND availability = 'booked'
+RETURNING doctorid, starttime, endtime
+"""
+
 # Deduct appointment fee
 DEDUCT_BALANCE = """
 UPDATE Patients
@@ -105,7 +114,7 @@ SELECT a.appointmentid, a.patientid, a.doctorid, a.starttime, a.endtime,
                    'billing', CASE WHEN b.processid IS NOT NULL THEN json_build_object(
                        'amount', COALESCE(b.amount, 0),
                        'paymentStatus', COALESCE(b.paymentstatus, 'pending'),
-                       'billingDate', b.billingdate
+                       'billingDate', b.billingdate::timestamp
                    ) ELSE NULL END
                )
            ) FILTER (WHERE p.processid IS NOT NULL),
@@ -140,7 +149,7 @@ SELECT a.appointmentid, a.patientid, a.doctorid, a.starttime, a.endtime,
                    'billing', CASE WHEN b.processid IS NOT NULL THEN json_build_object(
                        'amount', COALESCE(b.amount, 0),
                        'paymentStatus', COALESCE(b.paymentstatus, 'pending'),
-                       'billingDate', b.billingdate
+                       'billingDate', b.billingdate::timestamp
                    ) ELSE NULL END
                )
            ) FILTER (WHERE p.processid IS NOT NULL),
@@ -176,7 +185,7 @@ SET rating = %s, review = %s
 WHERE appointmentid = %s
 AND patientid = %s
 AND status = 'completed'
-RETURNING appointmentid
+RETURNING appointmentid, doctorid
 """
 
 # Get appointment with doctor name and specialization by appointmentid
@@ -11,23 +11,132 @@ WHERE d.employeeID = %s
 GROUP BY d.employeeID, u.name, d.specialization, d.doctorLocation, d.deptName
 """
 
-# Get doctor's patients
+# Get doctor's patients (served by the DoctorPatient relationship table)
 GET_DOCTOR_PATIENTS = """
-SELECT DISTINCT p.patientID, u.name, p.email, p.phoneNumber, p.DOB
-FROM Patients p
-JOIN "User" u ON p.patientID = u.userID
-JOIN Appointment a ON p.patientID = a.patientID
-WHERE a.doctorID = %s
-ORDER BY u.name
+SELECT p.patientID, p.name, p.email, p.phoneNumber, p.DOB,
+       dp.firstAppointment, dp.lastAppointment
+FROM DoctorPatient dp
+JOIN Patients p ON dp.patientID = p.patientID
+WHERE dp.doctorID = %s
+{name_clause}
+ORDER BY p.name, p.patientID
+LIMIT %s OFFSET %s
 """
 
-# Get doctor stats
+# Fill DoctorPatient from appointment history (backfill/repair)
+BACKFILL_DOCTOR_PATIENTS = """
+INSERT INTO DoctorPatient AS dp (doctorID, patientID, firstAppointment, lastAppointment)
+SELECT doctorID, patientID, MIN(startTime), MAX(startTime)
+FROM Appointment
+WHERE doctorID IS NOT NULL AND patientID IS NOT NULL
+GROUP BY doctorID, patientID
+ON CONFLICT (doctorID, patientID) DO UPDATE SET
+    firstAppointment = EXCLUDED.firstAppointment,
+    lastAppointment = EXCLUDED.lastAppointment
+"""
+
+# Get doctor stats (single-row lookup of the trigger-maintained counters)
 GET_DOCTOR_STATS = """
 SELECT 
-    COUNT(a.appointmentID) as appointmentCount,
-    AVG(a.rating) as avgRating,
-    (SELECT COUNT(*) FROM Prescribes pr WHERE pr.appointmentID IN 
-        (SELECT appointmentID FROM Appointment WHERE doctorID = %s)) as prescriptionCount
+    scheduledCount + completedCount + cancelledCount + noShowCount as "appointmentCount",
+    scheduledCount as "scheduledCount",
+    completedCount as "completedCount",
+    cancelledCount as "cancelledCount",
+    noShowCount as "noShowCount",
+    CASE WHEN ratingCount > 0 THEN ratingSum / ratingCount END as "avgRating",
+    ratingCount as "ratingCount",
+    prescriptionCount as "prescriptionCount",
+    processCount as "processCount",
+    revenue
+FROM DoctorCounters
+WHERE doctorID = %s
+"""
+
+# Recompute every doctor's counters from the source tables (repair/backfill)
+REBUILD_DOCTOR_COUNTERS = """
+WITH appointment_counts AS (
+    SELECT doctorID,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'scheduled') as scheduledCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'completed') as completedCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'cancelled') as cancelledCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'no-show') as noShowCount,
+           COALESCE(SUM(rating), 0) as ratingSum,
+           COUNT(rating) as ratingCount
+    FROM Appointment
+    GROUP BY doctorID
+),
+prescription_counts AS (
+    SELECT a.doctorID, COUNT(*) as prescriptionCount
+    FROM Prescribes pr
+    JOIN Appointment a ON pr.appointmentID = a.appointmentID
+    GROUP BY a.doctorID
+),
+process_counts AS (
+    SELECT a.doctorID, COUNT(*) as processCount
+    FROM Process p
+    JOIN Appointment a ON p.appointmentID = a.appointmentID
+    GROUP BY a.doctorID
+),
+revenue AS (
+    SELECT a.doctorID, SUM(b.amount) as revenue
+    FROM Billing b
+    JOIN Process p ON b.processID = p.processID
+    JOIN Appointment a ON p.appointmentID = a.appointmentID
+    WHERE b.paymentStatus = 'Paid'
+    GROUP BY a.doctorID
+)
+INSERT INTO DoctorCounters (doctorID, scheduledCount, completedCount, cancelledCount, noShowCount,
+                            prescriptionCount, processCount, revenue, ratingSum, ratingCount)
+SELECT d.employeeID,
+       COALESCE(ac.scheduledCount, 0), COALESCE(ac.completedCount, 0),
+       COALESCE(ac.cancelledCount, 0), COALESCE(ac.noShowCount, 0),
+       COALESCE(pc.prescriptionCount, 0), COALESCE(prc.processCount, 0),
+       COALESCE(r.revenue, 0), COALESCE(ac.ratingSum, 0), COALESCE(ac.ratingCount, 0)
+FROM Doctors d
+LEFT JOIN appointment_counts ac ON d.employeeID = ac.doctorID
+LEFT JOIN prescription_counts pc ON d.employeeID = pc.doctorID
+LEFT JOIN process_counts prc ON d.employeeID = prc.doctorID
+LEFT JOIN revenue r ON d.employeeID = r.doctorID
+ON CONFLICT (doctorID) DO UPDATE SET
+    scheduledCount = EXCLUDED.scheduledCount,
+    completedCount = EXCLUDED.completedCount,
+    cancelledCount = EXCLUDED.cancelledCount,
+    noShowCount = EXCLUDED.noShowCount,
+    prescriptionCount = EXCLUDED.prescriptionCount,
+    processCount = EXCLUDED.processCount,
+    revenue = EXCLUDED.revenue,
+    ratingSum = EXCLUDED.ratingSum,
+    ratingCount = EXCLUDED.ratingCount
+"""
+
+# Doctor's appointments for today, for the dashboard schedule
+GET_DOCTOR_SCHEDULE_TODAY = """
+SELECT a.appointmentid, a.patientid, p.name as patientname,
+       a.starttime, a.endtime, LOWER(a.status) as status
 FROM Appointment a
-WHERE a.doctorID = %s
-"""
\ No newline at end of file
+JOIN Patients p ON a.patientid = p.patientid
+WHERE a.doctorid = %s
+AND a.starttime >= CURRENT_DATE
+AND a.starttime < CURRENT_DATE + INTERVAL '1 day'
+ORDER BY a.starttime
+"""
+
+# Doctor's resource requests still waiting for staff
+GET_DOCTOR_PENDING_RESOURCE_REQUESTS = """
+SELECT r.resourceID as "resourceID", mr.name as "resourceName", r.status, r.timestamp
+FROM Request r
+JOIN MedicalResources mr ON r.resourceID = mr.resourceID
+WHERE r.doctorID = %s
+AND r.status = 'Pending'
+ORDER BY r.timestamp
+"""
+
+# Most recently seen patients
+GET_DOCTOR_RECENT_PATIENTS = """
+SELECT p.patientID, p.name, dp.lastAppointment
+FROM DoctorPatient dp
+JOIN Patients p ON dp.patientID = p.patientID
+WHERE dp.doctorID = %s
+ORDER BY dp.lastAppointment DESC
+LIMIT %s
+"""
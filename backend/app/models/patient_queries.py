@@ -22,10 +22,276 @@ WHERE patientID = %s
 RETURNING patientID, name, email, phoneNumber, DOB, Balance
 """
 
-# Add to patient balance
+# Add to patient balance and record the top-up in the ledger
 ADD_TO_BALANCE = """
-UPDATE Patients
-SET Balance = Balance + %s
+WITH credit AS (
+    UPDATE Patients
+    SET Balance = Balance + %(amount)s
+    WHERE patientID = %(patient_id)s
+    RETURNING patientID, name, email, phoneNumber, DOB, Balance
+),
+entry AS (
+    INSERT INTO BalanceLedger (patientID, amount, entryType)
+    SELECT patientID, %(amount)s, 'topup' FROM credit
+)
+SELECT * FROM credit
+"""
+
+# Get patient stats (single-row lookup of the trigger-maintained counters)
+GET_PATIENT_STATS = """
+SELECT 
+    scheduledCount + completedCount + cancelledCount + noShowCount as "appointmentCount",
+    scheduledCount as "scheduledCount",
+    completedCount as "completedCount",
+    cancelledCount as "cancelledCount",
+    noShowCount as "noShowCount",
+    prescriptionCount as "prescriptionCount",
+    processCount as "processCount",
+    totalPaid as "totalPaid"
+FROM PatientCounters
 WHERE patientID = %s
-RETURNING patientID, name, email, phoneNumber, DOB, Balance
-"""
\ No newline at end of file
+"""
+
+# Recompute every patient's counters from the source tables (repair/backfill)
+REBUILD_PATIENT_COUNTERS = """
+WITH appointment_counts AS (
+    SELECT patientID,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'scheduled') as scheduledCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'completed') as completedCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'cancelled') as cancelledCount,
+           COUNT(*) FILTER (WHERE LOWER(status) = 'no-show') as noShowCount,
+           COALESCE(SUM(rating), 0) as ratingSum,
+           COUNT(rating) as ratingCount
+    FROM Appointment
+    GROUP BY patientID
+),
+prescription_counts AS (
+    SELECT a.patientID, COUNT(*) as prescriptionCount
+    FROM Prescribes pr
+    JOIN Appointment a ON pr.appointmentID = a.appointmentID
+    GROUP BY a.patientID
+),
+process_counts AS (
+    SELECT a.patientID, COUNT(*) as processCount
+    FROM Process p
+    JOIN Appointment a ON p.appointmentID = a.appointmentID
+    GROUP BY a.patientID
+),
+paid AS (
+    SELECT a.patientID, SUM(b.amount) as totalPaid
+    FROM Billing b
+    JOIN Process p ON b.processID = p.processID
+    JOIN Appointment a ON p.appointmentID = a.appointmentID
+    WHERE b.paymentStatus = 'Paid'
+    GROUP BY a.patientID
+)
+INSERT INTO PatientCounters (patientID, scheduledCount, completedCount, cancelledCount, noShowCount,
+                             prescriptionCount, processCount, totalPaid, ratingSum, ratingCount)
+SELECT p.patientID,
+       COALESCE(ac.scheduledCount, 0), COALESCE(ac.completedCount, 0),
+       COALESCE(ac.cancelledCount, 0), COALESCE(ac.noShowCount, 0),
+       COALESCE(pc.prescriptionCount, 0), COALESCE(prc.processCount, 0),
+       COALESCE(pd.totalPaid, 0), COALESCE(ac.ratingSum, 0), COALESCE(ac.ratingCount, 0)
+FROM Patients p
+LEFT JOIN appointment_counts ac ON p.patientID = ac.patientID
+LEFT JOIN prescription_counts pc ON p.patientID = pc.patientID
+LEFT JOIN process_counts prc ON p.patientID = prc.patientID
+LEFT JOIN paid pd ON p.patientID = pd.patientID
+ON CONFLICT (patientID) DO UPDATE SET
+    scheduledCount = EXCLUDED.scheduledCount,
+    completedCount = EXCLUDED.completedCount,
+    cancelledCount = EXCLUDED.cancelledCount,
+    noShowCount = EXCLUDED.noShowCount,
+    prescriptionCount = EXCLUDED.prescriptionCount,
+    processCount = EXCLUDED.processCount,
+    totalPaid = EXCLUDED.totalPaid,
+    ratingSum = EXCLUDED.ratingSum,
+    ratingCount = EXCLUDED.ratingCount
+"""
+
+# Everything the patient portal needs for first paint, in one round trip
+GET_PATIENT_DASHBOARD = """
+SELECT p.patientID, p.name, p.email, p.phoneNumber, p.DOB, p.Balance,
+       (
+           SELECT row_to_json(c)
+           FROM (
+               SELECT scheduledCount + completedCount + cancelledCount + noShowCount as "appointmentCount",
+                      scheduledCount as "scheduledCount", completedCount as "completedCount",
+                      prescriptionCount as "prescriptionCount", processCount as "processCount",
+                      totalPaid as "totalPaid"
+               FROM PatientCounters
+               WHERE patientID = p.patientID
+           ) c
+       ) as stats,
+       COALESCE((
+           SELECT json_agg(ua ORDER BY ua.starttime)
+           FROM (
+               SELECT a.appointmentid, a.patientid, a.doctorid, a.starttime, a.endtime,
+                      a.status, a.rating, a.review, u.name as doctorname, d.specialization
+               FROM Appointment a
+               JOIN Doctors d ON a.doctorid = d.employeeid
+               JOIN "User" u ON d.employeeid = u.userid
+               WHERE a.patientid = p.patientID
+               AND a.starttime > NOW()
+               AND a.status = 'scheduled'
+               ORDER BY a.starttime
+               LIMIT %s
+           ) ua
+       ), '[]') as upcoming_appointments,
+       COALESCE((
+           SELECT json_agg(ub ORDER BY ub."billingDate", ub.processid)
+           FROM (
+               SELECT pr.processid, pr.processname as "processName", b.amount,
+                      b.billingdate as "billingDate", a.appointmentid, u.name as doctorname
+               FROM Appointment a
+               JOIN Process pr ON a.appointmentid = pr.appointmentid
+               JOIN Billing b ON pr.processid = b.processid
+               JOIN "User" u ON a.doctorid = u.userid
+               WHERE a.patientid = p.patientID
+               AND b.paymentStatus = 'Pending'
+           ) ub
+       ), '[]') as unpaid_bills,
+       COALESCE((
+           SELECT json_agg(rp ORDER BY rp.starttime DESC)
+           FROM (
+               SELECT m.medicationName as "medicationName", pr.appointmentID as "appointmentID",
+                      m.description, m.information, a.starttime
+               FROM Appointment a
+               JOIN Prescribes pr ON a.appointmentid = pr.appointmentid
+               JOIN Medications m ON pr.medicationName = m.medicationName
+               WHERE a.patientid = p.patientID
+               ORDER BY a.starttime DESC
+               LIMIT %s
+           ) rp
+       ), '[]') as recent_prescriptions
+FROM Patients p
+WHERE p.patientID = %s
+"""
+
+# Page through a patient's ledger, newest first; pass before = NULL for the
+# first page and the last entryID seen for the next one
+GET_BALANCE_HISTORY = """
+SELECT 
+    l.entryID AS "entryID",
+    l.amount,
+    l.entryType AS "entryType",
+    l.processID AS "processID",
+    p.processName AS "processName",
+    l.createdAt AS "createdAt"
+FROM BalanceLedger l
+LEFT JOIN Process p ON l.processID = p.processid
+WHERE l.patientID = %(patient_id)s
+AND (%(before)s::bigint IS NULL OR l.entryID < %(before)s)
+ORDER BY l.entryID DESC
+LIMIT %(limit)s
+"""
+
+# Balance recomputed from the ledger (latest snapshot + later entries) next
+# to the cached Patients.Balance
+GET_LEDGER_BALANCE = """
+SELECT 
+    p.patientID,
+    p.Balance AS balance,
+    COALESCE(s.balance, 0) + COALESCE((
+        SELECT SUM(l.amount)
+        FROM BalanceLedger l
+        WHERE l.patientID = p.patientID
+        AND l.entryID > COALESCE(s.entryID, 0)
+    ), 0) AS "ledgerBalance",
+    s.entryID AS "snapshotEntryID"
+FROM Patients p
+LEFT JOIN LATERAL (
+    SELECT entryID, balance
+    FROM BalanceSnapshot
+    WHERE patientID = p.patientID
+    ORDER BY entryID DESC
+    LIMIT 1
+) s ON TRUE
+WHERE p.patientID = %s
+"""
+
+# Lock the next batch of patients with ledger entries past their snapshot.
+# Every ledger write updates the patient's row in the same statement, so
+# holding these row locks keeps new entries for them out until commit, and
+# the next statement (a fresh READ COMMITTED snapshot) sees all committed
+# entries. Probes idx_balanceledger_patient once per patient.
+LOCK_BALANCE_SNAPSHOT_BATCH = """
+SELECT p.patientID
+FROM Patients p
+LEFT JOIN LATERAL (
+    SELECT entryID
+    FROM BalanceSnapshot
+    WHERE patientID = p.patientID
+    ORDER BY entryID DESC
+    LIMIT 1
+) s ON TRUE
+WHERE p.patientID > %(after)s
+AND EXISTS (
+    SELECT 1 FROM BalanceLedger l
+    WHERE l.patientID = p.patientID
+    AND l.entryID > COALESCE(s.entryID, 0)
+)
+ORDER BY p.patientID
+LIMIT %(batch_size)s
+FOR UPDATE OF p
+"""
+
+# Roll the given patients forward to a new snapshot: their latest snapshot
+# plus the ledger entries after it
+TAKE_BALANCE_SNAPSHOTS = """
+INSERT INTO BalanceSnapshot (patientID, entryID, balance)
+SELECT p.patientID, t.entryID, COALESCE(s.balance, 0) + t.delta
+FROM unnest(%(patient_ids)s::int[]) AS p(patientID)
+LEFT JOIN LATERAL (
+    SELECT entryID, balance
+    FROM BalanceSnapshot
+    WHERE patientID = p.patientID
+    ORDER BY entryID DESC
+    LIMIT 1
+) s ON TRUE
+CROSS JOIN LATERAL (
+    SELECT MAX(l.entryID) AS entryID, SUM(l.amount) AS delta
+    FROM BalanceLedger l
+    WHERE l.patientID = p.patientID
+    AND l.entryID > COALESCE(s.entryID, 0)
+) t
+WHERE t.entryID IS NOT NULL
+ON CONFLICT (patientID, entryID) DO NOTHING
+"""
+
+# Keep only each patient's latest snapshot, so reading it never depends on
+# how much history the patient has
+PRUNE_BALANCE_SNAPSHOTS = """
+DELETE FROM BalanceSnapshot s
+USING unnest(%(patient_ids)s::int[]) AS p(patientID)
+WHERE s.patientID = p.patientID
+AND s.entryID < (
+    SELECT MAX(entryID) FROM BalanceSnapshot WHERE patientID = p.patientID
+)
+"""
+
+# Record an adjustment for every patient whose cached balance has drifted
+# from the ledger (including balances that predate the ledger)
+RECONCILE_BALANCE_LEDGER = """
+WITH ledger AS (
+    SELECT p.patientID, p.Balance,
+           COALESCE(s.balance, 0) + COALESCE((
+               SELECT SUM(l.amount)
+               FROM BalanceLedger l
+               WHERE l.patientID = p.patientID
+               AND l.entryID > COALESCE(s.entryID, 0)
+           ), 0) AS ledger_balance
+    FROM Patients p
+    LEFT JOIN LATERAL (
+        SELECT entryID, balance
+        FROM BalanceSnapshot
+        WHERE patientID = p.patientID
+        ORDER BY entryID DESC
+        LIMIT 1
+    ) s ON TRUE
+)
+INSERT INTO BalanceLedger (patientID, amount, entryType)
+SELECT patientID, COALESCE(Balance, 0) - ledger_balance, 'adjustment'
+FROM ledger
+WHERE COALESCE(Balance, 0) <> ledger_balance
+"""
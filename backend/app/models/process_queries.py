@@ -1,25 +1,26 @@
 # app/models/process_queries.py
 
-# Get patient's medical processes
+# Get a patient's medical processes, keyed by patientID (served by
+# idx_appointment_patient_start, idx_process_appointment and idx_billing_process)
 GET_PATIENT_PROCESSES = """
 SELECT 
-    P.processid,
-    P.processName AS "processName",
-    P.processDescription AS "processDescription",
-    U2.name AS doctor_name,
-    DATE(A.startTime) AS process_date,
-    P.status,
-    B.amount,
-    B.paymentStatus
-FROM User U
-JOIN Patients Pa ON U.userID = Pa.patientID
-JOIN Appointment A ON Pa.patientID = A.patientID
-JOIN Doctors D ON A.doctorID = D.employeeID
-JOIN User U2 ON D.employeeID = U2.userID
-JOIN Process P ON A.appointmentID = P.appointmentID
-JOIN Billing B ON P.processid = B.processid
-WHERE U.name = %s
-ORDER BY A.startTime
+    p.processid,
+    p.processName AS "processName",
+    p.processDescription AS "processDescription",
+    p.status,
+    CASE WHEN b.billingID IS NOT NULL THEN json_build_object(
+        'amount', b.amount,
+        'paymentStatus', b.paymentStatus,
+        'billingDate', b.billingDate
+    ) END AS billing
+FROM Appointment a
+JOIN Process p ON a.appointmentID = p.appointmentID
+LEFT JOIN Billing b ON p.processid = b.processid
+WHERE a.patientID = %(patient_id)s
+AND (%(from)s::timestamp IS NULL OR a.startTime >= %(from)s)
+AND (%(to)s::timestamp IS NULL OR a.startTime < %(to)s)
+ORDER BY a.startTime, p.processid
+LIMIT %(limit)s OFFSET %(offset)s
 """
 
 # Get doctor's patient processes
@@ -52,6 +53,21 @@ AND a.doctorID = %s
 ORDER BY a.startTime DESC
 """
 
+# Get the doctor and patient of an appointment
+GET_APPOINTMENT_PARTICIPANTS = """
+SELECT appointmentid, doctorid, patientid
+FROM Appointment
+WHERE appointmentid = %s
+"""
+
+# Get the appointment, doctor and patient a process belongs to
+GET_PROCESS_PARTICIPANTS = """
+SELECT a.appointmentid, a.doctorid, a.patientid
+FROM Process p
+JOIN Appointment a ON p.appointmentid = a.appointmentid
+WHERE p.processid = %s
+"""
+
 # Create new medical process
 CREATE_MEDICAL_PROCESS = """
 INSERT INTO Process (
@@ -70,6 +86,51 @@ VALUES (NOW(), %s, 'Pending', %s)
 RETURNING billingID
 """
 
+# Create several processes with their billing rows for one of the doctor's
+# appointments. Process IDs are drawn up front so each billing row can be
+# paired with its process without relying on RETURNING order, and patient
+# statistics are bumped once for the whole batch. Returns no rows if the
+# appointment does not belong to the doctor.
+CREATE_PROCESSES_BATCH = """
+WITH appointment AS (
+    SELECT appointmentID, patientID, doctorID
+    FROM Appointment
+    WHERE appointmentID = %(appointment_id)s
+    AND doctorID = %(doctor_id)s
+),
+input AS (
+    SELECT nextval(pg_get_serial_sequence('process', 'processid')) AS processid,
+           i.name, i.description, i.amount
+    FROM appointment
+    CROSS JOIN unnest(%(names)s::text[], %(descriptions)s::text[], %(amounts)s::numeric[])
+        WITH ORDINALITY AS i(name, description, amount, ord)
+    ORDER BY i.ord
+),
+processes AS (
+    INSERT INTO Process (processID, processName, processDescription, status, appointmentID)
+    SELECT processid, name, description, 'Scheduled', %(appointment_id)s
+    FROM input
+    RETURNING processID
+),
+billing AS (
+    INSERT INTO Billing (billingDate, amount, paymentStatus, processid)
+    SELECT NOW(), amount, 'Pending', processid
+    FROM input
+    RETURNING processid
+),
+stats AS (
+    UPDATE PatientStatistics s
+    SET totalProcesses = totalProcesses + (SELECT COUNT(*) FROM processes)
+    FROM appointment a
+    WHERE s.patientID = a.patientID
+    AND s.reportDate = CURRENT_DATE
+)
+SELECT i.processid, i.name AS "processName", i.amount, a.patientID, a.doctorID
+FROM input i
+CROSS JOIN appointment a
+ORDER BY i.processid
+"""
+
 # Update process status
 UPDATE_PROCESS_STATUS = """
 UPDATE Process
@@ -104,33 +165,160 @@ WHERE p.appointmentid = %s
 ORDER BY p.processid DESC
 """
 
-# Update billing status and patient balance
-UPDATE_PROCESS_PAYMENT = """
-WITH process_info AS (
-    SELECT b.amount, a.patientid
+# Pay for a process in one statement and one transaction: lock the bill,
+# debit the patient only if the balance covers it, mark the bill paid and
+# record the ledger entry only if the debit happened, and return the
+# updated process. Concurrent payments serialize on the Billing and Patients
+# row locks and re-check their conditions, so a bill is never paid twice and
+# the balance never goes negative.
+PAY_FOR_PROCESS = """
+WITH target AS (
+    SELECT b.billingID, b.processid, b.amount, b.paymentStatus, b.billingDate,
+           a.appointmentid, a.doctorid, a.patientid
     FROM Billing b
     JOIN Process p ON b.processid = p.processid
     JOIN Appointment a ON p.appointmentid = a.appointmentid
-    WHERE b.processid = %s
-    AND b.paymentStatus = 'Pending'
-    FOR UPDATE
-)
-UPDATE Billing b
-SET paymentStatus = 'Paid'
-FROM process_info pi
-WHERE b.processid = %s
-AND EXISTS (
-    SELECT 1 FROM Patients p
-    WHERE p.patientid = pi.patientid
-    AND p.balance >= pi.amount
+    WHERE b.processid = %(process_id)s
+    AND a.patientid = %(patient_id)s
+    ORDER BY (b.paymentStatus = 'Pending') DESC, b.billingID
+    LIMIT 1
+    FOR UPDATE OF b
+),
+debit AS (
+    UPDATE Patients pa
+    SET balance = pa.balance - t.amount
+    FROM target t
+    WHERE pa.patientid = t.patientid
+    AND t.paymentStatus = 'Pending'
+    AND pa.balance >= t.amount
+    RETURNING pa.balance
+),
+paid AS (
+    UPDATE Billing b
+    SET paymentStatus = 'Paid'
+    FROM target t
+    WHERE b.billingID = t.billingID
+    AND EXISTS (SELECT 1 FROM debit)
+    RETURNING b.billingID
+),
+entry AS (
+    INSERT INTO BalanceLedger (patientID, amount, entryType, processID)
+    SELECT t.patientid, -t.amount, 'payment', t.processid
+    FROM target t
+    WHERE EXISTS (SELECT 1 FROM debit)
 )
-RETURNING b.processid, b.paymentStatus, pi.amount, pi.patientid;
+SELECT 
+    p.processid,
+    p.processname AS "processName",
+    p.processdescription AS "processDescription",
+    p.status,
+    t.appointmentid,
+    t.doctorid,
+    t.patientid,
+    t.amount,
+    t.paymentStatus AS previous_status,
+    EXISTS (SELECT 1 FROM paid) AS paid,
+    COALESCE((SELECT balance FROM debit), pa.balance) AS balance,
+    json_build_object(
+        'amount', t.amount,
+        'paymentStatus', CASE WHEN EXISTS (SELECT 1 FROM paid) THEN 'Paid' ELSE t.paymentStatus END,
+        'billingDate', t.billingDate
+    ) AS billing
+FROM target t
+JOIN Process p ON t.processid = p.processid
+JOIN Patients pa ON t.patientid = pa.patientid
 """
 
-# Deduct amount from patient balance
-DEDUCT_PROCESS_PAYMENT = """
-UPDATE Patients p
-SET balance = balance - %s
-WHERE p.patientid = %s
-RETURNING p.balance;
-""" 
\ No newline at end of file
+# Pay several of a patient's bills in one statement. Bills are locked in
+# billingID order (so concurrent batches cannot deadlock), the payable set is
+# chosen against the balance - all of it in atomic mode, the longest
+# processid-ordered prefix that fits in best-effort mode - and the patient is
+# debited once, with one ledger entry per paid bill. The debit re-checks the
+# balance under the row lock; if a concurrent payment got there first nothing
+# is paid and the planned items come back as 'conflict' so the caller can retry.
+# Pass process_ids = NULL to pay every pending bill.
+PAY_PROCESSES_BATCH = """
+WITH requested AS (
+    SELECT DISTINCT unnest(%(process_ids)s::int[]) AS processid
+),
+locked AS (
+    SELECT b.billingID, b.processid, b.amount, b.paymentStatus, a.doctorid
+    FROM Billing b
+    JOIN Process p ON b.processid = p.processid
+    JOIN Appointment a ON p.appointmentid = a.appointmentid
+    WHERE a.patientid = %(patient_id)s
+    AND CASE WHEN %(process_ids)s::int[] IS NULL THEN b.paymentStatus = 'Pending'
+             ELSE b.processid = ANY(%(process_ids)s::int[]) END
+    ORDER BY b.billingID
+    FOR UPDATE OF b
+),
+bills AS (
+    SELECT DISTINCT ON (processid) *
+    FROM locked
+    ORDER BY processid, (paymentStatus = 'Pending') DESC, billingID
+),
+items AS (
+    SELECT COALESCE(r.processid, b.processid) AS processid,
+           b.billingID, b.amount, b.paymentStatus, b.doctorid
+    FROM requested r
+    FULL JOIN bills b ON r.processid = b.processid
+),
+totals AS (
+    SELECT COALESCE(SUM(amount) FILTER (WHERE paymentStatus = 'Pending'), 0) AS pending_total,
+           BOOL_AND(paymentStatus IS NOT DISTINCT FROM 'Pending') AS all_pending,
+           (SELECT balance FROM Patients WHERE patientid = %(patient_id)s) AS balance
+    FROM items
+),
+plan AS (
+    SELECT i.*,
+           COALESCE(i.paymentStatus = 'Pending' AND CASE
+               WHEN %(atomic)s THEN t.all_pending AND t.pending_total <= t.balance
+               ELSE SUM(i.amount) FILTER (WHERE i.paymentStatus = 'Pending')
+                        OVER (ORDER BY i.processid) <= t.balance
+           END, FALSE) AS pay
+    FROM items i
+    CROSS JOIN totals t
+),
+debit AS (
+    UPDATE Patients pa
+    SET balance = pa.balance - s.total
+    FROM (SELECT SUM(amount) AS total FROM plan WHERE pay) s
+    WHERE pa.patientid = %(patient_id)s
+    AND s.total IS NOT NULL
+    AND pa.balance >= s.total
+    RETURNING pa.balance
+),
+paid AS (
+    UPDATE Billing b
+    SET paymentStatus = 'Paid'
+    FROM plan
+    WHERE b.billingID = plan.billingID
+    AND plan.pay
+    AND EXISTS (SELECT 1 FROM debit)
+    RETURNING b.processid
+),
+entries AS (
+    INSERT INTO BalanceLedger (patientID, amount, entryType, processID)
+    SELECT %(patient_id)s, -amount, 'payment', processid
+    FROM plan
+    WHERE pay
+    AND EXISTS (SELECT 1 FROM debit)
+)
+SELECT 
+    plan.processid,
+    plan.amount,
+    plan.doctorid,
+    CASE
+        WHEN plan.billingID IS NULL THEN 'not_found'
+        WHEN plan.paymentStatus <> 'Pending' THEN 'already_paid'
+        WHEN paid.processid IS NOT NULL THEN 'paid'
+        WHEN plan.pay THEN 'conflict'
+        WHEN %(atomic)s AND t.pending_total <= t.balance THEN 'aborted'
+        ELSE 'insufficient_balance'
+    END AS status,
+    COALESCE((SELECT balance FROM debit), t.balance) AS balance
+FROM plan
+CROSS JOIN totals t
+LEFT JOIN paid ON paid.processid = plan.processid
+ORDER BY plan.processid
+"""
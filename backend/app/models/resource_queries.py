@@ -1,8 +1,9 @@
 # app/models/resource_queries.py
 
-# Get all medical resources
+# Get all medical resources (availability includes active reservations; see
+# current_resource_availability in schema.sql)
 GET_ALL_RESOURCES = """
-SELECT resourceID as "resourceID", name, availability
+SELECT resourceID as "resourceID", name, current_resource_availability(resourceID, availability) as availability
 FROM MedicalResources
 {where_clause}
 ORDER BY name
@@ -10,35 +11,149 @@ ORDER BY name
 
 # Get resource by ID
 GET_RESOURCE_BY_ID = """
-SELECT resourceID as "resourceID", name, availability
+SELECT resourceID as "resourceID", name, current_resource_availability(resourceID, availability) as availability
 FROM MedicalResources
 WHERE resourceID = %s
 """
 
 # Filter resources by name
 FILTER_RESOURCES_BY_NAME = """
-SELECT resourceID as "resourceID", name, availability
+SELECT resourceID as "resourceID", name, current_resource_availability(resourceID, availability) as availability
 FROM MedicalResources
 WHERE name ILIKE %s
 ORDER BY name
 """
 
-# Filter resources by department
+# Search resources by name, most relevant first: exact match, then prefix,
+# then trigram similarity. Served by idx_medicalresources_name_trgm for both
+# the ILIKE and the % (similarity) conditions. Requires pg_trgm.
+SEARCH_RESOURCES_TRGM = """
+SELECT resourceID as "resourceID", name, current_resource_availability(resourceID, availability) as availability
+FROM MedicalResources
+WHERE (name ILIKE %(pattern)s OR name %% %(q)s)
+AND (NOT %(available_only)s OR current_resource_availability(resourceID, availability) = 'Available')
+ORDER BY lower(name) = lower(%(q)s) DESC,
+         name ILIKE %(prefix)s DESC,
+         similarity(name, %(q)s) DESC,
+         name
+LIMIT %(limit)s
+"""
+
+# Same ranking without pg_trgm: substring matches only, earlier and
+# shorter matches first
+SEARCH_RESOURCES = """
+SELECT resourceID as "resourceID", name, current_resource_availability(resourceID, availability) as availability
+FROM MedicalResources
+WHERE name ILIKE %(pattern)s
+AND (NOT %(available_only)s OR current_resource_availability(resourceID, availability) = 'Available')
+ORDER BY lower(name) = lower(%(q)s) DESC,
+         position(lower(%(q)s) in lower(name)),
+         length(name),
+         name
+LIMIT %(limit)s
+"""
+
+# Filter resources by department through the ResourceDepartment mapping,
+# optionally narrowed by name and availability. Name matches are ranked and
+# limited like SEARCH_RESOURCES; department-only listings are not limited.
 FILTER_RESOURCES_BY_DEPARTMENT = """
-SELECT mr.resourceID as "resourceID", mr.name, mr.availability, d.deptName
-FROM MedicalResources mr
-JOIN Request req ON mr.resourceID = req.resourceID
-JOIN Doctors doc ON req.doctorID = doc.employeeID
-JOIN Dept d ON doc.deptName = d.deptName
-WHERE d.deptName = %s
-ORDER BY mr.name
+SELECT mr.resourceID as "resourceID", mr.name,
+       current_resource_availability(mr.resourceID, mr.availability) as availability, rd.deptName
+FROM ResourceDepartment rd
+JOIN MedicalResources mr ON rd.resourceID = mr.resourceID
+WHERE rd.deptName = %(department)s
+AND rd.source <> 'removed'
+AND (%(pattern)s::text IS NULL OR mr.name ILIKE %(pattern)s)
+AND (NOT %(available_only)s OR current_resource_availability(mr.resourceID, mr.availability) = 'Available')
+ORDER BY lower(mr.name) = lower(%(q)s) DESC,
+         position(lower(%(q)s) in lower(mr.name)),
+         mr.name
+LIMIT CASE WHEN %(q)s::text IS NULL THEN NULL ELSE %(limit)s END
+"""
+
+# Departments associated with a resource
+GET_RESOURCE_DEPARTMENTS = """
+SELECT rd.deptName as "deptName", rd.source, rd.requestCount as "requestCount"
+FROM ResourceDepartment rd
+WHERE rd.resourceID = %s
+ORDER BY rd.source = 'removed', rd.deptName
+"""
+
+# Pin a resource to a department (admin); returns no row when either does not exist
+SET_RESOURCE_DEPARTMENT = """
+INSERT INTO ResourceDepartment AS rd (deptName, resourceID, source)
+SELECT d.deptName, mr.resourceID, 'manual'
+FROM Dept d, MedicalResources mr
+WHERE d.deptName = %(department)s AND mr.resourceID = %(resource_id)s
+ON CONFLICT (deptName, resourceID) DO UPDATE SET source = 'manual'
+RETURNING rd.deptName as "deptName", rd.source, rd.requestCount as "requestCount"
+"""
+
+# Unlink a resource from a department (admin). Associations backed by
+# request history are hidden rather than deleted so new requests do not
+# re-create them.
+REMOVE_RESOURCE_DEPARTMENT = """
+WITH hidden AS (
+    UPDATE ResourceDepartment
+    SET source = 'removed'
+    WHERE deptName = %(department)s AND resourceID = %(resource_id)s AND requestCount > 0
+    RETURNING deptName
+),
+deleted AS (
+    DELETE FROM ResourceDepartment
+    WHERE deptName = %(department)s AND resourceID = %(resource_id)s AND requestCount = 0
+    RETURNING deptName
+)
+SELECT deptName FROM hidden
+UNION ALL
+SELECT deptName FROM deleted
+"""
+
+# Recompute derived associations and their request counts from request history (repair/backfill)
+REBUILD_RESOURCE_DEPARTMENTS = """
+WITH history AS (
+    SELECT doc.deptName, r.resourceID, COUNT(*) as requestCount
+    FROM Request r
+    JOIN Doctors doc ON r.doctorID = doc.employeeID
+    WHERE doc.deptName IS NOT NULL
+    GROUP BY doc.deptName, r.resourceID
+),
+upserted AS (
+    INSERT INTO ResourceDepartment AS rd (deptName, resourceID, requestCount)
+    SELECT deptName, resourceID, requestCount FROM history
+    ON CONFLICT (deptName, resourceID) DO UPDATE SET requestCount = EXCLUDED.requestCount
+    RETURNING 1
+),
+unused AS (
+    SELECT rd.deptName, rd.resourceID, rd.source
+    FROM ResourceDepartment rd
+    WHERE NOT EXISTS (
+        SELECT 1 FROM history h WHERE h.deptName = rd.deptName AND h.resourceID = rd.resourceID
+    )
+),
+deleted AS (
+    DELETE FROM ResourceDepartment rd
+    USING unused u
+    WHERE rd.deptName = u.deptName AND rd.resourceID = u.resourceID AND u.source = 'derived'
+    RETURNING 1
+),
+zeroed AS (
+    UPDATE ResourceDepartment rd
+    SET requestCount = 0
+    FROM unused u
+    WHERE rd.deptName = u.deptName AND rd.resourceID = u.resourceID AND u.source <> 'derived'
+    RETURNING 1
+)
+SELECT (SELECT COUNT(*) FROM upserted) as derived,
+       (SELECT COUNT(*) FROM deleted) as deleted,
+       (SELECT COUNT(*) FROM zeroed) as zeroed
 """
 
 # Show available resources
 GET_AVAILABLE_RESOURCES = """
 SELECT resourceID as "resourceID", name, availability
 FROM MedicalResources
-WHERE availability = 'Available'
+WHERE current_resource_availability(resourceID, availability) = 'Available'
 ORDER BY name
 """
 
@@ -47,7 +162,8 @@ CREATE_RESOURCE_REQUEST = """
 INSERT INTO Request (doctorID, resourceID, status)
 VALUES (%s, %s, %s)
 ON CONFLICT (doctorID, resourceID) DO UPDATE 
-SET status = EXCLUDED.status
+SET status = EXCLUDED.status,
+    timestamp = CURRENT_TIMESTAMP
 """
 
 # Get doctor resource requests
@@ -69,6 +185,48 @@ JOIN "User" u ON d.employeeID = u.userID
 ORDER BY r.status, u.name, mr.name
 """
 
+# Apply staff decisions to many existing requests in one statement. When the
+# same request appears more than once the last decision wins. Request rows
+# are locked in key order so concurrent bulk calls cannot deadlock.
+BULK_UPDATE_REQUEST_STATUS = """
+WITH input AS (
+    SELECT d.doctorID, d.resourceID, d.status, d.ord
+    FROM unnest(%(doctor_ids)s::int[], %(resource_ids)s::int[], %(statuses)s::varchar[])
+         WITH ORDINALITY AS d(doctorID, resourceID, status, ord)
+),
+decisions AS (
+    SELECT DISTINCT ON (doctorID, resourceID) *
+    FROM input
+    ORDER BY doctorID, resourceID, ord DESC
+),
+locked AS (
+    SELECT r.doctorID, r.resourceID
+    FROM Request r
+    JOIN decisions d ON r.doctorID = d.doctorID AND r.resourceID = d.resourceID
+    ORDER BY r.doctorID, r.resourceID
+    FOR UPDATE OF r
+),
+updated AS (
+    UPDATE Request r
+    SET status = d.status,
+        timestamp = CURRENT_TIMESTAMP
+    FROM decisions d
+    JOIN locked l ON l.doctorID = d.doctorID AND l.resourceID = d.resourceID
+    WHERE r.doctorID = d.doctorID AND r.resourceID = d.resourceID
+    RETURNING r.doctorID, r.resourceID, r.status
+)
+SELECT i.doctorID as "doctorID", i.resourceID as "resourceID", i.status,
+       CASE
+           WHEN d.ord IS DISTINCT FROM i.ord THEN 'superseded'
+           WHEN u.doctorID IS NULL THEN 'not_found'
+           ELSE 'updated'
+       END as result
+FROM input i
+LEFT JOIN decisions d ON d.doctorID = i.doctorID AND d.resourceID = i.resourceID
+LEFT JOIN updated u ON u.doctorID = i.doctorID AND u.resourceID = i.resourceID
+ORDER BY i.ord
+"""
+
 # Update resource availability
 UPDATE_RESOURCE_AVAILABILITY = """
 UPDATE MedicalResources
@@ -83,29 +241,132 @@ VALUES (%s, 'Available')
 RETURNING resourceID as "resourceID", name, availability
 """
 
-# Get recent resource activities
+# Get recent resource activities from the request event log, newest first.
+# Keyset paging: pass the last eventID seen as `before` for the next page.
 GET_RECENT_RESOURCE_ACTIVITIES = """
 SELECT 
-    r.doctorID as "doctorID", 
-    r.resourceID as "resourceID", 
-    r.status, 
+    e.eventID as "eventID",
+    e.doctorID as "doctorID", 
+    e.resourceID as "resourceID", 
+    e.status, 
     mr.name as "resourceName", 
     u.name as "doctorName",
-    COALESCE(r.timestamp, CURRENT_TIMESTAMP) as "timestamp"
-FROM Request r
-JOIN MedicalResources mr ON r.resourceID = mr.resourceID
-JOIN Doctors d ON r.doctorID = d.employeeID
-JOIN "User" u ON d.employeeID = u.userID
-ORDER BY COALESCE(r.timestamp, CURRENT_TIMESTAMP) DESC
-LIMIT %s
+    e.createdAt as "timestamp"
+FROM RequestEvent e
+JOIN MedicalResources mr ON e.resourceID = mr.resourceID
+JOIN "User" u ON e.doctorID = u.userID
+WHERE %(before)s::BIGINT IS NULL OR e.eventID < %(before)s
+ORDER BY e.eventID DESC
+LIMIT %(limit)s
 """
 
-# Get resource statistics
+# Get resource statistics (single-row read of the trigger-maintained counters)
 GET_RESOURCE_STATISTICS = """
 SELECT 
-    COUNT(*) as "totalRequests",
-    COUNT(CASE WHEN status = 'Approved' AND (timestamp IS NULL OR DATE(timestamp) = CURRENT_DATE) THEN 1 END) as "approvedToday",
-    COUNT(CASE WHEN status = 'Pending' THEN 1 END) as "pendingRequests",
-    (SELECT COUNT(*) FROM MedicalResources) as "resourcesManaged"
+    c.totalRequests as "totalRequests",
+    COALESCE(d.approvedCount, 0) as "approvedToday",
+    c.pendingRequests as "pendingRequests",
+    c.resourcesManaged as "resourcesManaged"
+FROM ResourceCounters c
+LEFT JOIN ResourceApprovalsDaily d ON d.day = CURRENT_DATE
+"""
+
+# Recompute the resource counters from the source tables (repair/backfill)
+REBUILD_RESOURCE_COUNTERS = """
+INSERT INTO ResourceCounters (singleton, totalRequests, pendingRequests, resourcesManaged)
+SELECT TRUE,
+       (SELECT COUNT(*) FROM Request),
+       (SELECT COUNT(*) FROM Request WHERE status = 'Pending'),
+       (SELECT COUNT(*) FROM MedicalResources)
+ON CONFLICT (singleton) DO UPDATE SET
+    totalRequests = EXCLUDED.totalRequests,
+    pendingRequests = EXCLUDED.pendingRequests,
+    resourcesManaged = EXCLUDED.resourcesManaged
+"""
+
+# Refill the daily approval buckets (run after clearing ResourceApprovalsDaily)
+REBUILD_RESOURCE_APPROVALS = """
+INSERT INTO ResourceApprovalsDaily (day, approvedCount)
+SELECT COALESCE(timestamp::DATE, CURRENT_DATE), COUNT(*)
 FROM Request
+WHERE status = 'Approved'
+GROUP BY 1
+"""
+
+# Seed the event log with the current state of requests that have no events yet (backfill)
+BACKFILL_REQUEST_EVENTS = """
+INSERT INTO RequestEvent (doctorID, resourceID, status, createdAt)
+SELECT r.doctorID, r.resourceID, r.status, COALESCE(r.timestamp, NOW())
+FROM Request r
+WHERE NOT EXISTS (
+    SELECT 1 FROM RequestEvent e
+    WHERE e.doctorID = r.doctorID AND e.resourceID = r.resourceID
+)
+ORDER BY COALESCE(r.timestamp, NOW())
+"""
+
+# Reserve a resource for a time window; no row is returned when the resource does not exist.
+# Overlaps are rejected by the excl_reservation_overlap constraint.
+CREATE_RESERVATION = """
+INSERT INTO ResourceReservation (resourceID, doctorID, startTime, endTime, createdBy)
+SELECT mr.resourceID, %(doctor_id)s, %(start)s, %(end)s, %(created_by)s
+FROM MedicalResources mr
+WHERE mr.resourceID = %(resource_id)s
+RETURNING reservationID as "reservationID", resourceID as "resourceID", doctorID as "doctorID",
+          startTime as "startTime", endTime as "endTime"
+"""
+
+# Reservations of a resource overlapping a window, by start time (see
+# GET_RESOURCE_FREE_WINDOWS for why the lower bound can be a start time)
+GET_RESOURCE_RESERVATIONS = """
+SELECT reservationID as "reservationID", resourceID as "resourceID", doctorID as "doctorID",
+       startTime as "startTime", endTime as "endTime"
+FROM ResourceReservation
+WHERE resourceID = %(resource_id)s
+AND startTime < %(to)s AND endTime > %(from)s
+AND startTime >= COALESCE(
+    (SELECT MAX(startTime) FROM ResourceReservation
+     WHERE resourceID = %(resource_id)s AND startTime < %(from)s),
+    %(from)s
+)
+ORDER BY startTime
+"""
+
+# Cancel a reservation (doctors may only cancel their own)
+DELETE_RESERVATION = """
+DELETE FROM ResourceReservation
+WHERE reservationID = %(reservation_id)s AND resourceID = %(resource_id)s
+AND (%(doctor_id)s::int IS NULL OR doctorID = %(doctor_id)s)
+RETURNING reservationID
+"""
+
+# Free windows of a resource between `from` and `to`. Reservations of one
+# resource never overlap, so only the latest reservation starting before
+# `from` can reach into the window; together with the reservations starting
+# inside it, both come from (resourceID, startTime) index range scans.
+GET_RESOURCE_FREE_WINDOWS = """
+WITH booked AS (
+    (SELECT startTime, endTime
+     FROM ResourceReservation
+     WHERE resourceID = %(resource_id)s AND startTime < %(from)s
+     ORDER BY startTime DESC
+     LIMIT 1)
+    UNION ALL
+    (SELECT startTime, endTime
+     FROM ResourceReservation
+     WHERE resourceID = %(resource_id)s AND startTime >= %(from)s AND startTime < %(to)s
+     ORDER BY startTime)
+),
+gaps AS (
+    SELECT endTime AS gapStart,
+           LEAD(startTime, 1, %(to)s) OVER (ORDER BY startTime) AS gapEnd
+    FROM booked
+    UNION ALL
+    SELECT %(from)s, COALESCE(MIN(startTime), %(to)s)
+    FROM booked
+)
+SELECT GREATEST(gapStart, %(from)s) as "start", LEAST(gapEnd, %(to)s) as "end"
+FROM gaps
+WHERE LEAST(gapEnd, %(to)s) > GREATEST(gapStart, %(from)s)
+ORDER BY 1
 """
\ No newline at end of file
@@ -3,7 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import datetime, timedelta
 from ..utils.auth import get_current_user
-from ..database import execute_query
+from ..utils.etag import catalog_versions
+from ..utils.fastjson import trusted_response
+from ..schemas.patient import PatientProfile
+from ..database import execute_query, execute_transaction
 from ..models.admin_queries import *
 
 router = APIRouter(prefix="/admin", tags=["Administration"])
@@ -30,7 +33,8 @@ async def get_all_patients(current_user = Depends(get_current_user)):
         )
     
     patients = execute_query(GET_ALL_PATIENTS)
-    return patients
+    # Limited to the PatientProfile columns (by their row keys), as the portal reads them
+    return trusted_response(patients, PatientProfile)
 
 @router.get("/resources")
 async def get_all_resources_admin(current_user = Depends(get_current_user)):
@@ -242,12 +246,11 @@ async def generate_report(current_user = Depends(get_current_user)):
             # Get resource stats
             resource_stats = execute_query("""
                 SELECT 
-                    COUNT(r.doctorID) as usageCount,
-                    MAX(r.doctorID) as lastUsedBy,
-                    COUNT(r.doctorID) as totalRequests
-                FROM MedicalResources mr
-                LEFT JOIN Request r ON mr.resourceID = r.resourceID
-                WHERE mr.resourceID = %s
+                    COUNT(*) FILTER (WHERE status = 'Approved') as usageCount,
+                    MAX(DATE(createdAt)) FILTER (WHERE status = 'Approved') as lastUsedDate,
+                    COUNT(*) FILTER (WHERE status = 'Pending') as totalRequests
+                FROM RequestEvent
+                WHERE resourceID = %s
             """, (resource["resourceid"],))
             
             if resource_stats:
@@ -258,7 +261,7 @@ async def generate_report(current_user = Depends(get_current_user)):
                         report_id,
                         resource["resourceid"],
                         resource_stats[0]["usagecount"] or 0,
-                        datetime.now().date() if resource_stats[0]["lastusedby"] else None,
+                        resource_stats[0]["lastuseddate"],
                         resource_stats[0]["totalrequests"] or 0
                     )
                 ))
@@ -303,6 +306,7 @@ async def generate_report(current_user = Depends(get_current_user)):
         
         # Execute transaction
         execute_transaction(transaction_queries)
+        catalog_versions.bump("reports")
         
         return {
             "reportID": report_id, 
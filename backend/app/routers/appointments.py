@@ -1,8 +1,13 @@
 # app/routers/appointments.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Optional
 from datetime import datetime, date
 from ..utils.auth import get_current_user
+from ..utils.cache import response_cache
+from ..utils.coalesce import read_coalescer
+from ..utils.etag import catalog_versions, etag_matches, not_modified_response, set_etag_headers
+from ..utils.events import publish_event
+from ..utils.fastjson import trusted_response
 from ..database import execute_query, execute_transaction
 from ..schemas.appointment import AppointmentCreate, AppointmentResponse, StatusUpdate, ReviewCreate
 from ..models.appointment_queries import *
@@ -11,12 +16,19 @@ import logging
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
 
 @router.get("/doctors")
+@response_cache.cached(300, tags=["doctors"])
 async def get_doctors_for_appointments(
+    request: Request,
+    response: Response,
     specialization: Optional[str] = None,
     min_rating: Optional[float] = None,
     current_user = Depends(get_current_user)
 ):
     """Get doctors for appointment booking, with optional filters"""
+    etag = catalog_versions.etag("doctors", variant=(specialization, min_rating))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    
     # Build where clause based on provided filters
     where_conditions = []
     params = []
@@ -38,15 +50,19 @@ async def get_doctors_for_appointments(
     
     # Execute the query
     doctors = execute_query(formatted_query, params)
+    set_etag_headers(response, etag)
     return doctors
 
 @router.get("/doctor/{doctor_id}/available-dates")
+@response_cache.cached(60, tags=["slots:{doctor_id}"])
 async def get_doctor_available_dates(
     doctor_id: int,
     current_user = Depends(get_current_user)
 ):
     """Get all available dates for a doctor"""
-    dates = execute_query(GET_DOCTOR_AVAILABLE_DATES, (doctor_id,))
+    dates = await read_coalescer.run(
+        ("available-dates", doctor_id), execute_query, GET_DOCTOR_AVAILABLE_DATES, (doctor_id,)
+    )
     
     # Extract date values from result
     available_dates = [row["date"].isoformat() for row in dates]
@@ -67,7 +83,10 @@ async def get_doctor_slots(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
     
-    slots = execute_query(GET_DOCTOR_SLOTS, (doctor_id, parsed_date))
+    # A doctor opening new slots draws a burst of identical reads; they share one query
+    slots = await read_coalescer.run(
+        ("slots", doctor_id, parsed_date), execute_query, GET_DOCTOR_SLOTS, (doctor_id, parsed_date)
+    )
     return slots
 
 @router.post("/book", response_model=AppointmentResponse)
@@ -115,6 +134,11 @@ async def book_appointment(
             (appointment.doctorID, appointment.startTime, appointment.endTime),
             fetch=False
         )
+        catalog_versions.bump(f"slots:{appointment.doctorID}")
+        read_coalescer.forget(
+            ("slots", appointment.doctorID, appointment.startTime.date()),
+            ("available-dates", appointment.doctorID)
+        )
         
         # Get doctor name and specialization
         doctor_info = execute_query(
@@ -125,6 +149,29 @@ async def book_appointment(
         doctor_name = doctor_info[0]["name"] if doctor_info else None
         specialization = doctor_info[0]["specialization"] if doctor_info else None
         
+        publish_event(
+            "slot-booked",
+            {
+                "appointmentID": appointment_id,
+                "doctorID": appointment.doctorID,
+                "patientID": current_user["userid"],
+                "startTime": appointment.startTime,
+                "endTime": appointment.endTime
+            },
+            doctor_id=appointment.doctorID,
+            patient_id=current_user["userid"]
+        )
+        # Anyone may watch a doctor's calendar, so they only learn which slot went, not who took it
+        publish_event(
+            "slot-booked",
+            {
+                "doctorID": appointment.doctorID,
+                "startTime": appointment.startTime,
+                "endTime": appointment.endTime
+            },
+            extra_channels=[f"slots:{appointment.doctorID}"]
+        )
+        
         # Return response formatted for the Pydantic model
         return {
             "appointmentid": appointment_id,
@@ -166,7 +213,7 @@ async def get_patient_appointments(
     
     formatted_query = GET_PATIENT_APPOINTMENTS.format(status_clause=status_clause)
     appointments = execute_query(formatted_query, params)
-    return appointments
+    return trusted_response(appointments, AppointmentResponse)
 
 @router.get("/doctor", response_model=List[AppointmentResponse])
 async def get_doctor_appointments(
@@ -205,8 +252,7 @@ async def get_doctor_appointments(
     )
     
     appointments = execute_query(formatted_query, params)
-    print(appointments)
-    return appointments
+    return trusted_response(appointments, AppointmentResponse)
 
 @router.put("/{appointment_id}/status", response_model=AppointmentResponse)
 async def update_appointment_status(
@@ -247,8 +293,30 @@ async def update_appointment_status(
             detail="Failed to retrieve updated appointment"
         )
     
-    # Map process fields to camelCase for frontend compatibility
     appt = appointment[0]
+    publish_event(
+        "appointment-status",
+        {"appointmentID": appointment_id, "status": status_value},
+        doctor_id=appt["doctorid"],
+        patient_id=appt["patientid"]
+    )
+    
+    if status_value == "cancelled":
+        released = execute_query(RELEASE_SLOT, (appt["doctorid"], appt["starttime"], appt["endtime"]))
+        if released:
+            read_coalescer.forget(
+                ("slots", appt["doctorid"], appt["starttime"].date()),
+                ("available-dates", appt["doctorid"])
+            )
+            publish_event(
+                "slot-released",
+                {"doctorID": appt["doctorid"], "startTime": appt["starttime"], "endTime": appt["endtime"]},
+                extra_channels=[f"slots:{appt['doctorid']}"]
+            )
+    # After the slot is released, so a read racing the update cannot re-cache the old calendar
+    catalog_versions.bump(f"slots:{appt['doctorid']}")
+    
+    # Map process fields to camelCase for frontend compatibility
     if "processes" in appt and isinstance(appt["processes"], list):
         new_processes = []
         for proc in appt["processes"]:
@@ -309,6 +377,9 @@ async def add_appointment_review(
             detail="Appointment not found or not completed"
         )
     
+    # Ratings feed the doctor's profile and the doctor directory
+    catalog_versions.bump(f"doctor:{result[0]['doctorid']}", "doctors")
+    
     # Get updated appointment with doctor name and specialization
     appointment = execute_query(
         GET_APPOINTMENT_WITH_DOCTOR,
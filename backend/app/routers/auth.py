@@ -8,6 +8,7 @@ from ..utils.auth import (
     get_password_hash, 
     create_access_token
 )
+from ..utils.etag import catalog_versions
 from ..config import settings
 from ..database import execute_query, execute_transaction
 from ..schemas.user import UserCreate, UserResponse, Token
@@ -65,6 +66,9 @@ async def register_user(user: UserCreate):
         # Execute transaction
         execute_transaction(transaction_queries)
         
+        # The doctor directory view also lists users that look like doctors
+        catalog_versions.bump("doctors")
+        
         # Return user data
         return {
             "id": user_id,
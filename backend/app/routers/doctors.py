@@ -1,13 +1,42 @@
 # app/routers/doctors.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
+import asyncio
+import logging
+import time
+from ..config import settings
 from ..utils.auth import get_current_user
+from ..utils.cache import response_cache
+from ..utils.etag import catalog_versions, etag_matches, not_modified_response, set_etag_headers
 from ..database import execute_query
 from ..schemas.doctor import DoctorProfile
 from ..models.doctor_queries import *
 
 router = APIRouter(prefix="/doctors", tags=["Doctors"])
 
+logger = logging.getLogger(__name__)
+
+# Stats for a doctor without a counters row yet; same keys as GET_DOCTOR_STATS
+EMPTY_DOCTOR_STATS = {
+    "appointmentCount": 0,
+    "scheduledCount": 0,
+    "completedCount": 0,
+    "cancelledCount": 0,
+    "noShowCount": 0,
+    "avgRating": None,
+    "ratingCount": 0,
+    "prescriptionCount": 0,
+    "processCount": 0,
+    "revenue": 0
+}
+
+async def _timed_section(query, params, deadline):
+    """Run one dashboard query on a pooled connection, returning (rows, milliseconds)"""
+    start = time.perf_counter()
+    rows = await run_in_threadpool(execute_query, query, params, deadline=deadline)
+    return rows, (time.perf_counter() - start) * 1000
+
 @router.get("/profile", response_model=DoctorProfile)
 async def get_current_doctor_profile(current_user = Depends(get_current_user)):
     """Get current doctor's profile information"""
@@ -27,6 +56,60 @@ async def get_current_doctor_profile(current_user = Depends(get_current_user)):
     
     return result[0]
 
+@router.get("/dashboard")
+async def get_doctor_dashboard(
+    response: Response,
+    recent_patients: int = Query(5, ge=1, le=50),
+    current_user = Depends(get_current_user)
+):
+    """Get today's schedule, pending resource requests, stats and recent patients in one call.
+
+    Sections are queried concurrently on pooled connections. A section that
+    fails or exceeds the latency budget comes back as null and is listed in
+    `unavailable`, and each section's duration is reported in Server-Timing.
+    """
+    if current_user["role"] != "Doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: Not a doctor"
+        )
+    
+    doctor_id = current_user["userid"]
+    sections = {
+        "schedule": (GET_DOCTOR_SCHEDULE_TODAY, (doctor_id,)),
+        "resourceRequests": (GET_DOCTOR_PENDING_RESOURCE_REQUESTS, (doctor_id,)),
+        "stats": (GET_DOCTOR_STATS, (doctor_id,)),
+        "recentPatients": (GET_DOCTOR_RECENT_PATIENTS, (doctor_id, recent_patients)),
+    }
+    
+    start = time.perf_counter()
+    # One budget for the whole dashboard, including any wait for a pooled connection
+    deadline = time.monotonic() + settings.DASHBOARD_TIMEOUT_MS / 1000
+    results = await asyncio.gather(
+        *(_timed_section(query, params, deadline) for query, params in sections.values()),
+        return_exceptions=True
+    )
+    total_ms = (time.perf_counter() - start) * 1000
+    
+    dashboard = {"unavailable": []}
+    timings = []
+    for name, result in zip(sections, results):
+        if isinstance(result, Exception):
+            logger.error(f"Doctor dashboard section {name} failed: {result}")
+            dashboard[name] = None
+            dashboard["unavailable"].append(name)
+            continue
+        rows, duration_ms = result
+        dashboard[name] = rows
+        timings.append(f"{name};dur={duration_ms:.1f}")
+    timings.append(f"total;dur={total_ms:.1f}")
+    
+    if dashboard["stats"] is not None:
+        dashboard["stats"] = dashboard["stats"][0] if dashboard["stats"] else dict(EMPTY_DOCTOR_STATS)
+    
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return dashboard
+
 @router.get("/stats")
 async def get_doctor_statistics(current_user = Depends(get_current_user)):
     """Get doctor's statistics"""
@@ -36,30 +119,38 @@ async def get_doctor_statistics(current_user = Depends(get_current_user)):
             detail="Access denied: Not a doctor"
         )
     
-    stats = execute_query(
-        GET_DOCTOR_STATS, 
-        (current_user["userid"], current_user["userid"])
-    )
+    stats = execute_query(GET_DOCTOR_STATS, (current_user["userid"],))
     
     if not stats:
-        return {
-            "appointmentCount": 0,
-            "avgRating": None,
-            "prescriptionCount": 0
-        }
+        return dict(EMPTY_DOCTOR_STATS)
     
     return stats[0]
 
 @router.get("/patients")
-async def get_doctor_patients(current_user = Depends(get_current_user)):
-    """Get doctor's patients"""
+async def get_doctor_patients(
+    name: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    current_user = Depends(get_current_user)
+):
+    """Get doctor's patients, optionally filtered by name"""
     if current_user["role"] != "Doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied: Not a doctor"
         )
     
-    patients = execute_query(GET_DOCTOR_PATIENTS, (current_user["userid"],))
+    name_clause = ""
+    params = [current_user["userid"]]
+    
+    if name:
+        name_clause = "AND p.name ILIKE %s"
+        params.append(f"%{name}%")
+    
+    params.extend([page_size, (page - 1) * page_size])
+    
+    formatted_query = GET_DOCTOR_PATIENTS.format(name_clause=name_clause)
+    patients = execute_query(formatted_query, params)
     return patients
 
 @router.get("/specialization")
@@ -82,11 +173,18 @@ async def get_doctor_specialization(current_user = Depends(get_current_user)):
     return {"specialization": result[0].get("specialization")}
 
 @router.get("/{doctor_id}", response_model=DoctorProfile)
+@response_cache.cached(300, tags=["doctor:{doctor_id}"])
 async def get_doctor_profile(
     doctor_id: int,
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user)
 ):
     """Get doctor profile information"""
+    etag = catalog_versions.etag(f"doctor:{doctor_id}")
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    
     result = execute_query(GET_DOCTOR_PROFILE, (doctor_id,))
     
     if not result:
@@ -95,4 +193,5 @@ async def get_doctor_profile(
             detail="Doctor not found"
         )
     
+    set_etag_headers(response, etag)
     return result[0]        
\ No newline at end of file
@@ -0,0 +1,65 @@
+# app/routers/events.py
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+from ..config import settings
+from ..utils.auth import get_current_user_sse
+from ..utils.events import broker
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    doctor_id: Optional[int] = None,
+    current_user = Depends(get_current_user_sse)
+):
+    """Server-sent events for the current doctor or patient.
+
+    Doctors receive slot bookings, appointment status changes and process
+    updates for their own schedule; patients receive the same for their own
+    appointments and bills. Pass `doctor_id` to also follow a doctor's slot
+    bookings and releases while browsing their calendar; those events only
+    say which slot changed, never who booked it.
+    """
+    channels = []
+    if current_user["role"] == "Doctor":
+        channels.append(f"doctor:{current_user['userid']}")
+    elif current_user["role"] == "Patient":
+        channels.append(f"patient:{current_user['userid']}")
+    if doctor_id is not None:
+        channels.append(f"slots:{doctor_id}")
+
+    if not channels:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No event channels available for this user"
+        )
+
+    subscription = broker.subscribe(channels)
+
+    async def event_source():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.EVENT_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event.get('data', {}), default=str)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,46 @@
+# app/routers/internal.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from ..utils.auth import get_current_user
+from ..utils.cache import response_cache
+from ..utils.coalesce import read_coalescer
+from ..utils.query_stats import query_stats
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+def require_admin(current_user = Depends(get_current_user)):
+    if current_user["role"] != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: Admin only"
+        )
+    return current_user
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user = Depends(require_admin)):
+    """Response cache size and hit/miss/eviction counters for this worker"""
+    return response_cache.stats()
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cache(current_user = Depends(require_admin)):
+    """Drop every cached response in this worker"""
+    response_cache.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/coalesce-stats")
+async def get_coalesce_stats(current_user = Depends(require_admin)):
+    """How many identical concurrent reads shared an in-flight query in this worker"""
+    return read_coalescer.stats()
+
+@router.get("/db-stats")
+async def get_db_stats(
+    limit: int = Query(20, ge=1, le=500),
+    current_user = Depends(require_admin)
+):
+    """Queries ranked by total time, with latency histograms and row counts, for this worker"""
+    return query_stats.snapshot(limit)
+
+@router.delete("/db-stats", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_db_stats(current_user = Depends(require_admin)):
+    """Start a fresh measurement window in this worker"""
+    query_stats.reset()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
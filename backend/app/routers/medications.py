@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from typing import List
 import logging
 from ..utils.auth import get_current_user
+from ..utils.cache import response_cache
+from ..utils.etag import catalog_versions, etag_matches, not_modified_response, set_etag_headers
+from ..utils.search import CatalogIndex
+from ..config import settings
 from ..database import execute_query, execute_transaction
-from ..schemas.medication import MedicationCreate, MedicationResponse, PrescriptionCreate, PrescriptionResponse
+from ..schemas.medication import (
+    MedicationCreate, MedicationResponse, PrescriptionCreate, PrescriptionResponse,
+    PrescriptionBatch, PrescriptionResult, MedicationSearchResult
+)
 
 router = APIRouter(prefix="/medications", tags=["Medications"])
 
@@ -11,15 +18,49 @@ router = APIRouter(prefix="/medications", tags=["Medications"])
 logger = logging.getLogger(__name__)
 
 # SQL queries
-CREATE_MEDICATION = """
-    INSERT INTO Medications (medicationName, description, information)
-    VALUES (%s, %s, %s)
-    RETURNING medicationName as "medicationName", description, information
-"""
-
-CREATE_PRESCRIPTION = """
-    INSERT INTO Prescribes (medicationName, appointmentID)
-    VALUES (%s, %s)
+# Prescribe a list of medications to one of the doctor's appointments in one
+# statement: unknown medications are added to the catalog and existing
+# prescriptions are left alone, both via ON CONFLICT. Each entry reports
+# whether it was new to the catalog and/or to the appointment. Rows are
+# inserted in name order so concurrent batches lock keys in the same order.
+PRESCRIBE_MEDICATIONS = """
+    WITH appointment AS (
+        SELECT appointmentID
+        FROM Appointment
+        WHERE appointmentID = %(appointment_id)s
+        AND doctorID = %(doctor_id)s
+    ),
+    input AS (
+        SELECT DISTINCT ON (name) name, description, information, ord
+        FROM unnest(%(names)s::text[], %(descriptions)s::text[], %(informations)s::text[])
+            WITH ORDINALITY AS i(name, description, information, ord)
+        WHERE EXISTS (SELECT 1 FROM appointment)
+        ORDER BY name, ord
+    ),
+    created AS (
+        INSERT INTO Medications (medicationName, description, information)
+        SELECT name, description, information FROM input
+        ORDER BY name
+        ON CONFLICT (medicationName) DO NOTHING
+        RETURNING medicationName
+    ),
+    prescribed AS (
+        INSERT INTO Prescribes (medicationName, appointmentID)
+        SELECT name, %(appointment_id)s FROM input
+        ORDER BY name
+        ON CONFLICT (medicationName, appointmentID) DO NOTHING
+        RETURNING medicationName
+    )
+    SELECT i.name as "medicationName",
+           COALESCE(m.description, i.description) as description,
+           COALESCE(m.information, i.information) as information,
+           c.medicationName IS NOT NULL as created,
+           p.medicationName IS NOT NULL as prescribed
+    FROM input i
+    LEFT JOIN Medications m ON m.medicationName = i.name
+    LEFT JOIN created c ON c.medicationName = i.name
+    LEFT JOIN prescribed p ON p.medicationName = i.name
+    ORDER BY i.ord
 """
 
 GET_ALL_MEDICATIONS = """
@@ -27,6 +68,11 @@ GET_ALL_MEDICATIONS = """
     FROM Medications
 """
 
+GET_MEDICATION_NAMES = """
+    SELECT medicationName as "medicationName", description
+    FROM Medications
+"""
+
 GET_APPOINTMENT_MEDICATIONS = """
     SELECT m.medicationName as "medicationName", m.description, m.information
     FROM Medications m
@@ -39,8 +85,19 @@ DELETE_PRESCRIPTION = """
     WHERE medicationName = %s AND appointmentID = %s
 """
 
+# Typeahead index over the catalog, rebuilt after medications are created
+medication_index = CatalogIndex(
+    "medications",
+    lambda: execute_query(GET_MEDICATION_NAMES),
+    "medicationName",
+    settings.SEARCH_INDEX_TTL_SECONDS
+)
+
 @router.get("", response_model=List[MedicationResponse])
+@response_cache.cached(600, tags=["medications"])
 async def get_all_medications(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user)
 ):
     """Get all available medications"""
@@ -50,9 +107,57 @@ async def get_all_medications(
             detail="Access denied"
         )
     
+    etag = catalog_versions.etag("medications")
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    
     medications = execute_query(GET_ALL_MEDICATIONS)
+    set_etag_headers(response, etag)
     return medications
 
+@router.get("/search", response_model=List[MedicationSearchResult])
+async def search_medications(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user = Depends(get_current_user)
+):
+    """Typeahead search over medication names.
+
+    Exact and prefix matches rank first, then matches on a later word, then
+    substrings, then misspellings by trigram similarity.
+    """
+    if current_user["role"] not in ["Doctor", "Patient"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return [
+        {**medication, "match": match, "score": score}
+        for medication, match, score in medication_index.get().search(q, limit)
+    ]
+
+def prescribe_medications(medications, appointment_id, doctor_id):
+    """Run PRESCRIBE_MEDICATIONS; raises 404 if the appointment is not the doctor's"""
+    results = execute_query(PRESCRIBE_MEDICATIONS, {
+        "appointment_id": appointment_id,
+        "doctor_id": doctor_id,
+        "names": [medication.medicationName for medication in medications],
+        "descriptions": [medication.description for medication in medications],
+        "informations": [medication.information for medication in medications]
+    })
+    
+    if not results:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found"
+        )
+    
+    if any(result["created"] for result in results):
+        catalog_versions.bump("medications")
+    
+    return results
+
 @router.post("/create-and-prescribe", response_model=MedicationResponse)
 async def create_and_prescribe_medication(
     medication: MedicationCreate,
@@ -69,60 +174,43 @@ async def create_and_prescribe_medication(
         )
     
     try:
-        # First check if medication already exists
-        existing_medication = execute_query(
-            "SELECT medicationName FROM Medications WHERE medicationName = %s",
-            (medication.medicationName,)
-        )
-        
-        if not existing_medication:
-            # Create medication if it doesn't exist
-            logger.info(f"Creating new medication: {medication.medicationName}")
-            medication_result = execute_query(
-                CREATE_MEDICATION,
-                (medication.medicationName, medication.description, medication.information)
-            )
-            
-            if not medication_result:
-                logger.error(f"Failed to create medication: {medication.medicationName}")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to create medication"
-                )
-        else:
-            logger.info(f"Medication {medication.medicationName} already exists")
-            medication_result = [{
-                "medicationName": medication.medicationName,
-                "description": medication.description,
-                "information": medication.information
-            }]
-        
-        # Check if prescription already exists
-        existing_prescription = execute_query(
-            "SELECT * FROM Prescribes WHERE medicationName = %s AND appointmentID = %s",
-            (medication.medicationName, appointmentID)
-        )
-        
-        if existing_prescription:
-            logger.warning(f"Prescription already exists for medication {medication.medicationName} and appointment {appointmentID}")
-            return medication_result[0]
-        
-        # Create prescription
-        logger.info(f"Creating prescription for medication {medication.medicationName} and appointment {appointmentID}")
-        execute_query(
-            CREATE_PRESCRIPTION,
-            (medication.medicationName, appointmentID),
-            fetch=False
-        )
-        
-        return medication_result[0]
-        
+        result = prescribe_medications([medication], appointmentID, current_user["userid"])[0]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating and prescribing medication: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create and prescribe medication: {str(e)}"
         )
+    
+    if not result["prescribed"]:
+        logger.warning(f"Prescription already exists for medication {medication.medicationName} and appointment {appointmentID}")
+    
+    return result
+
+@router.post("/prescribe-batch", response_model=List[PrescriptionResult])
+async def prescribe_medication_batch(
+    batch: PrescriptionBatch,
+    current_user = Depends(get_current_user)
+):
+    """Prescribe several medications to an appointment, adding unknown ones to the catalog"""
+    if current_user["role"] != "Doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can create and prescribe medications"
+        )
+    
+    try:
+        return prescribe_medications(batch.medications, batch.appointmentID, current_user["userid"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error prescribing medications: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to prescribe medications: {str(e)}"
+        )
 
 @router.get("/appointment/{appointment_id}", response_model=List[MedicationResponse])
 async def get_appointment_medications(
@@ -1,13 +1,27 @@
 # app/routers/patients.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+import psycopg2
+from ..config import settings
 from ..utils.auth import get_current_user
 from ..database import execute_query
-from ..schemas.patient import PatientProfile, PatientUpdate
+from ..schemas.patient import PatientProfile, PatientUpdate, PatientDashboard, BalanceHistory
 from ..models.patient_queries import *
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
 
+# /patients/stats for a patient without a counters row yet; same keys as GET_PATIENT_STATS
+EMPTY_PATIENT_STATS = {
+    "appointmentCount": 0,
+    "scheduledCount": 0,
+    "completedCount": 0,
+    "cancelledCount": 0,
+    "noShowCount": 0,
+    "prescriptionCount": 0,
+    "processCount": 0,
+    "totalPaid": 0
+}
+
 @router.get("/profile", response_model=PatientProfile)
 async def get_patient_profile(current_user = Depends(get_current_user)):
     """Get patient profile information"""
@@ -27,6 +41,63 @@ async def get_patient_profile(current_user = Depends(get_current_user)):
     
     return result[0]
 
+@router.get("/dashboard", response_model=PatientDashboard)
+async def get_patient_dashboard(
+    appointments: int = Query(5, ge=1, le=50),
+    prescriptions: int = Query(10, ge=1, le=50),
+    current_user = Depends(get_current_user)
+):
+    """Get profile, balance, upcoming appointments, unpaid bills and recent prescriptions in one call"""
+    if current_user["role"] != "Patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: Not a patient"
+        )
+    
+    try:
+        result = execute_query(
+            GET_PATIENT_DASHBOARD,
+            (appointments, prescriptions, current_user["userid"]),
+            timeout_ms=settings.DASHBOARD_TIMEOUT_MS
+        )
+    except psycopg2.errors.QueryCanceled:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Dashboard took too long to load"
+        )
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found"
+        )
+    
+    row = result[0]
+    return {
+        "profile": row,
+        "balance": row["balance"],
+        "stats": row["stats"],
+        "upcomingAppointments": row["upcoming_appointments"],
+        "unpaidBills": row["unpaid_bills"],
+        "recentPrescriptions": row["recent_prescriptions"]
+    }
+
+@router.get("/stats")
+async def get_patient_statistics(current_user = Depends(get_current_user)):
+    """Get patient's appointment, prescription and payment counters"""
+    if current_user["role"] != "Patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: Not a patient"
+        )
+    
+    stats = execute_query(GET_PATIENT_STATS, (current_user["userid"],))
+    
+    if not stats:
+        return dict(EMPTY_PATIENT_STATS)
+    
+    return stats[0]
+
 @router.put("/profile", response_model=PatientProfile)
 async def update_patient_profile(
     updates: PatientUpdate,
@@ -87,7 +158,7 @@ async def add_to_balance(
         )
     
     try:
-        result = execute_query(ADD_TO_BALANCE, (amount, current_user["userid"]))
+        result = execute_query(ADD_TO_BALANCE, {"amount": amount, "patient_id": current_user["userid"]})
         
         if not result:
             raise HTTPException(
@@ -100,4 +171,35 @@ async def add_to_balance(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to add balance: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/balance/history", response_model=BalanceHistory)
+async def get_balance_history(
+    before: Optional[int] = Query(None, description="Return entries older than this entryID"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user = Depends(get_current_user)
+):
+    """Get the current patient's top-ups and payments, newest first"""
+    if current_user["role"] != "Patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: Not a patient"
+        )
+    
+    balance = execute_query(GET_LEDGER_BALANCE, (current_user["userid"],))
+    if not balance:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    
+    entries = execute_query(
+        GET_BALANCE_HISTORY,
+        {"patient_id": current_user["userid"], "before": before, "limit": limit}
+    )
+    
+    return {
+        "balance": balance[0]["ledgerBalance"],
+        "entries": entries,
+        "nextCursor": entries[-1]["entryID"] if len(entries) == limit else None
+    }
@@ -1,26 +1,42 @@
 # app/routers/processes.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from datetime import datetime
 from ..utils.auth import get_current_user
-from ..database import execute_query, execute_transaction
+from ..utils.events import publish_event
+from ..database import execute_query, execute_transaction, get_db_connection
 from ..models.process_queries import *
-from ..schemas.process import ProcessCreate, ProcessResponse, ProcessStatusUpdate
+from ..config import settings
+from ..schemas.process import (
+    ProcessCreate, ProcessResponse, ProcessStatusUpdate, ProcessBatchCreate,
+    ProcessBatchPayment, BatchPaymentResponse
+)
 import json
 
 router = APIRouter(prefix="/processes", tags=["Processes"])
 
 @router.get("/patient", response_model=List[ProcessResponse])
 async def get_patient_processes(
+    from_date: Optional[datetime] = Query(None, alias="from"),
+    to_date: Optional[datetime] = Query(None, alias="to"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
     current_user = Depends(get_current_user)
 ):
-    """Get all medical processes for the current patient"""
+    """Get the current patient's medical processes, optionally limited to appointments in [from, to)"""
     if current_user["role"] != "Patient":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only patients can view their processes"
         )
     
-    processes = execute_query(GET_PATIENT_PROCESSES, (current_user["name"],))
+    processes = execute_query(GET_PATIENT_PROCESSES, {
+        "patient_id": current_user["userid"],
+        "from": from_date,
+        "to": to_date,
+        "limit": page_size,
+        "offset": (page - 1) * page_size
+    })
     return processes
 
 @router.get("/doctor/patient/{patient_id}", response_model=List[ProcessResponse])
@@ -109,17 +125,32 @@ async def create_medical_process(
             (process.amount, process_id)
         )
         
+        participants = execute_query(GET_APPOINTMENT_PARTICIPANTS, (process.appointmentID,))[0]
+        
         # Update patient statistics
         execute_query(
             UPDATE_PATIENT_STATISTICS,
-            (process.patientID,),
+            (participants["patientid"],),
             fetch=False
         )
         
+        publish_event(
+            "process-created",
+            {
+                "processID": process_id,
+                "appointmentID": process.appointmentID,
+                "processName": process.processName,
+                "amount": process.amount,
+                "paymentStatus": "Pending"
+            },
+            doctor_id=participants["doctorid"],
+            patient_id=participants["patientid"]
+        )
+        
         # Get the created process with all details
         created_process = execute_query(
             GET_DOCTOR_PATIENT_PROCESSES,
-            (process.patientID, current_user["userid"])
+            (participants["patientid"], current_user["userid"])
         )
         
         return created_process[0]
@@ -130,6 +161,62 @@ async def create_medical_process(
             detail=f"Failed to create process: {str(e)}"
         )
 
+@router.post("/batch", response_model=List[ProcessResponse])
+async def create_medical_processes(
+    batch: ProcessBatchCreate,
+    current_user = Depends(get_current_user)
+):
+    """Create several processes with their bills for one appointment in a single transaction.
+
+    Returns every process of the appointment, including the new ones.
+    """
+    if current_user["role"] != "Doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can create processes"
+        )
+    
+    try:
+        with get_db_connection() as (conn, cursor):
+            cursor.execute(CREATE_PROCESSES_BATCH, {
+                "appointment_id": batch.appointmentID,
+                "doctor_id": current_user["userid"],
+                "names": [item.processName for item in batch.processes],
+                "descriptions": [item.processDescription for item in batch.processes],
+                "amounts": [item.amount for item in batch.processes]
+            })
+            created = cursor.fetchall()
+            cursor.execute(GET_PROCESSES_BY_APPOINTMENT, (batch.appointmentID,))
+            processes = cursor.fetchall()
+            conn.commit()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create processes: {str(e)}"
+        )
+    
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found"
+        )
+    
+    publish_event(
+        "processes-created",
+        {
+            "appointmentID": batch.appointmentID,
+            "processes": [
+                {"processID": row["processid"], "processName": row["processName"], "amount": row["amount"]}
+                for row in created
+            ],
+            "paymentStatus": "Pending"
+        },
+        doctor_id=created[0]["doctorid"],
+        patient_id=created[0]["patientid"]
+    )
+    
+    return processes
+
 @router.put("/{processid}/status", response_model=ProcessResponse)
 async def update_process_status(
     processid: int,
@@ -151,6 +238,15 @@ async def update_process_status(
             fetch=False
         )
         
+        participants = execute_query(GET_PROCESS_PARTICIPANTS, (processid,))
+        if participants:
+            publish_event(
+                "process-status",
+                {"processID": processid, "status": status_update.status},
+                doctor_id=participants[0]["doctorid"],
+                patient_id=participants[0]["patientid"]
+            )
+        
         # Get updated process details
         updated_process = execute_query(
             GET_DOCTOR_PATIENT_PROCESSES,
@@ -187,6 +283,68 @@ async def get_processes_by_appointment(
     print("Processes returned from SQL:", processes)
     return processes
 
+@router.post("/pay-batch", response_model=BatchPaymentResponse)
+async def pay_for_processes(
+    payment: ProcessBatchPayment,
+    current_user = Depends(get_current_user)
+):
+    """Pay several bills in one transaction.
+
+    In atomic mode either every listed bill is paid or none is. In
+    best_effort mode bills are paid in process order for as long as the
+    balance lasts. Every item reports its own outcome.
+    """
+    if current_user["role"] != "Patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can make payments"
+        )
+    
+    if payment.allPending == (payment.processIDs is not None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either processIDs or allPending"
+        )
+    
+    params = {
+        "patient_id": current_user["userid"],
+        "process_ids": None if payment.allPending else payment.processIDs,
+        "atomic": payment.mode == "atomic"
+    }
+    
+    try:
+        # A 'conflict' means a concurrent payment changed the balance after the
+        # bills were planned; nothing was paid, so the statement is safe to rerun
+        for _ in range(settings.PAYMENT_BATCH_ATTEMPTS):
+            items = execute_query(PAY_PROCESSES_BATCH, params)
+            if not any(item["status"] == "conflict" for item in items):
+                break
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process payment: {str(e)}"
+        )
+    
+    paid = [item for item in items if item["status"] == "paid"]
+    paid_total = sum(item["amount"] for item in paid)
+    balance = items[0]["balance"] if items else None
+    
+    if paid:
+        publish_event(
+            "billing-paid-batch",
+            {"processIDs": [item["processid"] for item in paid], "amount": paid_total, "balance": balance},
+            patient_id=current_user["userid"],
+            extra_channels=[f"doctor:{doctor_id}" for doctor_id in {item["doctorid"] for item in paid}]
+        )
+    
+    return {
+        "mode": payment.mode,
+        "paidCount": len(paid),
+        "paidTotal": paid_total,
+        "balance": balance,
+        "items": items
+    }
+
 @router.post("/{process_id}/pay", response_model=ProcessResponse)
 async def pay_for_process(
     process_id: int,
@@ -200,102 +358,40 @@ async def pay_for_process(
         )
     
     try:
-        # First, get the appointment ID for this process
-        appointment_result = execute_query(
-            "SELECT appointmentid FROM Process WHERE processid = %s",
-            (process_id,)
+        result = execute_query(
+            PAY_FOR_PROCESS,
+            {"process_id": process_id, "patient_id": current_user["userid"]}
         )
-        if not appointment_result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Appointment not found for this process"
-            )
-        appointment_id = appointment_result[0]["appointmentid"]
-
-        # First check if the process exists and get its details
-        process_check = execute_query("""
-            SELECT b.amount, b.paymentStatus, a.patientid, pa.balance
-            FROM Billing b
-            JOIN Process p ON b.processid = p.processid
-            JOIN Appointment a ON p.appointmentid = a.appointmentid
-            JOIN Patients pa ON a.patientid = pa.patientid
-            WHERE b.processid = %s
-        """, (process_id,))
-        
-        if not process_check:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Process not found"
-            )
-            
-        process_info = process_check[0]
-        
-        # Check if already paid
-        if process_info["paymentstatus"] == "Paid":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This process has already been paid"
-            )
-            
-        # Check if sufficient balance
-        if process_info["balance"] < process_info["amount"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient balance. Required: ${process_info['amount']}, Available: ${process_info['balance']}"
-            )
-        
-        # Update the billing status
-        payment_result = execute_query(
-            UPDATE_PROCESS_PAYMENT,
-            (process_id, process_id)
-        )
-        
-        if not payment_result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Payment failed. Please try again."
-            )
-        
-        # Get the amount and patient ID from the payment result
-        amount = payment_result[0]["amount"]
-        patient_id = payment_result[0]["patientid"]
-        
-        # Deduct the amount from patient's balance
-        balance_result = execute_query(
-            DEDUCT_PROCESS_PAYMENT,
-            (amount, patient_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process payment: {str(e)}"
         )
-        
-        if not balance_result:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update patient balance"
-            )
-        
-        # Get the updated process with all details
-        updated_process = execute_query(
-            GET_PROCESSES_BY_APPOINTMENT,
-            (appointment_id,)
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Process not found"
         )
-        
-        if not updated_process:
+    
+    payment = result[0]
+    
+    if not payment["paid"]:
+        if payment["previous_status"] == "Paid":
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Process not found after payment"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This process has already been paid"
             )
-        
-        # Parse billing JSON if needed
-        for proc in updated_process:
-            if proc.get("billing") and isinstance(proc["billing"], str):
-                proc["billing"] = json.loads(proc["billing"])
-        
-        return updated_process[0]
-        
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        print(f"Payment error: {str(e)}")  # Add logging
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process payment: {str(e)}"
-        ) 
\ No newline at end of file
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient balance. Required: ${payment['amount']}, Available: ${payment['balance']}"
+        )
+    
+    publish_event(
+        "billing-paid",
+        {"processID": process_id, "amount": payment["amount"], "balance": payment["balance"]},
+        doctor_id=payment["doctorid"],
+        patient_id=payment["patientid"]
+    )
+    
+    return payment
@@ -15,6 +15,8 @@ from ..models.admin_queries import (
 )
 from ..database import execute_query, execute_transaction
 from ..utils.auth import get_current_user
+from ..utils.cache import response_cache
+from ..utils.etag import catalog_versions
 from ..schemas.report import (
     ReportGenerationRequest,
     ReportBase,
@@ -162,26 +164,14 @@ async def create_report(
         # Add equipment statistics if equipment is selected
         if request.equipment_ids:
             logger.info(f"Generating equipment statistics for IDs: {request.equipment_ids}")
-            equipment_ids_str = ','.join(map(str, request.equipment_ids))
-            
-            equipment_stats_query = f"""
-                INSERT INTO EquipmentStatistics (statID, reportID, resourceID, usageCount, lastUsedDate, totalRequests)
-                SELECT 
-                    ROW_NUMBER() OVER (ORDER BY mr.resourceID) as statID,
-                    %s as reportID,
-                    mr.resourceID,
-                    COALESCE(COUNT(DISTINCT r.doctorID) FILTER (WHERE r.timestamp BETWEEN %s AND %s), 0) as usageCount,
-                    COALESCE(MAX(DATE(r.timestamp)) FILTER (WHERE r.timestamp <= %s), CURRENT_DATE) as lastUsedDate,
-                    COALESCE(COUNT(r.doctorID) FILTER (WHERE r.timestamp BETWEEN %s AND %s), 0) as totalRequests
-                FROM MedicalResources mr
-                LEFT JOIN Request r ON mr.resourceID = r.resourceID
-                WHERE mr.resourceID IN ({equipment_ids_str})
-                GROUP BY mr.resourceID
-                ORDER BY mr.resourceID
-            """
             transaction_queries.append((
-                equipment_stats_query,
-                (report_id, start_date, end_date, end_date, start_date, end_date)
+                GENERATE_EQUIPMENT_STATS,
+                {
+                    "report_id": report_id,
+                    "resource_ids": list(request.equipment_ids),
+                    "start": start_date,
+                    "end": end_date
+                }
             ))
         
         # Execute all queries in a transaction
@@ -199,6 +189,7 @@ async def create_report(
             raise HTTPException(status_code=500, detail="Failed to retrieve created report")
         
         logger.info(f"Successfully created report: {report[0]}")
+        catalog_versions.bump("reports")
         return report[0]
         
     except HTTPException:
@@ -210,6 +201,7 @@ async def create_report(
 
 
 @router.get("/", response_model=List[ReportBase])
+@response_cache.cached(300, tags=["reports"])
 async def get_all_reports(
     current_user = Depends(get_current_user)
 ):
@@ -226,6 +218,7 @@ async def get_all_reports(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{report_id}", response_model=ReportDetail)
+@response_cache.cached(300, tags=["reports"])
 async def get_report(
     report_id: int,
     current_user = Depends(get_current_user)
@@ -253,6 +246,7 @@ async def get_report(
             WHERE es.reportID = %s
         """, (report_id,))
         
+        # Validated against ReportDetail: the statistics rows are nested and include es.*
         return {
             **report,
             "patientStatistics": patient_stats,
@@ -1,10 +1,20 @@
 # app/routers/resources.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from typing import List, Optional
+from datetime import datetime, timedelta
+import psycopg2
+import time
 from ..utils.auth import get_current_user
-from ..database import execute_query
-from ..schemas.resource import ResourceBase, ResourceCreate, ResourceResponse, ResourceRequest, ResourceRequestResponse, RecentActivity, ResourceStats
+from ..utils.cache import MicroCache, response_cache
+from ..utils.etag import catalog_versions, etag_matches, not_modified_response, set_etag_headers
+from ..database import execute_query, has_extension
+from ..schemas.resource import (
+    ResourceBase, ResourceCreate, ResourceResponse, ResourceRequest, ResourceRequestResponse, RecentActivity, ResourceStats,
+    RequestDecisionBatch, RequestDecisionBatchResponse, ReservationCreate, ReservationResponse, ResourceFreeWindows,
+    ResourceDepartmentLink
+)
 from ..models.resource_queries import *
+from ..config import settings
 import logging
 
 # Set up logger
@@ -15,41 +25,61 @@ router = APIRouter(prefix="/resources", tags=["Medical Resources"])
 # Create a public router for statistics and activities
 public_router = APIRouter(prefix="/public/resources", tags=["Public Resources"])
 
+# Shared by every unauthenticated caller, so a busy lobby screen or a crawler
+# costs at most one query per key every few seconds
+public_cache = MicroCache(settings.PUBLIC_CACHE_TTL_SECONDS, settings.PUBLIC_CACHE_STALE_SECONDS)
+
 @router.get("/", response_model=List[ResourceResponse])
 async def get_all_resources(
+    request: Request,
+    response: Response,
     name: Optional[str] = None,
     department: Optional[str] = None,
     available_only: Optional[bool] = False,
+    limit: int = Query(50, ge=1, le=500, description="Maximum results for name searches"),
     current_user = Depends(get_current_user)
 ):
-    """Get all medical resources with optional filters"""
-    # Build where clause based on filters
-    where_conditions = []
-    params = []
-    
-    if name:
-        where_conditions.append("name ILIKE %s")
-        params.append(f"%{name}%")
-    
-    if available_only:
-        where_conditions.append("availability = 'Available'")
-    
-    where_clause = ""
-    if where_conditions:
-        where_clause = "WHERE " + " AND ".join(where_conditions)
+    """Get all medical resources with optional filters.
+
+    Name searches are ranked by relevance and limited to `limit` results.
+    The department filter reads the ResourceDepartment mapping and can be
+    combined with `name` and `available_only`.
+    """
+    # Availability also changes when a reservation starts or ends, so validators expire every minute
+    minute = int(time.time() // 60)
+    etag = catalog_versions.etag("resources", variant=(name, department, available_only, limit, minute))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
     
-    # Format the query with the where clause
-    formatted_query = GET_ALL_RESOURCES.format(where_clause=where_clause)
+    escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") if name else None
     
-    # Handle department filter separately as it requires joins
     if department:
-        resources = execute_query(FILTER_RESOURCES_BY_DEPARTMENT, (department,))
+        # Single lookup on the ResourceDepartment primary key, combined with the other filters
+        resources = execute_query(FILTER_RESOURCES_BY_DEPARTMENT, {
+            "department": department,
+            "q": name or None,
+            "pattern": f"%{escaped}%" if name else None,
+            "available_only": bool(available_only),
+            "limit": limit
+        })
+    elif name:
+        search_query = SEARCH_RESOURCES_TRGM if has_extension("pg_trgm") else SEARCH_RESOURCES
+        resources = execute_query(search_query, {
+            "q": name,
+            "pattern": f"%{escaped}%",
+            "prefix": f"{escaped}%",
+            "available_only": bool(available_only),
+            "limit": limit
+        })
     else:
-        resources = execute_query(formatted_query, params)
+        where_clause = "WHERE current_resource_availability(resourceID, availability) = 'Available'" if available_only else ""
+        resources = execute_query(GET_ALL_RESOURCES.format(where_clause=where_clause))
     
+    set_etag_headers(response, etag)
     return resources
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
+@response_cache.cached(60, tags=["resources"])
 async def get_resource_by_id(
     resource_id: int,
     current_user = Depends(get_current_user)
@@ -97,6 +127,9 @@ async def request_resource(
             fetch=False
         )
         
+        # Department filters are derived from request history
+        catalog_versions.bump("resources")
+        
         return {"message": "Resource request created successfully", "status": request.status}
         
     except Exception as e:
@@ -131,6 +164,40 @@ async def get_all_resource_requests(current_user = Depends(get_current_user)):
     
     return requests
 
+@router.post("/staff/requests/bulk", response_model=RequestDecisionBatchResponse)
+async def update_request_statuses(
+    batch: RequestDecisionBatch,
+    current_user = Depends(get_current_user)
+):
+    """Apply many request decisions in one transaction (for staff/admin).
+
+    Only existing requests are updated; each item reports `updated`,
+    `not_found`, or `superseded` (a later item in the batch decides the same
+    request). Availability is unaffected: it follows the reservations.
+    """
+    if current_user["role"].lower() not in ["admin", "staff"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can update request status"
+        )
+    
+    try:
+        items = execute_query(BULK_UPDATE_REQUEST_STATUS, {
+            "doctor_ids": [decision.doctorID for decision in batch.decisions],
+            "resource_ids": [decision.resourceID for decision in batch.decisions],
+            "statuses": [decision.status for decision in batch.decisions]
+        })
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update request statuses: {str(e)}"
+        )
+    
+    return {
+        "updatedCount": sum(1 for item in items if item["result"] == "updated"),
+        "items": items
+    }
+
 @router.put("/staff/requests/{doctor_id}/{resource_id}")
 async def update_request_status(
     doctor_id: int,
@@ -155,19 +222,8 @@ async def update_request_status(
     
     # Update request status
     try:
-        execute_query(
-            CREATE_RESOURCE_REQUEST,
-            (doctor_id, resource_id, status),
-            fetch=False
-        )
-        
-        # If approved, update resource availability
-        if status == "Approved":
-            execute_query(
-                UPDATE_RESOURCE_AVAILABILITY,
-                ("In Use", resource_id),
-                fetch=False
-            )
+        # Approval does not touch availability: a resource is In Use while a reservation covers now
+        execute_query(CREATE_RESOURCE_REQUEST, (doctor_id, resource_id, status), fetch=False)
         
         return {"message": f"Request status updated to {status}"}
         
@@ -197,6 +253,7 @@ async def create_resource(
             detail="Failed to create resource"
         )
     
+    catalog_versions.bump("resources")
     return result[0]
 
 @router.put("/{resource_id}/availability")
@@ -226,42 +283,236 @@ async def update_resource_availability(
         (availability, resource_id),
         fetch=False
     )
+    catalog_versions.bump("resources")
     
     return {"message": "Resource availability updated successfully"}
 
+@router.get("/{resource_id}/departments", response_model=List[ResourceDepartmentLink])
+async def get_resource_departments(
+    resource_id: int,
+    current_user = Depends(get_current_user)
+):
+    """Departments associated with a resource, derived from requests or set by admins"""
+    return execute_query(GET_RESOURCE_DEPARTMENTS, (resource_id,))
+
+@router.put("/{resource_id}/departments/{dept_name}", response_model=ResourceDepartmentLink)
+async def set_resource_department(
+    resource_id: int,
+    dept_name: str,
+    current_user = Depends(get_current_user)
+):
+    """Associate a resource with a department (admin only)"""
+    if current_user["role"] != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can edit resource departments"
+        )
+    
+    result = execute_query(SET_RESOURCE_DEPARTMENT, {"department": dept_name, "resource_id": resource_id})
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource or department not found"
+        )
+    
+    catalog_versions.bump("resources")
+    return result[0]
+
+@router.delete("/{resource_id}/departments/{dept_name}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_resource_department(
+    resource_id: int,
+    dept_name: str,
+    current_user = Depends(get_current_user)
+):
+    """Remove a resource from a department's listing (admin only)"""
+    if current_user["role"] != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can edit resource departments"
+        )
+    
+    result = execute_query(REMOVE_RESOURCE_DEPARTMENT, {"department": dept_name, "resource_id": resource_id})
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource is not associated with this department"
+        )
+    
+    catalog_versions.bump("resources")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def _check_window(start: datetime, end: datetime):
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The end of the window must be after its start"
+        )
+    if end - start > timedelta(days=settings.RESERVATION_WINDOW_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Windows are limited to {settings.RESERVATION_WINDOW_MAX_DAYS} days"
+        )
+
+@router.post("/{resource_id}/reservations", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+    resource_id: int,
+    reservation: ReservationCreate,
+    current_user = Depends(get_current_user)
+):
+    """Reserve a resource for a time window (doctors for themselves, staff/admin for anyone)"""
+    role = current_user["role"].lower()
+    if role not in ["doctor", "admin", "staff"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors, admin or staff can reserve resources"
+        )
+    
+    _check_window(reservation.startTime, reservation.endTime)
+    doctor_id = current_user["userid"] if role == "doctor" else reservation.doctorID
+    
+    try:
+        result = execute_query(CREATE_RESERVATION, {
+            "resource_id": resource_id,
+            "doctor_id": doctor_id,
+            "start": reservation.startTime,
+            "end": reservation.endTime,
+            "created_by": current_user["userid"]
+        })
+    except psycopg2.errors.ExclusionViolation:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The resource is already reserved during this window"
+        )
+    except psycopg2.errors.ForeignKeyViolation:
+        # The resource row was just selected, so the unknown ID is the doctor
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource not found"
+        )
+    
+    catalog_versions.bump("resources")
+    return result[0]
+
+@router.get("/{resource_id}/reservations", response_model=List[ReservationResponse])
+async def get_reservations(
+    resource_id: int,
+    from_date: datetime = Query(..., alias="from"),
+    to_date: datetime = Query(..., alias="to"),
+    current_user = Depends(get_current_user)
+):
+    """Reservations of a resource overlapping a time window (doctors, admin and staff only)"""
+    if current_user["role"].lower() not in ["doctor", "admin", "staff"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors, admin or staff can view reservations"
+        )
+    
+    _check_window(from_date, to_date)
+    return execute_query(GET_RESOURCE_RESERVATIONS, {"resource_id": resource_id, "from": from_date, "to": to_date})
+
+@router.delete("/{resource_id}/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_reservation(
+    resource_id: int,
+    reservation_id: int,
+    current_user = Depends(get_current_user)
+):
+    """Cancel a reservation (doctors may only cancel their own)"""
+    role = current_user["role"].lower()
+    if role not in ["doctor", "admin", "staff"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors, admin or staff can cancel reservations"
+        )
+    
+    result = execute_query(DELETE_RESERVATION, {
+        "resource_id": resource_id,
+        "reservation_id": reservation_id,
+        "doctor_id": current_user["userid"] if role == "doctor" else None
+    })
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reservation not found"
+        )
+    
+    catalog_versions.bump("resources")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/{resource_id}/free-windows", response_model=ResourceFreeWindows)
+async def get_free_windows(
+    resource_id: int,
+    from_date: datetime = Query(..., alias="from"),
+    to_date: datetime = Query(..., alias="to"),
+    current_user = Depends(get_current_user)
+):
+    """Unreserved windows of a resource between `from` and `to`.
+
+    Computed from reservations with two index range scans, so the cost
+    depends on the reservations inside the window, not on history. A
+    resource under maintenance has no free windows.
+    """
+    _check_window(from_date, to_date)
+    
+    resource = execute_query(GET_RESOURCE_BY_ID, (resource_id,))
+    if not resource:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource not found"
+        )
+    
+    availability = resource[0]["availability"]
+    windows = []
+    if availability != "Maintenance":
+        windows = execute_query(GET_RESOURCE_FREE_WINDOWS, {"resource_id": resource_id, "from": from_date, "to": to_date})
+    
+    return {"resourceID": resource_id, "availability": availability, "windows": windows}
+
 @router.get("/activities/recent", response_model=List[RecentActivity])
 async def get_recent_activities(
-    limit: int = 10
+    limit: int = Query(10, ge=1, le=100),
+    before: Optional[int] = Query(None, description="Return activities older than this eventID")
 ):
-    """Get recent resource request activities"""
+    """Get recent resource request activities, newest first.
+
+    Page backwards by passing the last item's `eventID` as `before`.
+    """
     
-    activities = execute_query(GET_RECENT_RESOURCE_ACTIVITIES, (limit,))
+    activities = execute_query(GET_RECENT_RESOURCE_ACTIVITIES, {"before": before, "limit": limit})
     
     return activities
 
+def _load_resource_statistics():
+    stats = execute_query(GET_RESOURCE_STATISTICS)
+    if not stats or len(stats) == 0:
+        # Return default values if no statistics are found
+        return {
+            "totalRequests": 0,
+            "approvedToday": 0,
+            "pendingRequests": 0,
+            "resourcesManaged": 0
+        }
+    
+    # Convert to simple dict with explicit type conversion for safety
+    return {
+        "totalRequests": int(stats[0]["totalRequests"]) if stats[0]["totalRequests"] is not None else 0,
+        "approvedToday": int(stats[0]["approvedToday"]) if stats[0]["approvedToday"] is not None else 0,
+        "pendingRequests": int(stats[0]["pendingRequests"]) if stats[0]["pendingRequests"] is not None else 0,
+        "resourcesManaged": int(stats[0]["resourcesManaged"]) if stats[0]["resourcesManaged"] is not None else 0
+    }
+
 @router.get("/statistics")
 async def get_resource_statistics():
     """Get resource request statistics"""
     
     try:
-        stats = execute_query(GET_RESOURCE_STATISTICS)
-        
-        if not stats or len(stats) == 0:
-            # Return default values if no statistics are found
-            return {
-                "totalRequests": 0,
-                "approvedToday": 0,
-                "pendingRequests": 0,
-                "resourcesManaged": 0
-            }
-        
-        # Convert to simple dict with explicit type conversion for safety
-        return {
-            "totalRequests": int(stats[0]["totalRequests"]) if stats[0]["totalRequests"] is not None else 0,
-            "approvedToday": int(stats[0]["approvedToday"]) if stats[0]["approvedToday"] is not None else 0,
-            "pendingRequests": int(stats[0]["pendingRequests"]) if stats[0]["pendingRequests"] is not None else 0,
-            "resourcesManaged": int(stats[0]["resourcesManaged"]) if stats[0]["resourcesManaged"] is not None else 0
-        }
+        return _load_resource_statistics()
     except Exception as e:
         logger.error(f"Error fetching resource statistics: {e}")
         # Return default values in case of an error
@@ -272,38 +523,37 @@ async def get_resource_statistics():
             "resourcesManaged": 0
         }
 
+def _public_cache_headers(response: Response):
+    response.headers["Cache-Control"] = f"public, max-age={int(settings.PUBLIC_CACHE_TTL_SECONDS)}"
+
 @public_router.get("/activities/recent")
-async def get_public_recent_activities(limit: int = 10):
-    """Get recent resource request activities (public endpoint)"""
+async def get_public_recent_activities(response: Response, limit: int = 10):
+    """Get recent resource request activities (public endpoint).
+
+    `limit` is rounded up to a fixed bucket (and capped at the largest) so
+    every caller shares one of a few cached results.
+    """
+    buckets = settings.PUBLIC_ACTIVITY_LIMIT_BUCKETS
+    limit = min(max(limit, 1), buckets[-1])
+    bucket = next(size for size in buckets if size >= limit)
     try:
-        activities = execute_query(GET_RECENT_RESOURCE_ACTIVITIES, (limit,))
-        return activities
+        activities = await public_cache.get(
+            ("activities", bucket),
+            lambda: execute_query(GET_RECENT_RESOURCE_ACTIVITIES, {"before": None, "limit": bucket})
+        )
+        _public_cache_headers(response)
+        return activities[:limit]
     except Exception as e:
         logger.error(f"Error fetching recent activities: {e}")
         return []
 
 @public_router.get("/statistics")
-async def get_public_resource_statistics():
+async def get_public_resource_statistics(response: Response):
     """Get resource request statistics (public endpoint)"""
     try:
-        stats = execute_query(GET_RESOURCE_STATISTICS)
-        
-        if not stats or len(stats) == 0:
-            # Return default values if no statistics are found
-            return {
-                "totalRequests": 0,
-                "approvedToday": 0,
-                "pendingRequests": 0,
-                "resourcesManaged": 0
-            }
-        
-        # Convert to simple dict with explicit type conversion for safety
-        return {
-            "totalRequests": int(stats[0]["totalRequests"]) if stats[0]["totalRequests"] is not None else 0,
-            "approvedToday": int(stats[0]["approvedToday"]) if stats[0]["approvedToday"] is not None else 0,
-            "pendingRequests": int(stats[0]["pendingRequests"]) if stats[0]["pendingRequests"] is not None else 0,
-            "resourcesManaged": int(stats[0]["resourcesManaged"]) if stats[0]["resourcesManaged"] is not None else 0
-        }
+        stats = await public_cache.get("statistics", _load_resource_statistics)
+        _public_cache_headers(response)
+        return stats
     except Exception as e:
         logger.error(f"Error fetching resource statistics: {e}")
         # Return default values in case of an error
@@ -312,4 +562,4 @@ async def get_public_resource_statistics():
             "approvedToday": 0,
             "pendingRequests": 0,
             "resourcesManaged": 0
-        }
\ No newline at end of file
+        }
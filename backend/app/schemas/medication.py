@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 class MedicationBase(BaseModel):
@@ -20,4 +20,18 @@ class PrescriptionResponse(BaseModel):
     medicationName: str
     appointmentID: int
     description: Optional[str] = None
-    information: Optional[str] = None 
\ No newline at end of file
+    information: Optional[str] = None
+
+class PrescriptionBatch(BaseModel):
+    appointmentID: int
+    medications: List[MedicationCreate] = Field(..., min_length=1, max_length=50)
+
+class PrescriptionResult(MedicationBase):
+    created: bool
+    prescribed: bool
+
+class MedicationSearchResult(BaseModel):
+    medicationName: str
+    description: Optional[str] = None
+    match: str
+    score: float
@@ -1,7 +1,9 @@
 # app/schemas/patient.py
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import date
+from typing import Optional, List
+from datetime import date, datetime
+from .appointment import AppointmentResponse
+from .medication import PrescriptionResponse
 
 class PatientProfile(BaseModel):
     patientID: int = Field(..., alias="patientid")
@@ -18,4 +20,33 @@ class PatientProfile(BaseModel):
 class PatientUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[EmailStr] = None
-    phoneNumber: Optional[str] = None
\ No newline at end of file
+    phoneNumber: Optional[str] = None
+
+class UnpaidBill(BaseModel):
+    processid: int
+    processName: Optional[str] = None
+    amount: float
+    billingDate: Optional[date] = None
+    appointmentid: int
+    doctorname: Optional[str] = None
+
+class PatientDashboard(BaseModel):
+    profile: PatientProfile
+    balance: float
+    stats: Optional[dict] = None
+    upcomingAppointments: List[AppointmentResponse] = []
+    unpaidBills: List[UnpaidBill] = []
+    recentPrescriptions: List[PrescriptionResponse] = []
+
+class BalanceEntry(BaseModel):
+    entryID: int
+    amount: float
+    entryType: str
+    processID: Optional[int] = None
+    processName: Optional[str] = None
+    createdAt: datetime
+
+class BalanceHistory(BaseModel):
+    balance: float
+    entries: List[BalanceEntry] = []
+    nextCursor: Optional[int] = None
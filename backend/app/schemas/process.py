@@ -1,6 +1,6 @@
 # app/schemas/process.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class ProcessBase(BaseModel):
@@ -11,6 +11,13 @@ class ProcessCreate(ProcessBase):
     appointmentID: int
     amount: float
 
+class ProcessBatchItem(ProcessBase):
+    amount: float = Field(..., ge=0)
+
+class ProcessBatchCreate(BaseModel):
+    appointmentID: int
+    processes: List[ProcessBatchItem] = Field(..., min_length=1, max_length=50)
+
 class ProcessStatusUpdate(BaseModel):
     status: str
 
@@ -27,4 +34,22 @@ class ProcessResponse(BaseModel):
     billing: Optional[BillingResponse] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+class ProcessBatchPayment(BaseModel):
+    processIDs: Optional[List[int]] = Field(None, min_length=1, max_length=500)
+    allPending: bool = False
+    mode: Literal["atomic", "best_effort"] = "atomic"
+
+class BatchPaymentItem(BaseModel):
+    processid: int
+    amount: Optional[float] = None
+    status: str
+
+class BatchPaymentResponse(BaseModel):
+    mode: str
+    paidCount: int
+    paidTotal: float
+    balance: Optional[float] = None
+    items: List[BatchPaymentItem]
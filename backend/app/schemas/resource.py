@@ -1,6 +1,6 @@
 # app/schemas/resource.py
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import date, datetime
 
 class ResourceBase(BaseModel):
@@ -26,9 +26,51 @@ class ResourceRequestResponse(BaseModel):
     doctorName: Optional[str] = None
     timestamp: Optional[datetime] = None
 
+class RequestDecision(BaseModel):
+    doctorID: int
+    resourceID: int
+    status: Literal["Pending", "Approved", "Rejected"]
+
+class RequestDecisionBatch(BaseModel):
+    decisions: List[RequestDecision] = Field(..., min_length=1, max_length=500)
+
+class RequestDecisionResult(RequestDecision):
+    result: str
+
+class RequestDecisionBatchResponse(BaseModel):
+    updatedCount: int
+    items: List[RequestDecisionResult]
+
+class ResourceDepartmentLink(BaseModel):
+    deptName: str
+    source: str
+    requestCount: int
+
+class ReservationCreate(BaseModel):
+    startTime: datetime
+    endTime: datetime
+    doctorID: Optional[int] = None  # Staff may reserve on behalf of a doctor; doctors always reserve for themselves
+
+class ReservationResponse(BaseModel):
+    reservationID: int
+    resourceID: int
+    doctorID: Optional[int] = None
+    startTime: datetime
+    endTime: datetime
+
+class FreeWindow(BaseModel):
+    start: datetime
+    end: datetime
+
+class ResourceFreeWindows(BaseModel):
+    resourceID: int
+    availability: str
+    windows: List[FreeWindow]
+
 # Add new schemas for recent activity and statistics
 
 class RecentActivity(BaseModel):
+    eventID: int
     doctorID: int
     resourceID: int
     status: str
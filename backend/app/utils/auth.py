@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from ..config import settings
 from ..database import execute_query
@@ -30,6 +30,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Decode JWT token and get current user"""
+    return get_user_from_token(token)
+
+async def get_current_user_sse(request: Request, token: Optional[str] = None):
+    """Authenticate an EventSource connection.
+
+    Browsers cannot set headers on EventSource, so the token may also be
+    passed as the `token` query parameter.
+    """
+    authorization = request.headers.get("Authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return get_user_from_token(token)
+
+def get_user_from_token(token: str):
+    """Decode JWT token and load the user it belongs to"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
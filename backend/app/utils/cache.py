@@ -0,0 +1,234 @@
+# app/utils/cache.py
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from fastapi import Request, Response
+from ..config import settings
+from .coalesce import SingleFlight
+from .etag import catalog_versions, etag_matches, not_modified_response
+from .fastjson import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+_CacheEntry = namedtuple("_CacheEntry", "value size expires_at tags headers")
+
+class MicroCache:
+    """Tiny in-process cache for hot, unauthenticated read endpoints.
+
+    Values are fresh for `ttl_seconds`. For a further `stale_seconds` the old
+    value is still served while a single background thread reloads it
+    (stale-while-revalidate). On a miss the loader runs on the threadpool,
+    and concurrent callers for the same key share that one load through a
+    SingleFlight instead of blocking the event loop.
+    """
+
+    def __init__(self, ttl_seconds, stale_seconds=0):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight(settings.COALESCE_MAX_WAIT_SECONDS)
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+
+    def _load(self, key, loader):
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            # Keep serving the stale value; the next caller past the stale window reloads
+            logger.warning(f"Background refresh of {key!r} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def get(self, key, loader):
+        """Return the cached value for `key`, calling the blocking `loader()` to (re)build it"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl_seconds:
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                with self._lock:
+                    start_refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start_refresh:
+                    threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                return value
+
+        return await self._flight.run(key, self._load, key, loader)
+
+    def clear(self):
+        self._entries.clear()
+
+class ResponseCache:
+    """Read-through cache for GET handlers whose output changes rarely.
+
+    Routes opt in with the `cached` decorator, declaring a TTL and the tags
+    their output depends on. Entries are keyed by route, path, query string
+    and the caller's role, and dropped when a tag is invalidated. Tags share
+    names with the catalog version keys, so every `catalog_versions.bump()`
+    in a write handler also invalidates the cached responses. Memory is
+    bounded by the estimated size of the stored responses, evicting the
+    least recently used first.
+    """
+
+    def __init__(self, max_bytes, bypass_header="X-Cache-Bypass"):
+        self.max_bytes = max_bytes
+        self.bypass_header = bypass_header
+        self._entries = OrderedDict()
+        self._tags = defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a response loaded before one is not stored after it
+        self._generation = 0
+        self.metrics = Counter()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            for tag in entry.tags:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+        return entry
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.metrics["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry
+
+    def store(self, key, value, ttl_seconds, tags=(), headers=None, generation=None):
+        # Trusted responses are stored already encoded
+        size = len(value) if isinstance(value, bytes) else len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        entry = _CacheEntry(value, size, time.monotonic() + ttl_seconds, frozenset(tags), headers or {})
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            for tag in entry.tags:
+                self._tags[tag].add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.metrics["evictions"] += 1
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.metrics["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hitRatio": round(self.metrics["hits"] / lookups, 3) if lookups else None,
+                **{name: self.metrics[name] for name in
+                   ("hits", "misses", "bypasses", "evictions", "expirations", "invalidations")}
+            }
+
+    def cached(self, ttl_seconds, tags=()):
+        """Cache a GET handler's return value for `ttl_seconds`.
+
+        `tags` are format strings filled from the handler's arguments, e.g.
+        "doctor:{doctor_id}". The handler gets `request`/`response`
+        parameters added if it does not declare them. A FastJSONResponse is
+        cached as its encoded body; other responses returned directly (such
+        as a 304) and exceptions are never cached.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+            wants_request = "request" in signature.parameters
+            wants_response = "response" in signature.parameters
+            extra = []
+            if not wants_request:
+                extra.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+            if not wants_response:
+                extra.append(inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs["request"] if wants_request else kwargs.pop("request")
+                response = kwargs["response"] if wants_response else kwargs.pop("response")
+
+                if request.headers.get(self.bypass_header):
+                    with self._lock:
+                        self.metrics["bypasses"] += 1
+                    value = await func(*args, **kwargs)
+                    (value if isinstance(value, Response) else response).headers["X-Cache"] = "BYPASS"
+                    return value
+
+                role = (kwargs.get("current_user") or {}).get("role")
+                key = (func.__module__, func.__qualname__, request.url.path,
+                       tuple(sorted(request.query_params.multi_items())), role)
+                entry = self.lookup(key)
+                if entry is not None:
+                    etag = entry.headers.get("etag")
+                    if etag and etag_matches(request, etag):
+                        return not_modified_response(etag)
+                    if isinstance(entry.value, bytes):
+                        return Response(entry.value, media_type="application/json",
+                                        headers={**entry.headers, "X-Cache": "HIT"})
+                    response.headers.update(entry.headers)
+                    response.headers["X-Cache"] = "HIT"
+                    return entry.value
+
+                generation = self._generation
+                value = await func(*args, **kwargs)
+                if isinstance(value, FastJSONResponse):
+                    if value.status_code == 200:
+                        headers = {name: value.headers[name] for name in ("etag", "cache-control") if name in value.headers}
+                        self.store(key, value.body, ttl_seconds, [tag.format(**kwargs) for tag in tags], headers, generation)
+                    value.headers["X-Cache"] = "MISS"
+                elif not isinstance(value, Response):
+                    headers = {name: response.headers[name] for name in ("etag", "cache-control") if name in response.headers}
+                    self.store(key, value, ttl_seconds, [tag.format(**kwargs) for tag in tags], headers, generation)
+                    response.headers["X-Cache"] = "MISS"
+                return value
+
+            wrapper.__signature__ = signature.replace(parameters=list(signature.parameters.values()) + extra)
+            return wrapper
+        return decorator
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_BYPASS_HEADER)
+catalog_versions.subscribe(response_cache.invalidate, on_reset=response_cache.clear)
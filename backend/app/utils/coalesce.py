@@ -0,0 +1,68 @@
+# app/utils/coalesce.py
+import asyncio
+import logging
+from collections import Counter
+from fastapi.concurrency import run_in_threadpool
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Share one in-flight database read between identical concurrent requests.
+
+    The first caller for a key runs the blocking loader on the threadpool;
+    callers arriving while it is still running await the same result (or
+    exception) instead of issuing their own query. Followers wait at most
+    `max_wait_seconds`, then fall back to running the query themselves, so a
+    slow leader cannot hold a burst hostage. Nothing is kept once the call
+    completes: this is coalescing, not caching.
+    """
+
+    def __init__(self, max_wait_seconds):
+        self.max_wait_seconds = max_wait_seconds
+        self._inflight = {}
+        self.metrics = Counter()
+
+    def _finished(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.metrics["errors"] += 1
+
+    async def run(self, key, loader, *args, **kwargs):
+        """Return `loader(*args, **kwargs)`, sharing the call with concurrent callers of `key`"""
+        self.metrics["requests"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.metrics["executed"] += 1
+            # A separate task so a disconnecting leader does not cancel its followers' query
+            task = asyncio.ensure_future(run_in_threadpool(loader, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            return await asyncio.shield(task)
+
+        # asyncio.wait leaves the shared task running when the wait times out
+        done, _ = await asyncio.wait([task], timeout=self.max_wait_seconds)
+        if not done:
+            self.metrics["timeouts"] += 1
+            logger.warning(f"Coalesced read {key!r} still running after {self.max_wait_seconds}s, querying directly")
+            self.metrics["executed"] += 1
+            return await run_in_threadpool(loader, *args, **kwargs)
+        # The shared result or error both count as a query saved
+        self.metrics["coalesced"] += 1
+        return task.result()
+
+    def forget(self, *keys):
+        """Let later callers of `keys` start a fresh query instead of joining one that began before a write"""
+        for key in keys:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        requests = self.metrics["requests"]
+        return {
+            "inFlight": len(self._inflight),
+            "savedRatio": round(self.metrics["coalesced"] / requests, 3) if requests else None,
+            **{name: self.metrics[name] for name in ("requests", "executed", "coalesced", "timeouts", "errors")}
+        }
+
+read_coalescer = SingleFlight(settings.COALESCE_MAX_WAIT_SECONDS)
@@ -0,0 +1,166 @@
+# app/utils/compression.py
+import zlib
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from .etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Media types that are already compressed or must not be buffered (server-sent events)
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip", "application/x-gzip", "application/zip", "application/grpc",
+    "audio/*", "font/woff", "font/woff2", "image/avif", "image/gif", "image/jpeg",
+    "image/png", "image/webp", "text/event-stream", "video/*"
+)
+
+# Chunks at least this large are compressed off the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+def accepted_encodings(header):
+    """Content codings the client accepts, ignoring those it refuses with q=0"""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+def _is_excluded(content_type):
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in EXCLUDED_CONTENT_TYPES or media_type.partition("/")[0] + "/*" in EXCLUDED_CONTENT_TYPES
+
+class GzipEncoder:
+    content_encoding = "gzip"
+
+    def __init__(self, level):
+        self.level = level
+        self._compressor = None
+
+    def compress(self, body, more_body):
+        # Created on first use: most responses are below the minimum size
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        if more_body:
+            # Flush each chunk so streamed responses reach the client as they are produced
+            return self._compressor.compress(body) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._compressor.compress(body) + self._compressor.flush()
+
+class BrotliEncoder:
+    content_encoding = "br"
+
+    def __init__(self, quality):
+        self.quality = quality
+        self._compressor = None
+
+    def compress(self, body, more_body):
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+class CompressionResponder:
+    """Wrap `send` for one response, compressing the body with `encoder` (None: pass through)"""
+
+    def __init__(self, app, minimum_size, encoder):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoder = encoder
+        self.send = None
+        self.start_message = None
+        self.passthrough = False
+        self.started = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def compress(self, body, more_body):
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder.compress, body, more_body)
+        return self.encoder.compress(body, more_body)
+
+    async def send_with_compression(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Held back until the first body chunk decides the headers
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or _is_excluded(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+        elif self.passthrough or message_type not in ("http.response.body", "http.response.pathsend"):
+            await self.send(message)
+        elif message_type == "http.response.pathsend":
+            # File responses sent by the server itself are left alone
+            await self.send(self.start_message)
+            await self.send(message)
+        elif not self.started:
+            self.started = True
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoder is not None:
+                message["body"] = await self.compress(body, more_body)
+                headers["Content-Encoding"] = self.encoder.content_encoding
+                if "etag" in headers:
+                    # The encoded bytes are a different representation and need their own strong validator
+                    headers["ETag"] = encoded_etag(headers["etag"], self.encoder.content_encoding)
+                if more_body or self.start_message.get("trailers", False):
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.start_message)
+            await self.send(message)
+        else:
+            if self.encoder is not None:
+                message["body"] = await self.compress(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+
+class CompressionMiddleware:
+    """Compress responses of at least `minimum_size` bytes.
+
+    Brotli is preferred when the `brotli` package is installed and the client
+    accepts it, otherwise gzip. Streaming bodies are compressed chunk by
+    chunk with a flush after each one. Server-sent events, already encoded
+    bodies, partial content and binary media types pass through unchanged.
+    """
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoder = BrotliEncoder(self.brotli_quality)
+        elif "gzip" in accepted:
+            encoder = GzipEncoder(self.gzip_level)
+        else:
+            encoder = None
+        await CompressionResponder(self.app, self.minimum_size, encoder)(scope, receive, send)
@@ -0,0 +1,114 @@
+# app/utils/etag.py
+import hashlib
+import secrets
+import threading
+from fastapi import Request, Response
+
+class VersionRegistry:
+    """Version counters for slow-changing resources.
+
+    Write handlers bump a key (e.g. "medications", "doctor:12") and read
+    handlers derive a strong ETag from the current version, so a matching
+    If-None-Match can be answered without touching the database. A bump
+    applies locally at once and is broadcast through `publisher` (set up by
+    app.utils.events over Postgres NOTIFY) so the other workers apply it too.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._reset_listeners = []
+        self._resets = 0
+        # Changes on every restart so ETags issued by a previous process never match
+        self._epoch = secrets.token_hex(4)
+        # Identifies this process's own broadcasts when they come back
+        self.origin = secrets.token_hex(8)
+        self.publisher = None
+
+    def get(self, key):
+        # Grows with every bump and every reset, so a cached copy never matches after either
+        return self._versions.get(key, 0) + self._resets
+
+    def _apply(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+        for listener in self._listeners:
+            listener(*keys)
+
+    def bump(self, *keys):
+        self._apply(keys)
+        if self.publisher is not None:
+            self.publisher(keys)
+
+    def apply_remote(self, keys, origin):
+        """Apply a bump broadcast by another worker"""
+        if origin != self.origin:
+            self._apply(keys)
+
+    def reset(self):
+        """Treat every key as changed, e.g. after broadcasts may have been missed.
+
+        A new epoch changes every ETag, and reset listeners drop whatever
+        they derived from the old versions.
+        """
+        with self._lock:
+            self._resets += 1
+            self._epoch = secrets.token_hex(4)
+        for listener in self._reset_listeners:
+            listener()
+
+    def subscribe(self, listener, on_reset=None):
+        """Call `listener(*keys)` after every bump (local or remote), e.g. to invalidate cached responses"""
+        self._listeners.append(listener)
+        if on_reset is not None:
+            self._reset_listeners.append(on_reset)
+
+    def etag(self, *keys, variant=""):
+        """Build a strong ETag from the versions of all keys a response depends on"""
+        parts = [self._epoch] + [f"{key}={self.get(key)}" for key in keys] + [str(variant)]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+        return f'"{digest}"'
+
+catalog_versions = VersionRegistry()
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against a strong ETag, in any of its encodings"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [_base_etag(candidate.strip()) for candidate in header.split(",")]
+
+# Content codings CompressionMiddleware may apply; each encoded body gets its own ETag
+ETAG_CODINGS = ("gzip", "br")
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag of the `coding`-encoded representation: '"abc"' becomes '"abc-gzip"'"""
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+def _base_etag(candidate: str) -> str:
+    """The ETag a handler issued, from a validator the client may have received encoded.
+
+    If-None-Match uses weak comparison, so a W/ prefix is ignored as well.
+    """
+    if candidate.startswith("W/"):
+        candidate = candidate[2:]
+    for coding in ETAG_CODINGS:
+        suffix = f'-{coding}"'
+        if candidate.endswith(suffix):
+            return candidate[:-len(suffix)] + '"'
+    return candidate
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 response carrying the current validator"""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+def set_etag_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
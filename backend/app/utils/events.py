@@ -0,0 +1,148 @@
+# app/utils/events.py
+import asyncio
+import json
+import logging
+import select
+import threading
+from ..config import settings
+from ..database import create_connection, execute_query
+from .etag import catalog_versions
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """A single SSE connection's bounded event queue"""
+
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        """Enqueue without blocking the publisher.
+
+        A consumer that falls behind loses its backlog and gets a single
+        "resync" event instead, telling the client to refetch its state.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+class EventBroker:
+    """In-memory fan-out of events to the SSE connections of this worker"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._loop = None
+
+    def bind_loop(self, loop):
+        self._loop = loop
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, settings.EVENT_QUEUE_SIZE)
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for channel in subscription.channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def dispatch(self, message):
+        """Deliver a decoded notification to every subscriber of its channels (event loop only)"""
+        delivered = set()
+        for channel in message.get("channels", []):
+            for subscription in self._subscribers.get(channel, ()):
+                if subscription not in delivered:
+                    subscription.offer(message["event"])
+                    delivered.add(subscription)
+
+    def dispatch_threadsafe(self, message):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.dispatch, message)
+
+broker = EventBroker()
+
+def publish_event(event_type, data, doctor_id=None, patient_id=None, extra_channels=()):
+    """Publish an event to a doctor's and/or patient's channels.
+
+    Goes through Postgres NOTIFY so that every worker, including this one,
+    receives it on its LISTEN connection and fans it out locally.
+    """
+    channels = list(extra_channels)
+    if doctor_id is not None:
+        channels.append(f"doctor:{doctor_id}")
+    if patient_id is not None:
+        channels.append(f"patient:{patient_id}")
+
+    message = {"channels": channels, "event": {"type": event_type, "data": data}}
+    payload = json.dumps(message, default=str)
+    try:
+        execute_query("SELECT pg_notify(%s, %s)", (settings.EVENTS_CHANNEL, payload), fetch=False)
+    except Exception as e:
+        # Events are best-effort; the write that triggered them already succeeded
+        logger.error(f"Failed to publish {event_type} event: {e}")
+
+def publish_versions(keys):
+    """Broadcast a catalog version bump to the other workers"""
+    payload = json.dumps({"versions": list(keys), "origin": catalog_versions.origin})
+    try:
+        execute_query("SELECT pg_notify(%s, %s)", (settings.EVENTS_CHANNEL, payload), fetch=False)
+    except Exception as e:
+        # Other workers keep serving the old versions until their listener reconnects and resets
+        logger.error(f"Failed to broadcast version bump {keys}: {e}")
+
+catalog_versions.publisher = publish_versions
+
+class NotificationListener(threading.Thread):
+    """Background thread holding a LISTEN connection and feeding the broker"""
+
+    def __init__(self, target_broker):
+        super().__init__(name="pg-event-listener", daemon=True)
+        self.broker = target_broker
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = create_connection()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {settings.EVENTS_CHANNEL}")
+                logger.info(f"Listening for events on {settings.EVENTS_CHANNEL}")
+                # Version bumps sent while we were not listening are lost; start from a clean slate
+                catalog_versions.reset()
+
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        try:
+                            message = json.loads(notification.payload)
+                            if message.get("reset"):
+                                # Sent by database triggers when too much changed to list
+                                catalog_versions.reset()
+                            elif "versions" in message:
+                                catalog_versions.apply_remote(message["versions"], message.get("origin"))
+                            else:
+                                self.broker.dispatch_threadsafe(message)
+                        except ValueError:
+                            logger.warning(f"Dropping malformed event payload: {notification.payload[:200]}")
+            except Exception as e:
+                logger.error(f"Event listener error: {e}")
+                self._stop_event.wait(settings.EVENT_LISTENER_RETRY_SECONDS)
+            finally:
+                if conn:
+                    conn.close()
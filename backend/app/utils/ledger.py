@@ -0,0 +1,45 @@
+# app/utils/ledger.py
+import asyncio
+import logging
+from fastapi.concurrency import run_in_threadpool
+from ..database import get_db_connection
+from ..config import settings
+from ..models.patient_queries import LOCK_BALANCE_SNAPSHOT_BATCH, PRUNE_BALANCE_SNAPSHOTS, TAKE_BALANCE_SNAPSHOTS
+
+logger = logging.getLogger(__name__)
+
+def take_balance_snapshots(batch_size=None):
+    """Snapshot the ledger balance of every patient with new entries; returns the number taken.
+
+    Works through patients in batches, one short transaction each. Only the
+    batch's Patients rows are locked, so payments and top-ups for everyone
+    else carry on while the snapshots are taken.
+    """
+    batch_size = batch_size or settings.BALANCE_SNAPSHOT_BATCH_SIZE
+    taken = 0
+    after = 0
+    while True:
+        with get_db_connection() as (conn, cursor):
+            cursor.execute(LOCK_BALANCE_SNAPSHOT_BATCH, {"after": after, "batch_size": batch_size})
+            patient_ids = [row["patientid"] for row in cursor.fetchall()]
+            if not patient_ids:
+                conn.commit()
+                return taken
+            cursor.execute(TAKE_BALANCE_SNAPSHOTS, {"patient_ids": patient_ids})
+            taken += cursor.rowcount
+            cursor.execute(PRUNE_BALANCE_SNAPSHOTS, {"patient_ids": patient_ids})
+            conn.commit()
+        if len(patient_ids) < batch_size:
+            return taken
+        after = patient_ids[-1]
+
+async def snapshot_balances_periodically(interval_seconds):
+    """Background task started from the app lifespan"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            taken = await run_in_threadpool(take_balance_snapshots)
+            if taken:
+                logger.info(f"Took {taken} balance snapshots")
+        except Exception as e:
+            logger.error(f"Balance snapshot failed: {e}")
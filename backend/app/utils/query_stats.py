@@ -0,0 +1,238 @@
+# app/utils/query_stats.py
+import datetime
+import decimal
+import hashlib
+import importlib
+import logging
+import pkgutil
+import random
+import re
+import threading
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Parameter values shown as-is in logs; everything else (strings above all) is redacted
+_PLAIN_TYPES = (bool, int, float, decimal.Decimal, datetime.date, datetime.time, datetime.timedelta)
+
+# Inline SQL with literals spliced in (ID lists, dates) differs on every call; these
+# collapse the literals so each statement shape gets one name
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LITERAL_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+# Statements that write, lock rows or have side effects when run again; EXPLAIN ANALYZE
+# executes the statement, so these only ever get a plain EXPLAIN
+_SIDE_EFFECTS = re.compile(
+    r"\b(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE|FOR\s+(?:NO\s+KEY\s+)?UPDATE|FOR\s+(?:KEY\s+)?SHARE"
+    r"|PG_NOTIFY|NEXTVAL|SETVAL|PG_(?:TRY_)?ADVISORY_\w+|LO_\w+)\b",
+    re.IGNORECASE
+)
+
+def _normalize(query):
+    return " ".join(query.split())
+
+def _strip_literals(text):
+    text = _NUMBER_LITERAL.sub("?", _STRING_LITERAL.sub("?", text))
+    return _LITERAL_LIST.sub("?", text)
+
+def is_read_only(query):
+    """Whether a statement is a plain SELECT that is safe to execute again"""
+    text = _STRING_LITERAL.sub("''", query).lstrip()
+    return text[:6].upper() == "SELECT" and _SIDE_EFFECTS.search(text) is None
+
+class QueryRegistry:
+    """Map SQL text back to the app.models constant it came from.
+
+    Names look like `appointment_queries.GET_DOCTOR_SLOTS`. Templates that
+    routers fill with str.format() (`{where_clause}` and friends) are matched
+    on their text up to the first placeholder. Anything else, such as SQL
+    written inline in a router, is named `inline:<hash>` from its normalized
+    text with string and number literals replaced, which stays stable across
+    processes and deploys.
+    """
+
+    def __init__(self, package="app.models"):
+        self.package = package
+        self._exact = None
+        self._prefixes = None
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _build(self):
+        exact, prefixes = {}, []
+        package = importlib.import_module(self.package)
+        for module_info in sorted(pkgutil.iter_modules(package.__path__), key=lambda m: m.name):
+            module = importlib.import_module(f"{self.package}.{module_info.name}")
+            for attr, value in vars(module).items():
+                if not attr.isupper() or not isinstance(value, str):
+                    continue
+                name = f"{module_info.name}.{attr}"
+                text = _normalize(value)
+                head, brace, _ = text.partition("{")
+                if brace and len(head) >= 20:
+                    prefixes.append((head, name))
+                exact.setdefault(text, name)
+        # Longest prefix first so a template never shadows a more specific one
+        prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self._exact, self._prefixes = exact, prefixes
+
+    def name(self, query):
+        if isinstance(query, bytes):
+            query = query.decode("utf-8", "replace")
+        name = self._resolved.get(query)
+        if name is not None:
+            return name
+        with self._lock:
+            if self._exact is None:
+                self._build()
+        text = _normalize(query)
+        name = self._exact.get(text)
+        if name is None:
+            name = next((name for head, name in self._prefixes if text.startswith(head)), None)
+        if name is None:
+            name = "inline:" + hashlib.sha1(_strip_literals(text).encode()).hexdigest()[:10]
+        # Queries are mostly constants, but bound the memo in case a caller builds SQL dynamically
+        if len(self._resolved) < 4096:
+            self._resolved[query] = name
+        return name
+
+def _redact_value(value):
+    if value is None or isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return f"<{type(value).__name__} of {len(value)}>"
+    if isinstance(value, str):
+        return f"<str({len(value)})>"
+    return f"<{type(value).__name__}>"
+
+def redact_params(params):
+    """Query parameters safe to log: numbers and dates kept, text and collections masked"""
+    if isinstance(params, dict):
+        return {key: _redact_value(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_redact_value(value) for value in params]
+    return _redact_value(params)
+
+class _QueryTiming:
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "rows", "buckets", "sample", "plan")
+
+    def __init__(self, sample):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.sample = sample
+        self.plan = None
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        threshold = fraction * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return round(self.max_ms, 1)
+
+class QueryStats:
+    """Per-query latency histograms, row counts and the slow-query log (per worker).
+
+    At most `max_inline` inline statements get their own entry; any further
+    ones are counted together under `inline:other`.
+    """
+
+    def __init__(self, registry, slow_ms, explain_sample_rate, max_inline=200):
+        self.registry = registry
+        self.max_inline = max_inline
+        self._inline_count = 0
+        self.slow_ms = slow_ms
+        self.explain_sample_rate = explain_sample_rate
+        self._timings = {}
+        self._lock = threading.Lock()
+        # Set by app.database: explain_runner(query, params, analyze) returns the plan
+        # of a sampled slow query
+        self.explain_runner = None
+
+    def record(self, query, params, duration_ms, rows, error=None):
+        """Count one execution; failures are counted here but logged by the caller"""
+        if isinstance(query, bytes):
+            query = query.decode("utf-8", "replace")
+        name = self.registry.name(query)
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None and name.startswith("inline:"):
+                if self._inline_count >= self.max_inline:
+                    name = "inline:other"
+                    timing = self._timings.get(name)
+                else:
+                    self._inline_count += 1
+            if timing is None:
+                timing = self._timings[name] = _QueryTiming(_normalize(query)[:120])
+            timing.calls += 1
+            timing.total_ms += duration_ms
+            timing.max_ms = max(timing.max_ms, duration_ms)
+            if error is not None:
+                timing.errors += 1
+            if rows is not None and rows > 0:
+                timing.rows += rows
+            index = next((i for i, bound in enumerate(BUCKETS_MS) if duration_ms <= bound), len(BUCKETS_MS))
+            timing.buckets[index] += 1
+
+        if error is None and duration_ms >= self.slow_ms:
+            logger.warning(f"Slow query {name}: {duration_ms:.1f} ms, {rows} rows, Params: {redact_params(params)}")
+            if self.explain_runner is not None and random.random() < self.explain_sample_rate:
+                # EXPLAIN ANALYZE runs the statement again, so writes, row locks and
+                # notifications only get the estimated plan
+                analyze = is_read_only(query)
+                threading.Thread(target=self._explain, args=(name, query, params, analyze), daemon=True).start()
+        return name
+
+    def _explain(self, name, query, params, analyze):
+        try:
+            plan = self.explain_runner(query, params, analyze)
+        except Exception as e:
+            logger.warning(f"EXPLAIN of slow query {name} failed: {e}")
+            return
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is not None:
+                timing.plan = plan
+        logger.warning(f"Plan for slow query {name}:\n{plan}")
+
+    def snapshot(self, limit=None):
+        """Queries ranked by total time spent in them"""
+        with self._lock:
+            ranked = sorted(self._timings.items(), key=lambda item: item[1].total_ms, reverse=True)
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [
+                {
+                    "name": name,
+                    "calls": t.calls,
+                    "errors": t.errors,
+                    "totalMs": round(t.total_ms, 1),
+                    "meanMs": round(t.total_ms / t.calls, 2),
+                    "p50Ms": t.percentile(0.5),
+                    "p95Ms": t.percentile(0.95),
+                    "maxMs": round(t.max_ms, 1),
+                    "rows": t.rows,
+                    "meanRows": round(t.rows / t.calls, 1),
+                    "histogram": dict(zip([f"le{bound}" for bound in BUCKETS_MS] + ["inf"], t.buckets)),
+                    "sample": t.sample if name.startswith("inline:") else None,
+                    "plan": t.plan
+                }
+                for name, t in ranked
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._inline_count = 0
+
+query_stats = QueryStats(QueryRegistry(), settings.SLOW_QUERY_MS, settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE)
@@ -0,0 +1,144 @@
+# app/utils/search.py
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from .etag import catalog_versions
+
+MATCH_EXACT, MATCH_PREFIX, MATCH_WORD, MATCH_SUBSTRING, MATCH_FUZZY = range(5)
+MATCH_NAMES = ["exact", "prefix", "word", "substring", "fuzzy"]
+
+def normalize(text):
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PrefixIndex:
+    """Immutable typeahead index over (name, payload) pairs.
+
+    Exact, whole-name prefix and word prefix matches come from binary searches
+    over sorted keys; substring and trigram (fuzzy) matches are only looked
+    for when the cheaper tiers do not fill the requested number of results.
+    Both come from an inverted trigram index rather than a scan, so queries
+    shorter than three characters only match on the prefix tiers.
+    """
+
+    def __init__(self, entries, min_similarity=0.3):
+        self.entries = list(entries)
+        self.min_similarity = min_similarity
+        self._names = [normalize(name) for name, _ in self.entries]
+        self._by_name = sorted((name, i) for i, name in enumerate(self._names))
+        self._by_word = sorted(
+            (word, i) for i, name in enumerate(self._names) for word in set(name.split()[1:])
+        )
+        self._trigram_counts = []
+        self._postings = defaultdict(list)
+        for i, name in enumerate(self._names):
+            name_trigrams = trigrams(name)
+            self._trigram_counts.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                self._postings[trigram].append(i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        start = bisect.bisect_left(keys, (prefix,))
+        for position in range(start, len(keys)):
+            key, i = keys[position]
+            if not key.startswith(prefix):
+                break
+            yield i
+
+    def _substring(self, query):
+        # Every trigram inside the query is also one of the name's trigrams, so
+        # intersecting their postings (rarest first) leaves only names to verify
+        query_trigrams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = sorted((self._postings.get(trigram, ()) for trigram in query_trigrams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return (i for i in candidates if query in self._names[i])
+
+    def _fuzzy(self, query):
+        query_trigrams = trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._postings.get(trigram, ()))
+        for i, count in shared.items():
+            similarity = count / (len(query_trigrams) + self._trigram_counts[i] - count)
+            if similarity >= self.min_similarity:
+                yield i, similarity
+
+    def search(self, query, limit=10):
+        """Return up to `limit` (payload, match, score) tuples, best first"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        # Best (lowest) rank key per entry: (match tier, -score, name length, name)
+        ranked = {}
+
+        def add(i, match, score):
+            key = (match, -score, len(self._names[i]), self._names[i])
+            if i not in ranked or key < ranked[i]:
+                ranked[i] = key
+
+        for i in self._prefix_range(self._by_name, query):
+            add(i, MATCH_EXACT if self._names[i] == query else MATCH_PREFIX, 1.0)
+        for i in self._prefix_range(self._by_word, query):
+            add(i, MATCH_WORD, 1.0)
+
+        if len(ranked) < limit and len(query) >= 3:
+            for i in self._substring(query):
+                add(i, MATCH_SUBSTRING, 1.0)
+
+        if len(ranked) < limit and len(query) >= 3:
+            for i, similarity in self._fuzzy(query):
+                add(i, MATCH_FUZZY, similarity)
+
+        best = heapq.nsmallest(limit, ranked.items(), key=lambda item: item[1])
+        return [(self.entries[i][1], MATCH_NAMES[key[0]], round(-key[1], 3)) for i, key in best]
+
+class CatalogIndex:
+    """A PrefixIndex over a catalog table, rebuilt when its catalog version is bumped.
+
+    Bumps from other workers arrive over NOTIFY; the index is also rebuilt
+    after `ttl_seconds` in case a broadcast was lost.
+    """
+
+    def __init__(self, version_key, loader, name_field, ttl_seconds):
+        self.version_key = version_key
+        self.loader = loader
+        self.name_field = name_field
+        self.ttl_seconds = ttl_seconds
+        self._index = None
+        self._version = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return (
+            self._index is not None
+            and self._version == catalog_versions.get(self.version_key)
+            and time.monotonic() - self._built_at < self.ttl_seconds
+        )
+
+    def get(self):
+        if self._is_fresh():
+            return self._index
+        with self._lock:
+            if not self._is_fresh():
+                version = catalog_versions.get(self.version_key)
+                rows = self.loader()
+                self._index = PrefixIndex((row[self.name_field], row) for row in rows)
+                self._version = version
+                self._built_at = time.monotonic()
+        return self._index
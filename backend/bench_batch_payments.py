@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark settling a patient's bills one /pay call at a time versus a single
+/processes/pay-batch statement (PAY_PROCESSES_BATCH).
+
+Usage:
+    python bench_batch_payments.py --bills 500
+"""
+
+import argparse
+import logging
+import time
+from app.database import execute_query
+from app.models.process_queries import PAY_PROCESSES_BATCH
+from bench_payments import create_fixture, drop_fixture, pay
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_batch_payments")
+
+def pay_one_by_one(fixture):
+    start = time.perf_counter()
+    paid = sum(pay(fixture, process_id) for process_id in fixture["process_ids"])
+    return paid, time.perf_counter() - start
+
+def pay_in_batch(fixture, atomic):
+    start = time.perf_counter()
+    items = execute_query(
+        PAY_PROCESSES_BATCH,
+        {"patient_id": fixture["patient_id"], "process_ids": fixture["process_ids"], "atomic": atomic}
+    )
+    paid = sum(1 for item in items if item["status"] == "paid")
+    return paid, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-bill and batch payment throughput")
+    parser.add_argument("--bills", type=int, default=500)
+    parser.add_argument("--amount", type=float, default=10)
+    args = parser.parse_args()
+
+    runs = [
+        ("per-call", pay_one_by_one),
+        ("batch (atomic)", lambda fixture: pay_in_batch(fixture, True)),
+        ("batch (best effort)", lambda fixture: pay_in_batch(fixture, False)),
+    ]
+
+    baseline = None
+    for label, run in runs:
+        fixture = create_fixture(args.bills, args.amount, args.bills * args.amount)
+        try:
+            paid, elapsed = run(fixture)
+        finally:
+            drop_fixture(fixture)
+
+        throughput = paid / elapsed
+        baseline = baseline or throughput
+        logger.info(
+            f"{label:>20}: paid {paid}/{args.bills} in {elapsed * 1000:.1f} ms "
+            f"({throughput:.0f} bills/s, {throughput / baseline:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression for appointment-history payloads of
+growing size: wire bytes and CPU time per response for no compression,
+gzip at several levels and brotli (when installed), through
+CompressionMiddleware.
+
+Usage:
+    python bench_compression.py --rows 10,100,1000,10000
+"""
+
+import argparse
+import logging
+import time
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from app.utils.compression import CompressionMiddleware, brotli
+from app.utils.fastjson import dumps
+from bench_json_encoding import appointment_rows
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_compression")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def build_client(body, minimum_size, gzip_level, brotli_quality):
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=minimum_size, gzip_level=gzip_level, brotli_quality=brotli_quality
+    )
+
+    @app.get("/payload")
+    async def payload():
+        return Response(body, media_type="application/json")
+
+    return TestClient(app)
+
+def measure(client, accept_encoding, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        # stream=True keeps the client from decompressing, so content length is the wire size
+        with client.stream("GET", "/payload", headers={"Accept-Encoding": accept_encoding}) as response:
+            wire = sum(len(chunk) for chunk in response.iter_raw())
+        timings.append(time.process_time() - start)
+    return wire, min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Wire bytes and CPU cost of response compression")
+    parser.add_argument("--rows", default="10,100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--minimum-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    variants = [("identity", "identity", 6), ("gzip-1", "gzip", 1), ("gzip-6", "gzip", 6), ("gzip-9", "gzip", 9)]
+    if brotli is not None:
+        variants.append(("br-4", "br", 6))
+    else:
+        logger.info("brotli not installed, skipping the br variant")
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        body = dumps(appointment_rows(rows))
+        for name, accept_encoding, gzip_level in variants:
+            client = build_client(body, args.minimum_size, gzip_level, brotli_quality=4)
+            wire, cpu_ms = measure(client, accept_encoding, args.repeat)
+            logger.info(
+                f"{rows:>6} rows {len(body):>9} B | {name:>8}: {wire:>9} B on the wire "
+                f"({wire / len(body):6.1%}), {cpu_ms:7.2f} ms CPU"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET_RESOURCE_FREE_WINDOWS as a resource's reservation history
+grows. Latency should depend on the reservations inside the queried window,
+not on how many reservations the resource has had.
+
+Usage:
+    python bench_free_windows.py --histories 1000,10000,100000
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from app.database import execute_query
+from app.models.resource_queries import GET_RESOURCE_FREE_WINDOWS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_free_windows")
+
+EPOCH = datetime(2030, 1, 1)
+# Every reservation is one hour, with one free hour after it
+SLOT = timedelta(hours=2)
+
+def add_reservations(resource_id, start, end):
+    execute_query(
+        """INSERT INTO ResourceReservation (resourceID, startTime, endTime)
+           SELECT %(resource_id)s, %(epoch)s + n * %(slot)s, %(epoch)s + n * %(slot)s + INTERVAL '1 hour'
+           FROM generate_series(%(start)s, %(end)s - 1) n""",
+        {"resource_id": resource_id, "epoch": EPOCH, "slot": SLOT, "start": start, "end": end},
+        fetch=False
+    )
+    execute_query("ANALYZE ResourceReservation", fetch=False)
+
+def measure(resource_id, history, samples):
+    latencies = []
+    for _ in range(samples):
+        window_start = EPOCH + random.randrange(history) * SLOT
+        params = {"resource_id": resource_id, "from": window_start, "to": window_start + timedelta(days=1)}
+        start = time.perf_counter()
+        windows = execute_query(GET_RESOURCE_FREE_WINDOWS, params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert windows
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Free-window latency vs. reservation history")
+    parser.add_argument("--histories", default="1000,10000,100000")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    resource_id = execute_query(
+        "INSERT INTO MedicalResources (name, availability) VALUES (%s, 'Available') RETURNING resourceID",
+        (f"bench-{uuid.uuid4().hex[:8]}",)
+    )[0]["resourceid"]
+
+    try:
+        created = 0
+        for history in sorted(int(h) for h in args.histories.split(",")):
+            add_reservations(resource_id, created, history)
+            created = history
+            p50, p95 = measure(resource_id, history, args.samples)
+            logger.info(f"{history:>8} reservations: p50={p50:.2f} ms p95={p95:.2f} ms")
+    finally:
+        execute_query("DELETE FROM ResourceReservation WHERE resourceID = %s", (resource_id,), fetch=False)
+        execute_query("DELETE FROM MedicalResources WHERE resourceID = %s", (resource_id,), fetch=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark CPU time per request for a large appointment-history payload:
+the validated response_model path, the jsonable_encoder path used by
+routes without a response model, and trusted_response() rows.
+
+Usage:
+    python bench_json_encoding.py --rows 10000
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.schemas.appointment import AppointmentResponse
+from app.utils.fastjson import orjson, trusted_response
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_json_encoding")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def appointment_rows(count):
+    """Rows shaped like GET_PATIENT_APPOINTMENTS output, one process each"""
+    start = datetime(2030, 1, 1, 9, 0)
+    rows = []
+    for i in range(count):
+        starts = start + timedelta(minutes=30 * i)
+        rows.append({
+            "appointmentid": i, "patientid": 3, "doctorid": 1, "starttime": starts,
+            "endtime": starts + timedelta(minutes=30), "status": "completed",
+            "rating": Decimal("4.5"), "review": "Very thorough", "doctorname": "Dr. Bench",
+            "specialization": "Cardiology",
+            "processes": [{
+                "processid": i, "processName": "Blood test", "processDescription": "Routine panel",
+                "status": "completed", "doctor_name": "Dr. Bench", "process_date": starts.isoformat(),
+                "billing": {"amount": 120.5, "paymentStatus": "paid", "billingDate": starts.isoformat()}
+            }]
+        })
+    return rows
+
+def build_app(rows):
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[AppointmentResponse])
+    async def validated():
+        return rows
+
+    @app.get("/encoded")
+    async def encoded():
+        return rows
+
+    @app.get("/trusted", response_model=List[AppointmentResponse])
+    async def trusted():
+        return trusted_response(rows, AppointmentResponse)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU time per request for large JSON responses")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    logger.info(f"Encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    client = TestClient(build_app(appointment_rows(args.rows)))
+    for path in ("/validated", "/encoded", "/trusted"):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.process_time()
+            response = client.get(path)
+            timings.append(time.process_time() - start)
+            assert response.status_code == 200
+        logger.info(f"{path:>11}: {min(timings) * 1000:7.1f} ms CPU per request ({len(response.content)} bytes, {args.rows} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Throughput test for the balance ledger: concurrent top-ups and payments
+against one patient while snapshots are taken in the background. Reports
+operations per second and checks that the ledger balance (latest snapshot
+plus tail) matches the cached Patients.Balance and never went negative.
+
+Usage:
+    python bench_ledger.py --threads 16 --operations 2000
+"""
+
+import argparse
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.database import execute_query
+from app.models.patient_queries import ADD_TO_BALANCE, GET_LEDGER_BALANCE
+from app.utils.ledger import take_balance_snapshots
+from bench_payments import create_fixture, drop_fixture, pay
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_ledger")
+
+def top_up(fixture, amount):
+    execute_query(ADD_TO_BALANCE, {"amount": amount, "patient_id": fixture["patient_id"]})
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent top-up and payment throughput on the balance ledger")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--amount", type=float, default=10)
+    args = parser.parse_args()
+
+    # Half the operations are payments, each against its own bill
+    fixture = create_fixture(args.operations // 2, args.amount, 0)
+    bills = iter(fixture["process_ids"])
+    operations = [("pay", next(bills)) if i % 2 else ("topup", None) for i in range(args.operations)]
+    random.shuffle(operations)
+
+    stop = threading.Event()
+    snapshots = []
+
+    def snapshot_loop():
+        while not stop.is_set():
+            snapshots.append(take_balance_snapshots())
+            stop.wait(0.05)
+
+    def run(operation):
+        kind, process_id = operation
+        if kind == "topup":
+            return top_up(fixture, args.amount)
+        return pay(fixture, process_id)
+
+    try:
+        snapshotter = threading.Thread(target=snapshot_loop)
+        snapshotter.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            succeeded = sum(executor.map(run, operations))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        snapshotter.join()
+
+        balance = execute_query(GET_LEDGER_BALANCE, (fixture["patient_id"],))[0]
+        logger.info(
+            f"{succeeded}/{args.operations} operations succeeded in {elapsed:.2f}s "
+            f"({args.operations / elapsed:.0f} ops/s, {len(snapshots)} snapshot passes)"
+        )
+        logger.info(f"Cached balance {balance['balance']}, ledger balance {balance['ledgerBalance']}")
+
+        if balance["balance"] != balance["ledgerBalance"] or balance["balance"] < 0:
+            logger.error("Ledger and cached balance disagree")
+            raise SystemExit(1)
+    finally:
+        stop.set()
+        drop_fixture(fixture)
+
+if __name__ == "__main__":
+    main()
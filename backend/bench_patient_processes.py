@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark the patient process feed (GET_PATIENT_PROCESSES) as the patient
+population grows. With the patientID-keyed query and its indexes, latency
+should stay flat from a thousand to tens of thousands of patients.
+
+Usage:
+    python bench_patient_processes.py --populations 1000,10000,50000
+"""
+
+import argparse
+import logging
+import statistics
+import time
+import uuid
+from app.database import execute_query, get_db_connection
+from app.models.process_queries import GET_PATIENT_PROCESSES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_patient_processes")
+
+APPOINTMENTS_PER_PATIENT = 2
+# Patients are loaded and removed in committed chunks: every appointment bumps
+# the same DoctorCounters row, and tens of thousands of updates to one row in
+# a single transaction get quadratically slower
+CHUNK_SIZE = 1000
+
+def create_doctor(cursor, tag):
+    cursor.execute(
+        """INSERT INTO "User" (name, email, identityNumber, password)
+           VALUES (%s, %s, %s, 'x') RETURNING userID""",
+        (f"bench-doctor-{tag}", f"doctor-{tag}@bench.example.com", f"bd-{tag}")
+    )
+    doctor_id = cursor.fetchone()["userid"]
+    cursor.execute("INSERT INTO Employee (employeeID, salary) VALUES (%s, NULL)", (doctor_id,))
+    cursor.execute("INSERT INTO Doctors (employeeID, specialization) VALUES (%s, 'Benchmark')", (doctor_id,))
+    return doctor_id
+
+def add_patients(cursor, tag, doctor_id, start, end):
+    """Add patients start..end, each with completed, billed appointments with the benchmark doctor"""
+    params = {"tag": tag, "start": start, "end": end, "doctor_id": doctor_id, "per_patient": APPOINTMENTS_PER_PATIENT}
+    cursor.execute(
+        """INSERT INTO "User" (name, email, identityNumber, password)
+           SELECT 'bench-patient-' || n, 'bench-' || %(tag)s || '-' || n || '@bench.example.com',
+                  'bench-' || %(tag)s || '-' || n, 'x'
+           FROM generate_series(%(start)s, %(end)s) n""",
+        params
+    )
+    cursor.execute(
+        """INSERT INTO Patients (patientID, name, DOB, email, phoneNumber, Balance)
+           SELECT u.userID, u.name, '1990-01-01', u.email, u.identityNumber, 0
+           FROM generate_series(%(start)s, %(end)s) n
+           JOIN "User" u ON u.identityNumber = 'bench-' || %(tag)s || '-' || n""",
+        params
+    )
+    cursor.execute(
+        """CREATE TEMP TABLE bench_times ON COMMIT DROP AS
+           SELECT u.userID AS patientID,
+                  TIMESTAMP '2030-01-01' + (n * %(per_patient)s + j) * INTERVAL '30 minutes' AS startTime
+           FROM generate_series(%(start)s, %(end)s) n
+           JOIN "User" u ON u.identityNumber = 'bench-' || %(tag)s || '-' || n
+           CROSS JOIN generate_series(0, %(per_patient)s - 1) j""",
+        params
+    )
+    cursor.execute(
+        """INSERT INTO Slots (doctorID, startTime, endTime, availability)
+           SELECT %(doctor_id)s, startTime, startTime + INTERVAL '30 minutes', 'booked' FROM bench_times""",
+        params
+    )
+    cursor.execute(
+        """INSERT INTO Appointment (status, patientID, doctorID, startTime, endTime)
+           SELECT 'completed', patientID, %(doctor_id)s, startTime, startTime + INTERVAL '30 minutes'
+           FROM bench_times""",
+        params
+    )
+    cursor.execute(
+        """INSERT INTO Process (processName, processDescription, status, appointmentID)
+           SELECT 'bench', 'benchmark process', 'Completed', a.appointmentID
+           FROM Appointment a JOIN bench_times t ON a.patientID = t.patientID AND a.startTime = t.startTime
+           WHERE a.doctorID = %(doctor_id)s""",
+        params
+    )
+    cursor.execute(
+        """INSERT INTO Billing (billingDate, amount, paymentStatus, processID)
+           SELECT NOW(), 10, 'Pending', p.processID
+           FROM Process p JOIN Appointment a ON p.appointmentID = a.appointmentID
+           JOIN bench_times t ON a.patientID = t.patientID AND a.startTime = t.startTime
+           WHERE a.doctorID = %(doctor_id)s""",
+        params
+    )
+
+def drop_population(tag, doctor_id):
+    patient_ids = [
+        row["userid"] for row in execute_query(
+            """SELECT userID FROM "User" WHERE identityNumber LIKE %s""", (f"bench-{tag}-%",)
+        )
+    ]
+    for offset in range(0, len(patient_ids), CHUNK_SIZE):
+        with get_db_connection() as (conn, cursor):
+            params = {"patient_ids": patient_ids[offset:offset + CHUNK_SIZE]}
+            appointments = "SELECT appointmentID FROM Appointment WHERE patientID = ANY(%(patient_ids)s)"
+            cursor.execute(f"DELETE FROM Billing WHERE processID IN (SELECT processID FROM Process WHERE appointmentID IN ({appointments}))", params)
+            cursor.execute(f"DELETE FROM Process WHERE appointmentID IN ({appointments})", params)
+            cursor.execute("DELETE FROM Appointment WHERE patientID = ANY(%(patient_ids)s)", params)
+            cursor.execute("DELETE FROM DoctorPatient WHERE patientID = ANY(%(patient_ids)s)", params)
+            cursor.execute("DELETE FROM PatientCounters WHERE patientID = ANY(%(patient_ids)s)", params)
+            cursor.execute("DELETE FROM Patients WHERE patientID = ANY(%(patient_ids)s)", params)
+            cursor.execute('DELETE FROM "User" WHERE userID = ANY(%(patient_ids)s)', params)
+            conn.commit()
+
+    with get_db_connection() as (conn, cursor):
+        params = {"doctor_id": doctor_id}
+        cursor.execute("DELETE FROM Slots WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM DoctorCounters WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM Doctors WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM Employee WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute('DELETE FROM "User" WHERE userID = %(doctor_id)s', params)
+        conn.commit()
+
+def sample_patients(tag, count):
+    rows = execute_query(
+        """SELECT userID FROM "User" WHERE identityNumber LIKE %s ORDER BY random() LIMIT %s""",
+        (f"bench-{tag}-%", count)
+    )
+    return [row["userid"] for row in rows]
+
+def measure(patient_ids):
+    latencies = []
+    for patient_id in patient_ids:
+        start = time.perf_counter()
+        rows = execute_query(GET_PATIENT_PROCESSES, {
+            "patient_id": patient_id, "from": None, "to": None, "limit": 50, "offset": 0
+        })
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert len(rows) == APPOINTMENTS_PER_PATIENT
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Patient process feed latency vs. patient population")
+    parser.add_argument("--populations", default="1000,10000,50000")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    # Short enough that the generated phone numbers fit Patients.phoneNumber
+    tag = uuid.uuid4().hex[:6]
+    with get_db_connection() as (conn, cursor):
+        doctor_id = create_doctor(cursor, tag)
+        conn.commit()
+
+    try:
+        created = 0
+        for population in sorted(int(p) for p in args.populations.split(",")):
+            for chunk_start in range(created + 1, population + 1, CHUNK_SIZE):
+                with get_db_connection() as (conn, cursor):
+                    add_patients(cursor, tag, doctor_id, chunk_start, min(chunk_start + CHUNK_SIZE - 1, population))
+                    conn.commit()
+            created = population
+            execute_query("ANALYZE Appointment; ANALYZE Process; ANALYZE Billing", fetch=False)
+
+            p50, p95 = measure(sample_patients(tag, args.samples))
+            logger.info(f"{population:>8} patients: p50={p50:.2f} ms p95={p95:.2f} ms")
+    finally:
+        drop_population(tag, doctor_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for the process payment engine (PAY_FOR_PROCESS).
+
+Creates a throwaway doctor, patient and appointment with many pending bills,
+pays them from concurrent threads all hitting the same patient row, and
+reports throughput and latency. The fixture is removed afterwards.
+
+Usage:
+    python bench_payments.py --threads 16 --bills 500
+"""
+
+import argparse
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from app.database import execute_query, get_db_connection
+from app.models.process_queries import PAY_FOR_PROCESS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_payments")
+
+def create_fixture(bills, amount, balance):
+    """Create a doctor, a patient with the given balance and one appointment with pending bills"""
+    tag = uuid.uuid4().hex[:10]
+    with get_db_connection() as (conn, cursor):
+        cursor.execute(
+            """INSERT INTO "User" (name, email, identityNumber, password)
+               VALUES (%s, %s, %s, 'x'), (%s, %s, %s, 'x') RETURNING userID""",
+            (f"bench-doctor-{tag}", f"doctor-{tag}@bench.example.com", f"bd-{tag}",
+             f"bench-patient-{tag}", f"patient-{tag}@bench.example.com", f"bp-{tag}")
+        )
+        doctor_id, patient_id = [row["userid"] for row in cursor.fetchall()]
+        cursor.execute("INSERT INTO Employee (employeeID, salary) VALUES (%s, NULL)", (doctor_id,))
+        cursor.execute("INSERT INTO Doctors (employeeID, specialization) VALUES (%s, 'Benchmark')", (doctor_id,))
+        cursor.execute(
+            """INSERT INTO Patients (patientID, name, DOB, email, phoneNumber, Balance)
+               VALUES (%s, %s, '1990-01-01', %s, %s, %s)""",
+            (patient_id, f"bench-patient-{tag}", f"patient-{tag}@bench.example.com", f"bench-{tag}", balance)
+        )
+        cursor.execute(
+            "INSERT INTO BalanceLedger (patientID, amount, entryType) VALUES (%s, %s, 'adjustment')",
+            (patient_id, balance)
+        )
+        cursor.execute(
+            """INSERT INTO Slots (doctorID, startTime, endTime, availability)
+               VALUES (%s, NOW(), NOW() + INTERVAL '30 minutes', 'booked') RETURNING startTime, endTime""",
+            (doctor_id,)
+        )
+        slot = cursor.fetchone()
+        cursor.execute(
+            """INSERT INTO Appointment (status, patientID, doctorID, startTime, endTime)
+               VALUES ('completed', %s, %s, %s, %s) RETURNING appointmentID""",
+            (patient_id, doctor_id, slot["starttime"], slot["endtime"])
+        )
+        appointment_id = cursor.fetchone()["appointmentid"]
+        cursor.execute(
+            """INSERT INTO Process (processName, processDescription, status, appointmentID)
+               SELECT 'bench-' || n, 'benchmark process', 'Completed', %s
+               FROM generate_series(1, %s) n
+               RETURNING processID""",
+            (appointment_id, bills)
+        )
+        process_ids = [row["processid"] for row in cursor.fetchall()]
+        cursor.execute(
+            """INSERT INTO Billing (billingDate, amount, paymentStatus, processID)
+               SELECT NOW(), %s, 'Pending', unnest(%s::int[])""",
+            (amount, process_ids)
+        )
+        conn.commit()
+
+    return {
+        "doctor_id": doctor_id,
+        "patient_id": patient_id,
+        "appointment_id": appointment_id,
+        "process_ids": process_ids,
+    }
+
+def drop_fixture(fixture):
+    """Remove everything create_fixture inserted (including trigger-maintained rows)"""
+    with get_db_connection() as (conn, cursor):
+        params = {
+            "doctor_id": fixture["doctor_id"],
+            "patient_id": fixture["patient_id"],
+            "appointment_id": fixture["appointment_id"],
+        }
+        cursor.execute("DELETE FROM Billing WHERE processID IN (SELECT processID FROM Process WHERE appointmentID = %(appointment_id)s)", params)
+        cursor.execute("DELETE FROM Process WHERE appointmentID = %(appointment_id)s", params)
+        cursor.execute("DELETE FROM Appointment WHERE appointmentID = %(appointment_id)s", params)
+        cursor.execute("DELETE FROM Slots WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM DoctorPatient WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM DoctorCounters WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM PatientCounters WHERE patientID = %(patient_id)s", params)
+        cursor.execute("DELETE FROM BalanceSnapshot WHERE patientID = %(patient_id)s", params)
+        # The ledger is append-only; benchmark fixtures are removed with triggers bypassed (needs superuser)
+        cursor.execute("SET LOCAL session_replication_role = replica")
+        cursor.execute("DELETE FROM BalanceLedger WHERE patientID = %(patient_id)s", params)
+        cursor.execute("SET LOCAL session_replication_role = origin")
+        cursor.execute("DELETE FROM Patients WHERE patientID = %(patient_id)s", params)
+        cursor.execute("DELETE FROM Doctors WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM Employee WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute('DELETE FROM "User" WHERE userID IN (%(doctor_id)s, %(patient_id)s)', params)
+        conn.commit()
+
+def pay(fixture, process_id):
+    """Pay one bill through the engine; returns True if it was paid"""
+    result = execute_query(
+        PAY_FOR_PROCESS,
+        {"process_id": process_id, "patient_id": fixture["patient_id"]}
+    )
+    return bool(result and result[0]["paid"])
+
+def get_balance(fixture):
+    result = execute_query("SELECT Balance FROM Patients WHERE patientID = %s", (fixture["patient_id"],))
+    return result[0]["balance"]
+
+def run_concurrent_payments(fixture, threads, attempts_per_bill=1):
+    """Pay every bill (optionally several times each) from a thread pool.
+
+    Returns (paid_count, latencies_ms, elapsed_seconds).
+    """
+    latencies = []
+
+    def timed_pay(process_id):
+        start = time.perf_counter()
+        paid = pay(fixture, process_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return paid
+
+    work = fixture["process_ids"] * attempts_per_bill
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outcomes = list(executor.map(timed_pay, work))
+    elapsed = time.perf_counter() - start
+    return sum(outcomes), latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent payments against one patient")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--bills", type=int, default=500)
+    parser.add_argument("--amount", type=float, default=10)
+    args = parser.parse_args()
+
+    fixture = create_fixture(args.bills, args.amount, args.bills * args.amount)
+    try:
+        paid, latencies, elapsed = run_concurrent_payments(fixture, args.threads)
+        latencies.sort()
+        logger.info(f"Paid {paid}/{args.bills} bills with {args.threads} threads in {elapsed:.2f}s")
+        logger.info(f"Throughput: {paid / elapsed:.1f} payments/s")
+        logger.info(
+            f"Latency ms: p50={latencies[len(latencies) // 2]:.1f} "
+            f"p95={latencies[int(len(latencies) * 0.95)]:.1f} max={latencies[-1]:.1f}"
+        )
+        logger.info(f"Final balance: {get_balance(fixture)}")
+    finally:
+        drop_fixture(fixture)
+
+if __name__ == "__main__":
+    main()
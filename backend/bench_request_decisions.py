@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark clearing a staff request queue: one PUT-equivalent transaction
+per decision (request upsert) against a single
+BULK_UPDATE_REQUEST_STATUS statement for the whole queue.
+
+Usage:
+    python bench_request_decisions.py --requests 500
+"""
+
+import argparse
+import logging
+import time
+import uuid
+from app.database import execute_query, get_db_connection
+from app.models.resource_queries import (
+    BULK_UPDATE_REQUEST_STATUS, CREATE_RESOURCE_REQUEST
+)
+from bench_patient_processes import create_doctor
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_request_decisions")
+
+def create_queue(tag, count):
+    """A benchmark doctor with one pending request for each of `count` new resources"""
+    with get_db_connection() as (conn, cursor):
+        doctor_id = create_doctor(cursor, tag)
+        cursor.execute(
+            """INSERT INTO MedicalResources (name, availability)
+               SELECT 'bench-' || %(tag)s || '-' || n, 'Available' FROM generate_series(1, %(count)s) n
+               RETURNING resourceID""",
+            {"tag": tag, "count": count}
+        )
+        resource_ids = [row["resourceid"] for row in cursor.fetchall()]
+        cursor.execute(
+            """INSERT INTO Request (doctorID, resourceID, status)
+               SELECT %s, unnest(%s::int[]), 'Pending'""",
+            (doctor_id, resource_ids)
+        )
+        conn.commit()
+    return doctor_id, resource_ids
+
+def reset_queue(doctor_id, resource_ids):
+    execute_query(BULK_UPDATE_REQUEST_STATUS, {
+        "doctor_ids": [doctor_id] * len(resource_ids),
+        "resource_ids": resource_ids,
+        "statuses": ["Pending"] * len(resource_ids)
+    })
+    execute_query(
+        "UPDATE MedicalResources SET availability = 'Available' WHERE resourceID = ANY(%s)",
+        (resource_ids,), fetch=False
+    )
+
+def drop_queue(tag, doctor_id):
+    with get_db_connection() as (conn, cursor):
+        params = {"doctor_id": doctor_id, "pattern": f"bench-{tag}-%"}
+        # RequestEvent is append-only; benchmark fixtures are removed with triggers bypassed (needs superuser)
+        cursor.execute("SET LOCAL session_replication_role = replica")
+        cursor.execute("DELETE FROM RequestEvent WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("SET LOCAL session_replication_role = origin")
+        cursor.execute("DELETE FROM Request WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM MedicalResources WHERE name LIKE %(pattern)s", params)
+        cursor.execute("DELETE FROM DoctorCounters WHERE doctorID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM Doctors WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute("DELETE FROM Employee WHERE employeeID = %(doctor_id)s", params)
+        cursor.execute('DELETE FROM "User" WHERE userID = %(doctor_id)s', params)
+        conn.commit()
+
+def decide_per_call(doctor_id, decisions):
+    for resource_id, decision in decisions:
+        with get_db_connection() as (conn, cursor):
+            cursor.execute(CREATE_RESOURCE_REQUEST, (doctor_id, resource_id, decision))
+            conn.commit()
+
+def decide_bulk(doctor_id, decisions):
+    items = execute_query(BULK_UPDATE_REQUEST_STATUS, {
+        "doctor_ids": [doctor_id] * len(decisions),
+        "resource_ids": [resource_id for resource_id, _ in decisions],
+        "statuses": [decision for _, decision in decisions]
+    })
+    assert all(item["result"] == "updated" for item in items)
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call vs. bulk request decisions")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    tag = uuid.uuid4().hex[:6]
+    doctor_id, resource_ids = create_queue(tag, args.requests)
+    # Two approvals for every rejection, like a typical morning queue
+    decisions = [(resource_id, "Rejected" if i % 3 == 2 else "Approved") for i, resource_id in enumerate(resource_ids)]
+
+    try:
+        for name, decide in (("per-call", decide_per_call), ("bulk", decide_bulk)):
+            timings = []
+            for _ in range(args.rounds):
+                reset_queue(doctor_id, resource_ids)
+                start = time.perf_counter()
+                decide(doctor_id, decisions)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            logger.info(f"{name:>8}: {args.requests} decisions in {best * 1000:.1f} ms ({args.requests / best:.0f} decisions/s)")
+    finally:
+        drop_queue(tag, doctor_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark resource name search at catalog scale: the old unbounded
+`name ILIKE '%...%' ORDER BY name` filter against the ranked, limited
+search used by GET /resources/?name= (trigram-indexed when pg_trgm is
+installed).
+
+Usage:
+    python bench_resource_search.py --resources 100000
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+import uuid
+from app.database import execute_query, has_extension
+from app.models.resource_queries import FILTER_RESOURCES_BY_NAME, SEARCH_RESOURCES, SEARCH_RESOURCES_TRGM
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_resource_search")
+
+DEVICES = [
+    "MRI Scanner", "CT Scanner", "X-Ray Unit", "Ultrasound", "Ventilator", "Infusion Pump",
+    "Defibrillator", "ECG Monitor", "Dialysis Machine", "Anesthesia Cart", "Patient Monitor",
+    "Surgical Light", "Endoscope", "Incubator", "Oxygen Concentrator", "Wheelchair",
+]
+QUERIES = ["ventilator", "scan", "pump 12", "monitr", "ecg", "dialysis machine 4711"]
+
+def create_resources(tag, count):
+    execute_query(
+        """INSERT INTO MedicalResources (name, availability)
+           SELECT (%(devices)s::text[])[1 + n %% %(device_count)s] || ' ' || n || ' ' || %(tag)s,
+                  CASE WHEN n %% 3 = 0 THEN 'In Use' ELSE 'Available' END
+           FROM generate_series(1, %(count)s) n""",
+        {"devices": DEVICES, "device_count": len(DEVICES), "tag": tag, "count": count},
+        fetch=False
+    )
+    execute_query("ANALYZE MedicalResources", fetch=False)
+
+def drop_resources(tag):
+    execute_query("DELETE FROM MedicalResources WHERE name LIKE %s", (f"% {tag}",), fetch=False)
+
+def time_query(query, params, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = execute_query(query, params)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource name search latency at catalog scale")
+    parser.add_argument("--resources", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    trigram = has_extension("pg_trgm")
+    search_query = SEARCH_RESOURCES_TRGM if trigram else SEARCH_RESOURCES
+    logger.info(f"pg_trgm {'installed' if trigram else 'not installed, using the ILIKE fallback'}")
+
+    tag = f"bench{uuid.uuid4().hex[:8]}"
+    create_resources(tag, args.resources)
+    try:
+        for q in QUERIES:
+            legacy_ms, legacy_rows = time_query(FILTER_RESOURCES_BY_NAME, (f"%{q}%",), args.repeat)
+            search_ms, search_rows = time_query(search_query, {
+                "q": q, "pattern": f"%{q}%", "prefix": f"{q}%", "available_only": False, "limit": args.limit
+            }, args.repeat)
+            logger.info(
+                f"{q!r:>26}: legacy {legacy_ms:7.2f} ms ({legacy_rows} rows) | "
+                f"ranked {search_ms:7.2f} ms ({search_rows} rows)"
+            )
+
+        plan = execute_query("EXPLAIN " + search_query, {
+            "q": random.choice(QUERIES), "pattern": "%scan%", "prefix": "scan%", "available_only": False, "limit": args.limit
+        })
+        logger.info("Ranked search plan:\n" + "\n".join(row["QUERY PLAN"] for row in plan))
+    finally:
+        drop_resources(tag)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark a burst of identical slot reads, as when a popular doctor opens
+new slots: every request running GET_DOCTOR_SLOTS on its own against the
+burst sharing in-flight queries through SingleFlight.
+
+Usage:
+    python bench_slot_coalescing.py --doctor 1 --date 2030-01-01 --burst 200
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date
+from fastapi.concurrency import run_in_threadpool
+from app.database import execute_query
+from app.models.appointment_queries import GET_DOCTOR_SLOTS
+from app.utils.coalesce import SingleFlight
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("bench_slot_coalescing")
+
+async def burst_direct(doctor_id, day, size):
+    return await asyncio.gather(*(
+        run_in_threadpool(execute_query, GET_DOCTOR_SLOTS, (doctor_id, day)) for _ in range(size)
+    ))
+
+async def burst_coalesced(doctor_id, day, size, coalescer):
+    return await asyncio.gather(*(
+        coalescer.run(("slots", doctor_id, day), execute_query, GET_DOCTOR_SLOTS, (doctor_id, day))
+        for _ in range(size)
+    ))
+
+async def run(args):
+    day = date.fromisoformat(args.date)
+    coalescer = SingleFlight(max_wait_seconds=2.0)
+    runs = (
+        ("direct", lambda: burst_direct(args.doctor, day, args.burst)),
+        ("coalesced", lambda: burst_coalesced(args.doctor, day, args.burst, coalescer)),
+    )
+    for name, burst in runs:
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            results = await burst()
+            timings.append(time.perf_counter() - start)
+            assert all(result == results[0] for result in results)
+        logger.info(f"{name:>9}: {args.burst} concurrent reads in {min(timings) * 1000:.1f} ms (best of {args.rounds})")
+    stats = coalescer.stats()
+    logger.info(f"coalesced: {stats['executed']} queries for {stats['requests']} reads, {stats['coalesced']} saved")
+
+def main():
+    parser = argparse.ArgumentParser(description="Identical concurrent slot reads with and without coalescing")
+    parser.add_argument("--doctor", type=int, default=1)
+    parser.add_argument("--date", default=date.today().isoformat())
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,14 @@
 import psycopg2
 import logging
 from app.config import settings
+from app.models.doctor_queries import REBUILD_DOCTOR_COUNTERS, BACKFILL_DOCTOR_PATIENTS
+from app.models.patient_queries import (
+    PRUNE_BALANCE_SNAPSHOTS, REBUILD_PATIENT_COUNTERS, RECONCILE_BALANCE_LEDGER, TAKE_BALANCE_SNAPSHOTS
+)
+from app.models.resource_queries import (
+    BACKFILL_REQUEST_EVENTS, GET_RESOURCE_STATISTICS, REBUILD_RESOURCE_COUNTERS, REBUILD_RESOURCE_APPROVALS,
+    REBUILD_RESOURCE_DEPARTMENTS
+)
 
 # Configure logging
 logging.basicConfig(
@@ -12,6 +20,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger("migration")
 
+def rebuild_counters(cursor):
+    """Backfill or repair the trigger-maintained DoctorCounters/PatientCounters rows"""
+    # Block concurrent counter updates so no delta is lost while rebuilding
+    cursor.execute("LOCK TABLE DoctorCounters, PatientCounters IN EXCLUSIVE MODE")
+    cursor.execute(REBUILD_DOCTOR_COUNTERS)
+    logger.info(f"Rebuilt counters for {cursor.rowcount} doctors")
+    cursor.execute(REBUILD_PATIENT_COUNTERS)
+    logger.info(f"Rebuilt counters for {cursor.rowcount} patients")
+
+def rebuild_resource_counters(cursor):
+    """Backfill or repair the trigger-maintained resource request counters"""
+    cursor.execute("LOCK TABLE ResourceCounters, ResourceApprovalsDaily IN EXCLUSIVE MODE")
+    cursor.execute(REBUILD_RESOURCE_COUNTERS)
+    cursor.execute("DELETE FROM ResourceApprovalsDaily")
+    cursor.execute(REBUILD_RESOURCE_APPROVALS)
+    logger.info(f"Rebuilt resource counters ({cursor.rowcount} approval days)")
+
+def backfill_request_events(cursor):
+    """Open the request event log with the current state of existing requests"""
+    cursor.execute(BACKFILL_REQUEST_EVENTS)
+    logger.info(f"Backfilled {cursor.rowcount} request events")
+
+def rebuild_resource_departments(cursor):
+    """Backfill or repair the request-derived resource/department associations"""
+    cursor.execute("LOCK TABLE ResourceDepartment IN EXCLUSIVE MODE")
+    cursor.execute(REBUILD_RESOURCE_DEPARTMENTS)
+    result = cursor.fetchone()
+    logger.info(f"Rebuilt {result[0]} resource/department associations, dropped {result[1]}")
+
+def backfill_doctor_patients(cursor):
+    """Add the appointment range columns to DoctorPatient and fill it from appointment history"""
+    cursor.execute("""
+        ALTER TABLE DoctorPatient
+        ADD COLUMN IF NOT EXISTS firstAppointment TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS lastAppointment TIMESTAMP;
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doctorpatient_patient ON DoctorPatient (patientID, doctorID);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doctorpatient_recent ON DoctorPatient (doctorID, lastAppointment DESC);")
+    cursor.execute(BACKFILL_DOCTOR_PATIENTS)
+    logger.info(f"Backfilled {cursor.rowcount} doctor-patient relationships")
+
+def add_patient_process_indexes(cursor):
+    """Indexes behind the patientID-keyed process feed"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_appointment_patient_start ON Appointment (patientID, startTime);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_process_appointment ON Process (appointmentID);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_billing_process ON Billing (processid);")
+
+def reconcile_balance_ledger(cursor):
+    """Open the ledger for existing balances and record adjustments for any drift, then snapshot"""
+    # Keep payments and top-ups out while the cached and ledger balances are compared
+    cursor.execute("LOCK TABLE BalanceLedger IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute(RECONCILE_BALANCE_LEDGER)
+    logger.info(f"Recorded {cursor.rowcount} balance adjustments")
+    # The table lock already keeps writers out, so every patient is snapshotted in one go
+    cursor.execute("SELECT COALESCE(array_agg(patientID), '{}') FROM Patients")
+    patient_ids = cursor.fetchone()[0]
+    cursor.execute(TAKE_BALANCE_SNAPSHOTS, {"patient_ids": patient_ids})
+    logger.info(f"Took {cursor.rowcount} balance snapshots")
+    cursor.execute(PRUNE_BALANCE_SNAPSHOTS, {"patient_ids": patient_ids})
+    logger.info(f"Pruned {cursor.rowcount} superseded balance snapshots")
+
 def run_migration():
     """Run database migrations"""
     conn = None
@@ -67,18 +136,19 @@ def run_migration():
         else:
             logger.error("Request table does not exist!")
         
+        rebuild_counters(cursor)
+        rebuild_resource_counters(cursor)
+        backfill_request_events(cursor)
+        rebuild_resource_departments(cursor)
+        backfill_doctor_patients(cursor)
+        add_patient_process_indexes(cursor)
+        reconcile_balance_ledger(cursor)
+        
         # Commit changes
         conn.commit()
         
         # Test the GET_RESOURCE_STATISTICS query
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as "totalRequests",
-                COUNT(CASE WHEN status = 'Approved' AND (timestamp IS NULL OR DATE(timestamp) = CURRENT_DATE) THEN 1 END) as "approvedToday",
-                COUNT(CASE WHEN status = 'Pending' THEN 1 END) as "pendingRequests",
-                (SELECT COUNT(*) FROM MedicalResources) as "resourcesManaged"
-            FROM Request
-        """)
+        cursor.execute(GET_RESOURCE_STATISTICS)
         
         stats = cursor.fetchone()
         logger.info(f"Resource statistics query result: {stats}")
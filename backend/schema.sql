@@ -72,6 +72,8 @@ CREATE TABLE IF NOT EXISTS MedicalResources (
 CREATE TABLE IF NOT EXISTS DoctorPatient (
     doctorID INTEGER,
     patientID INTEGER,
+    firstAppointment TIMESTAMP,
+    lastAppointment TIMESTAMP,
     PRIMARY KEY (doctorID, patientID),
     FOREIGN KEY (doctorID) REFERENCES Doctors(employeeID),
     FOREIGN KEY (patientID) REFERENCES Patients(patientID)
@@ -303,6 +305,10 @@ ALTER TABLE Billing
     ADD CONSTRAINT chk_billing_amount 
     CHECK (amount >= 0);
 
+ALTER TABLE Patients 
+    ADD CONSTRAINT chk_patient_balance 
+    CHECK (Balance >= 0);
+
 
 
 -- 7. Trigger to Sync Patient Name with User Table
@@ -340,4 +346,581 @@ CREATE TRIGGER trg_sync_user_name_for_patients
 AFTER UPDATE OF name ON "User"
 FOR EACH ROW
 WHEN (OLD.name IS DISTINCT FROM NEW.name)
-EXECUTE FUNCTION sync_patient_user_name();
\ No newline at end of file
+EXECUTE FUNCTION sync_patient_user_name();
+
+-- Incrementally maintained per-doctor and per-patient counters.
+-- Kept up to date by the triggers below, in the same transaction as the
+-- appointment, prescription, process and billing writes, so dashboard
+-- statistics are single-row primary-key lookups.
+CREATE TABLE IF NOT EXISTS DoctorCounters (
+    doctorID INTEGER PRIMARY KEY,
+    scheduledCount INTEGER NOT NULL DEFAULT 0,
+    completedCount INTEGER NOT NULL DEFAULT 0,
+    cancelledCount INTEGER NOT NULL DEFAULT 0,
+    noShowCount INTEGER NOT NULL DEFAULT 0,
+    prescriptionCount INTEGER NOT NULL DEFAULT 0,
+    processCount INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC NOT NULL DEFAULT 0,
+    ratingSum FLOAT NOT NULL DEFAULT 0,
+    ratingCount INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (doctorID) REFERENCES Doctors(employeeID)
+);
+
+CREATE TABLE IF NOT EXISTS PatientCounters (
+    patientID INTEGER PRIMARY KEY,
+    scheduledCount INTEGER NOT NULL DEFAULT 0,
+    completedCount INTEGER NOT NULL DEFAULT 0,
+    cancelledCount INTEGER NOT NULL DEFAULT 0,
+    noShowCount INTEGER NOT NULL DEFAULT 0,
+    prescriptionCount INTEGER NOT NULL DEFAULT 0,
+    processCount INTEGER NOT NULL DEFAULT 0,
+    totalPaid NUMERIC NOT NULL DEFAULT 0,
+    ratingSum FLOAT NOT NULL DEFAULT 0,
+    ratingCount INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (patientID) REFERENCES Patients(patientID)
+);
+
+CREATE OR REPLACE FUNCTION bump_counters(
+    p_doctor INTEGER, p_patient INTEGER,
+    d_scheduled INTEGER, d_completed INTEGER, d_cancelled INTEGER, d_no_show INTEGER,
+    d_prescriptions INTEGER, d_processes INTEGER, d_amount NUMERIC,
+    d_rating_sum FLOAT, d_rating_count INTEGER
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_doctor IS NOT NULL THEN
+        INSERT INTO DoctorCounters AS c (doctorID, scheduledCount, completedCount, cancelledCount, noShowCount,
+                                         prescriptionCount, processCount, revenue, ratingSum, ratingCount)
+        VALUES (p_doctor, d_scheduled, d_completed, d_cancelled, d_no_show,
+                d_prescriptions, d_processes, d_amount, d_rating_sum, d_rating_count)
+        ON CONFLICT (doctorID) DO UPDATE SET
+            scheduledCount = c.scheduledCount + EXCLUDED.scheduledCount,
+            completedCount = c.completedCount + EXCLUDED.completedCount,
+            cancelledCount = c.cancelledCount + EXCLUDED.cancelledCount,
+            noShowCount = c.noShowCount + EXCLUDED.noShowCount,
+            prescriptionCount = c.prescriptionCount + EXCLUDED.prescriptionCount,
+            processCount = c.processCount + EXCLUDED.processCount,
+            revenue = c.revenue + EXCLUDED.revenue,
+            ratingSum = c.ratingSum + EXCLUDED.ratingSum,
+            ratingCount = c.ratingCount + EXCLUDED.ratingCount;
+    END IF;
+
+    IF p_patient IS NOT NULL THEN
+        INSERT INTO PatientCounters AS c (patientID, scheduledCount, completedCount, cancelledCount, noShowCount,
+                                          prescriptionCount, processCount, totalPaid, ratingSum, ratingCount)
+        VALUES (p_patient, d_scheduled, d_completed, d_cancelled, d_no_show,
+                d_prescriptions, d_processes, d_amount, d_rating_sum, d_rating_count)
+        ON CONFLICT (patientID) DO UPDATE SET
+            scheduledCount = c.scheduledCount + EXCLUDED.scheduledCount,
+            completedCount = c.completedCount + EXCLUDED.completedCount,
+            cancelledCount = c.cancelledCount + EXCLUDED.cancelledCount,
+            noShowCount = c.noShowCount + EXCLUDED.noShowCount,
+            prescriptionCount = c.prescriptionCount + EXCLUDED.prescriptionCount,
+            processCount = c.processCount + EXCLUDED.processCount,
+            totalPaid = c.totalPaid + EXCLUDED.totalPaid,
+            ratingSum = c.ratingSum + EXCLUDED.ratingSum,
+            ratingCount = c.ratingCount + EXCLUDED.ratingCount;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one appointment's contribution
+CREATE OR REPLACE FUNCTION apply_appointment_counters(
+    p_doctor INTEGER, p_patient INTEGER, p_status VARCHAR, p_rating FLOAT, p_sign INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    s VARCHAR := LOWER(COALESCE(p_status, ''));
+BEGIN
+    PERFORM bump_counters(
+        p_doctor, p_patient,
+        p_sign * (s = 'scheduled')::INTEGER,
+        p_sign * (s = 'completed')::INTEGER,
+        p_sign * (s = 'cancelled')::INTEGER,
+        p_sign * (s = 'no-show')::INTEGER,
+        0, 0, 0,
+        p_sign * COALESCE(p_rating, 0),
+        p_sign * (p_rating IS NOT NULL)::INTEGER
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_appointment_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_appointment_counters(OLD.doctorID, OLD.patientID, OLD.status, OLD.rating, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_appointment_counters(NEW.doctorID, NEW.patientID, NEW.status, NEW.rating, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_prescribes_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    appt_id INTEGER := CASE WHEN TG_OP = 'DELETE' THEN OLD.appointmentID ELSE NEW.appointmentID END;
+    delta INTEGER := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+    appt RECORD;
+BEGIN
+    SELECT doctorID, patientID INTO appt FROM Appointment WHERE appointmentID = appt_id;
+    IF FOUND THEN
+        PERFORM bump_counters(appt.doctorID, appt.patientID, 0, 0, 0, 0, delta, 0, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_process_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    appt_id INTEGER := CASE WHEN TG_OP = 'DELETE' THEN OLD.appointmentID ELSE NEW.appointmentID END;
+    delta INTEGER := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+    appt RECORD;
+BEGIN
+    SELECT doctorID, patientID INTO appt FROM Appointment WHERE appointmentID = appt_id;
+    IF FOUND THEN
+        PERFORM bump_counters(appt.doctorID, appt.patientID, 0, 0, 0, 0, 0, delta, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Revenue (doctor) and total paid (patient) only count bills marked 'Paid'
+CREATE OR REPLACE FUNCTION trg_billing_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta NUMERIC := 0;
+    proc_id INTEGER := CASE WHEN TG_OP = 'DELETE' THEN OLD.processID ELSE NEW.processID END;
+    appt RECORD;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.paymentStatus = 'Paid' THEN
+        delta := delta - COALESCE(OLD.amount, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.paymentStatus = 'Paid' THEN
+        delta := delta + COALESCE(NEW.amount, 0);
+    END IF;
+    IF delta <> 0 THEN
+        SELECT a.doctorID, a.patientID INTO appt
+        FROM Process p
+        JOIN Appointment a ON p.appointmentID = a.appointmentID
+        WHERE p.processID = proc_id;
+        IF FOUND THEN
+            PERFORM bump_counters(appt.doctorID, appt.patientID, 0, 0, 0, 0, 0, 0, delta, 0, 0);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointment_counters_ins_del ON Appointment;
+CREATE TRIGGER trg_appointment_counters_ins_del
+AFTER INSERT OR DELETE ON Appointment
+FOR EACH ROW
+EXECUTE FUNCTION trg_appointment_counters();
+
+DROP TRIGGER IF EXISTS trg_appointment_counters_upd ON Appointment;
+CREATE TRIGGER trg_appointment_counters_upd
+AFTER UPDATE OF status, rating ON Appointment
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.rating IS DISTINCT FROM NEW.rating)
+EXECUTE FUNCTION trg_appointment_counters();
+
+DROP TRIGGER IF EXISTS trg_prescribes_counters ON Prescribes;
+CREATE TRIGGER trg_prescribes_counters
+AFTER INSERT OR DELETE ON Prescribes
+FOR EACH ROW
+EXECUTE FUNCTION trg_prescribes_counters();
+
+DROP TRIGGER IF EXISTS trg_process_counters ON Process;
+CREATE TRIGGER trg_process_counters
+AFTER INSERT OR DELETE ON Process
+FOR EACH ROW
+EXECUTE FUNCTION trg_process_counters();
+
+DROP TRIGGER IF EXISTS trg_billing_counters ON Billing;
+CREATE TRIGGER trg_billing_counters
+AFTER INSERT OR UPDATE OF paymentStatus, amount OR DELETE ON Billing
+FOR EACH ROW
+EXECUTE FUNCTION trg_billing_counters();
+
+-- Resource request statistics, maintained by triggers on Request and
+-- MedicalResources. ResourceCounters holds a single row; approvals are
+-- bucketed by the day of the request's last status change so "approved
+-- today" is a primary-key lookup.
+CREATE TABLE IF NOT EXISTS ResourceCounters (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    totalRequests INTEGER NOT NULL DEFAULT 0,
+    pendingRequests INTEGER NOT NULL DEFAULT 0,
+    resourcesManaged INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ResourceApprovalsDaily (
+    day DATE PRIMARY KEY,
+    approvedCount INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_resource_counters(
+    d_requests INTEGER, d_pending INTEGER, d_resources INTEGER
+)
+RETURNS VOID AS $$
+BEGIN
+    IF d_requests <> 0 OR d_pending <> 0 OR d_resources <> 0 THEN
+        INSERT INTO ResourceCounters AS c (singleton, totalRequests, pendingRequests, resourcesManaged)
+        VALUES (TRUE, d_requests, d_pending, d_resources)
+        ON CONFLICT (singleton) DO UPDATE SET
+            totalRequests = c.totalRequests + EXCLUDED.totalRequests,
+            pendingRequests = c.pendingRequests + EXCLUDED.pendingRequests,
+            resourcesManaged = c.resourcesManaged + EXCLUDED.resourcesManaged;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one request's contribution
+CREATE OR REPLACE FUNCTION apply_request_counters(p_status VARCHAR, p_timestamp TIMESTAMP, p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM bump_resource_counters(p_sign, p_sign * (p_status = 'Pending')::INTEGER, 0);
+    IF p_status = 'Approved' THEN
+        INSERT INTO ResourceApprovalsDaily AS d (day, approvedCount)
+        VALUES (COALESCE(p_timestamp::DATE, CURRENT_DATE), p_sign)
+        ON CONFLICT (day) DO UPDATE SET approvedCount = d.approvedCount + EXCLUDED.approvedCount;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_request_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_request_counters(OLD.status, OLD.timestamp, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_request_counters(NEW.status, NEW.timestamp, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_medicalresources_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_resource_counters(0, 0, CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_request_counters_ins_del ON Request;
+CREATE TRIGGER trg_request_counters_ins_del
+AFTER INSERT OR DELETE ON Request
+FOR EACH ROW
+EXECUTE FUNCTION trg_request_counters();
+
+DROP TRIGGER IF EXISTS trg_request_counters_upd ON Request;
+CREATE TRIGGER trg_request_counters_upd
+AFTER UPDATE OF status, timestamp ON Request
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.timestamp IS DISTINCT FROM NEW.timestamp)
+EXECUTE FUNCTION trg_request_counters();
+
+DROP TRIGGER IF EXISTS trg_medicalresources_counters ON MedicalResources;
+CREATE TRIGGER trg_medicalresources_counters
+AFTER INSERT OR DELETE ON MedicalResources
+FOR EACH ROW
+EXECUTE FUNCTION trg_medicalresources_counters();
+
+-- Append-only history of resource requests. Request keeps only the latest
+-- status per (doctor, resource); every request and status change is also
+-- recorded here, for the activity feed and equipment usage reports.
+CREATE TABLE IF NOT EXISTS RequestEvent (
+    eventID BIGSERIAL PRIMARY KEY,
+    doctorID INTEGER NOT NULL,
+    resourceID INTEGER NOT NULL,
+    status VARCHAR(50),
+    createdAt TIMESTAMP NOT NULL DEFAULT NOW(),
+    FOREIGN KEY (doctorID) REFERENCES Doctors(employeeID),
+    FOREIGN KEY (resourceID) REFERENCES MedicalResources(resourceID)
+);
+
+CREATE INDEX IF NOT EXISTS idx_requestevent_created ON RequestEvent (createdAt);
+CREATE INDEX IF NOT EXISTS idx_requestevent_resource ON RequestEvent (resourceID, createdAt);
+
+CREATE OR REPLACE FUNCTION trg_request_event()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO RequestEvent (doctorID, resourceID, status, createdAt)
+    VALUES (NEW.doctorID, NEW.resourceID, NEW.status, COALESCE(NEW.timestamp, NOW()));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Re-requests rewrite the timestamp without changing the status; only an
+-- actual status change is a new event.
+DROP TRIGGER IF EXISTS trg_request_event ON Request;
+CREATE TRIGGER trg_request_event
+AFTER INSERT ON Request
+FOR EACH ROW
+EXECUTE FUNCTION trg_request_event();
+
+DROP TRIGGER IF EXISTS trg_request_event_status ON Request;
+CREATE TRIGGER trg_request_event_status
+AFTER UPDATE OF status ON Request
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION trg_request_event();
+
+CREATE OR REPLACE FUNCTION trg_request_event_append_only()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'RequestEvent entries cannot be modified or removed';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_request_event_append_only ON RequestEvent;
+CREATE TRIGGER trg_request_event_append_only
+BEFORE UPDATE OR DELETE ON RequestEvent
+FOR EACH ROW
+EXECUTE FUNCTION trg_request_event_append_only();
+
+DROP TRIGGER IF EXISTS trg_request_event_no_truncate ON RequestEvent;
+CREATE TRIGGER trg_request_event_no_truncate
+BEFORE TRUNCATE ON RequestEvent
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_request_event_append_only();
+
+-- Time-boxed equipment reservations. The exclusion constraint rejects
+-- overlapping reservations of the same resource; the resource ID is wrapped
+-- in a one-element range so the constraint needs only the built-in GiST
+-- range support (no btree_gist). Half-open ranges let back-to-back
+-- reservations share a boundary.
+CREATE TABLE IF NOT EXISTS ResourceReservation (
+    reservationID SERIAL PRIMARY KEY,
+    resourceID INTEGER NOT NULL,
+    doctorID INTEGER,
+    startTime TIMESTAMP NOT NULL,
+    endTime TIMESTAMP NOT NULL,
+    createdBy INTEGER,
+    createdAt TIMESTAMP NOT NULL DEFAULT NOW(),
+    CHECK (endTime > startTime),
+    FOREIGN KEY (resourceID) REFERENCES MedicalResources(resourceID),
+    FOREIGN KEY (doctorID) REFERENCES Doctors(employeeID),
+    CONSTRAINT excl_reservation_overlap EXCLUDE USING gist (
+        int4range(resourceID, resourceID, '[]') WITH =,
+        tsrange(startTime, endTime) WITH &&
+    )
+);
+
+-- Serves free-window lookups: reservations of one resource by start time
+CREATE INDEX IF NOT EXISTS idx_reservation_resource_start ON ResourceReservation (resourceID, startTime);
+
+-- Availability as the API reports it. The stored value is what staff set
+-- (Available, In Use, Maintenance); an Available resource is In Use while a
+-- reservation covers the current time. Reservations of one resource never
+-- overlap, so only the latest one starting before now can cover it: one
+-- idx_reservation_resource_start lookup per resource.
+CREATE OR REPLACE FUNCTION current_resource_availability(resource_id INTEGER, stored VARCHAR)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN stored = 'Available' AND COALESCE((
+            SELECT rr.endTime > LOCALTIMESTAMP
+            FROM ResourceReservation rr
+            WHERE rr.resourceID = resource_id AND rr.startTime <= LOCALTIMESTAMP
+            ORDER BY rr.startTime DESC
+            LIMIT 1
+        ), false) THEN 'In Use'
+        ELSE stored
+    END
+$$ LANGUAGE sql STABLE;
+
+-- Which departments use which resources. 'derived' rows are maintained from
+-- request history (requestCount = requests by the department's doctors);
+-- admins can pin an association ('manual') or hide a derived one
+-- ('removed', kept so later requests do not bring it back). The primary key
+-- serves department filters, the secondary index the resource direction.
+CREATE TABLE IF NOT EXISTS ResourceDepartment (
+    deptName VARCHAR(255) NOT NULL,
+    resourceID INTEGER NOT NULL,
+    source VARCHAR(10) NOT NULL DEFAULT 'derived' CHECK (source IN ('derived', 'manual', 'removed')),
+    requestCount INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (deptName, resourceID),
+    FOREIGN KEY (deptName) REFERENCES Dept(deptName),
+    FOREIGN KEY (resourceID) REFERENCES MedicalResources(resourceID)
+);
+
+CREATE INDEX IF NOT EXISTS idx_resourcedepartment_resource ON ResourceDepartment (resourceID);
+
+CREATE OR REPLACE FUNCTION trg_request_resource_department()
+RETURNS TRIGGER AS $$
+DECLARE
+    r RECORD := CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END;
+    dept VARCHAR;
+BEGIN
+    SELECT deptName INTO dept FROM Doctors WHERE employeeID = r.doctorID;
+    IF dept IS NULL THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO ResourceDepartment AS rd (deptName, resourceID, requestCount)
+        VALUES (dept, r.resourceID, 1)
+        ON CONFLICT (deptName, resourceID) DO UPDATE SET requestCount = rd.requestCount + 1;
+    ELSE
+        UPDATE ResourceDepartment
+        SET requestCount = GREATEST(requestCount - 1, 0)
+        WHERE deptName = dept AND resourceID = r.resourceID;
+        DELETE FROM ResourceDepartment
+        WHERE deptName = dept AND resourceID = r.resourceID
+        AND source = 'derived' AND requestCount = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_request_resource_department ON Request;
+CREATE TRIGGER trg_request_resource_department
+AFTER INSERT OR DELETE ON Request
+FOR EACH ROW
+EXECUTE FUNCTION trg_request_resource_department();
+
+
+-- Databases created before the appointment range columns existed get them
+-- here, ahead of the index and the booking trigger that write them
+ALTER TABLE DoctorPatient
+ADD COLUMN IF NOT EXISTS firstAppointment TIMESTAMP,
+ADD COLUMN IF NOT EXISTS lastAppointment TIMESTAMP;
+
+-- DoctorPatient is filled on booking; the primary key serves the doctor
+-- direction, this index serves "which doctors has this patient seen"
+CREATE INDEX IF NOT EXISTS idx_doctorpatient_patient ON DoctorPatient (patientID, doctorID);
+CREATE INDEX IF NOT EXISTS idx_doctorpatient_recent ON DoctorPatient (doctorID, lastAppointment DESC);
+
+-- Serves a doctor's schedule for a time window
+CREATE INDEX IF NOT EXISTS idx_appointment_doctor_start ON Appointment (doctorID, startTime);
+
+-- Serve a patient's appointments and processes by patientID
+CREATE INDEX IF NOT EXISTS idx_appointment_patient_start ON Appointment (patientID, startTime);
+CREATE INDEX IF NOT EXISTS idx_process_appointment ON Process (appointmentID);
+CREATE INDEX IF NOT EXISTS idx_billing_process ON Billing (processid);
+
+-- Trigram index for resource name search. pg_trgm ships with the standard
+-- contrib package; where it is missing the API falls back to ILIKE ranking.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_medicalresources_name_trgm
+        ON MedicalResources USING gin (name gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm unavailable (%), resource search will not be index-backed', SQLERRM;
+END $$;
+
+CREATE OR REPLACE FUNCTION trg_appointment_doctor_patient()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.doctorID IS NOT NULL AND NEW.patientID IS NOT NULL THEN
+        INSERT INTO DoctorPatient AS dp (doctorID, patientID, firstAppointment, lastAppointment)
+        VALUES (NEW.doctorID, NEW.patientID, NEW.startTime, NEW.startTime)
+        ON CONFLICT (doctorID, patientID) DO UPDATE SET
+            firstAppointment = LEAST(dp.firstAppointment, EXCLUDED.firstAppointment),
+            lastAppointment = GREATEST(dp.lastAppointment, EXCLUDED.lastAppointment);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointment_doctor_patient ON Appointment;
+CREATE TRIGGER trg_appointment_doctor_patient
+AFTER INSERT ON Appointment
+FOR EACH ROW
+EXECUTE FUNCTION trg_appointment_doctor_patient();
+
+-- Append-only history of balance movements: top-ups are positive, payments
+-- negative. Patients.Balance is the cached current value and is written in
+-- the same statement as each entry.
+CREATE TABLE IF NOT EXISTS BalanceLedger (
+    entryID BIGSERIAL PRIMARY KEY,
+    patientID INT NOT NULL,
+    amount NUMERIC NOT NULL,
+    entryType VARCHAR(20) NOT NULL CHECK (entryType IN ('topup', 'payment', 'adjustment')),
+    processID INT,
+    createdAt TIMESTAMP NOT NULL DEFAULT NOW(),
+    FOREIGN KEY (patientID) REFERENCES Patients(patientID)
+);
+
+CREATE INDEX IF NOT EXISTS idx_balanceledger_patient ON BalanceLedger (patientID, entryID);
+
+-- Balance as of a ledger entry; the ledger balance is the latest snapshot
+-- plus the entries after it
+CREATE TABLE IF NOT EXISTS BalanceSnapshot (
+    patientID INT NOT NULL,
+    entryID BIGINT NOT NULL,
+    balance NUMERIC NOT NULL,
+    takenAt TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (patientID, entryID),
+    FOREIGN KEY (patientID) REFERENCES Patients(patientID)
+);
+
+CREATE OR REPLACE FUNCTION trg_balance_ledger_append_only()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'BalanceLedger entries cannot be modified or removed; record an adjustment instead';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_balance_ledger_append_only ON BalanceLedger;
+CREATE TRIGGER trg_balance_ledger_append_only
+BEFORE UPDATE OR DELETE ON BalanceLedger
+FOR EACH ROW
+EXECUTE FUNCTION trg_balance_ledger_append_only();
+
+DROP TRIGGER IF EXISTS trg_balance_ledger_no_truncate ON BalanceLedger;
+CREATE TRIGGER trg_balance_ledger_no_truncate
+BEFORE TRUNCATE ON BalanceLedger
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_balance_ledger_append_only();
+
+-- Slots written outside the API (generate_slots.py, fixtures, manual SQL)
+-- would stay hidden behind cached slot listings until their TTL. Announce
+-- the affected doctors' slot versions on the events channel (EVENTS_CHANNEL
+-- in app/config.py) so every API worker invalidates them; a very large
+-- batch or a TRUNCATE resets all versions instead. The API's own bookings
+-- and releases only UPDATE Slots and bump the versions themselves.
+CREATE OR REPLACE FUNCTION trg_slots_announce()
+RETURNS TRIGGER AS $$
+DECLARE
+    doctor_keys TEXT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT 'slots:' || doctorID) INTO doctor_keys FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT 'slots:' || doctorID) INTO doctor_keys FROM old_rows;
+    END IF;
+
+    IF TG_OP = 'TRUNCATE' OR cardinality(doctor_keys) > 200 THEN
+        PERFORM pg_notify('medisync_events', json_build_object('reset', true, 'origin', 'db')::text);
+    ELSIF doctor_keys IS NOT NULL THEN
+        PERFORM pg_notify('medisync_events', json_build_object('versions', doctor_keys, 'origin', 'db')::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_slots_announce_insert ON Slots;
+CREATE TRIGGER trg_slots_announce_insert
+AFTER INSERT ON Slots
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_slots_announce();
+
+DROP TRIGGER IF EXISTS trg_slots_announce_delete ON Slots;
+CREATE TRIGGER trg_slots_announce_delete
+AFTER DELETE ON Slots
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_slots_announce();
+
+DROP TRIGGER IF EXISTS trg_slots_announce_truncate ON Slots;
+CREATE TRIGGER trg_slots_announce_truncate
+AFTER TRUNCATE ON Slots
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_slots_announce();
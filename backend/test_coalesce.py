@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Checks for SingleFlight read coalescing: followers that wait too long run
+their own query, a leader's error reaches every follower, forget() during a
+call does not disturb the next one, and a cancelled leader does not cancel
+the query its followers are waiting on.
+
+Needs no database; the loaders are blocking functions gated by events.
+"""
+
+import asyncio
+import logging
+import threading
+from app.utils.coalesce import SingleFlight
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("coalesce_test")
+
+class GatedLoader:
+    """Blocking loader; call N waits for gates[N] (if any) and returns its call number"""
+
+    def __init__(self, gates=(), error=None):
+        self.gates = list(gates)
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+        if call < len(self.gates):
+            self.gates[call].wait(5)
+        if self.error is not None:
+            raise self.error
+        return call
+
+async def check_follower_timeout():
+    flight = SingleFlight(max_wait_seconds=0.05)
+    gate = threading.Event()
+    loader = GatedLoader([gate])
+    leader = asyncio.ensure_future(flight.run("slots", loader))
+    await asyncio.sleep(0.02)
+    # The leader is stuck, so the follower gives up waiting and queries itself
+    follower = await flight.run("slots", loader)
+    gate.set()
+    leader_result = await leader
+
+    failures = []
+    if (leader_result, follower) != (0, 1):
+        failures.append(f"expected leader 0 and follower 1, got {leader_result} and {follower}")
+    if (flight.metrics["timeouts"], flight.metrics["executed"]) != (1, 2):
+        failures.append(f"expected 1 timeout and 2 executions, got {dict(flight.metrics)}")
+    return failures
+
+async def check_error_propagation():
+    flight = SingleFlight(max_wait_seconds=5)
+    gate = threading.Event()
+    loader = GatedLoader([gate], error=ValueError("boom"))
+    callers = [asyncio.ensure_future(flight.run("slots", loader)) for _ in range(4)]
+    await asyncio.sleep(0.02)
+    gate.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    failures = []
+    if not all(isinstance(result, ValueError) for result in results):
+        failures.append(f"expected every caller to get the ValueError, got {results}")
+    if loader.calls != 1:
+        failures.append(f"expected one query, got {loader.calls}")
+    if (flight.metrics["errors"], flight.metrics["coalesced"]) != (1, 3):
+        failures.append(f"expected 1 error shared by 3 followers, got {dict(flight.metrics)}")
+    return failures
+
+async def check_forget_during_call():
+    flight = SingleFlight(max_wait_seconds=5)
+    first_gate, second_gate = threading.Event(), threading.Event()
+    loader = GatedLoader([first_gate, second_gate])
+    first = asyncio.ensure_future(flight.run("slots", loader))
+    await asyncio.sleep(0.02)
+    # A write happened: later readers must not join the query that started before it
+    flight.forget("slots")
+    second = asyncio.ensure_future(flight.run("slots", loader))
+    third = asyncio.ensure_future(flight.run("slots", loader))
+    await asyncio.sleep(0.02)
+
+    failures = []
+    first_gate.set()
+    await first
+    # The old call finishing must not drop the new one from the in-flight table
+    if flight.stats()["inFlight"] != 1:
+        failures.append(f"expected the fresh query to stay in flight, got {flight.stats()}")
+    second_gate.set()
+    results = (await first, await second, await third)
+    if results != (0, 1, 1):
+        failures.append(f"expected results (0, 1, 1), got {results}")
+    if loader.calls != 2 or flight.stats()["inFlight"] != 0:
+        failures.append(f"expected 2 queries and nothing in flight, got {loader.calls} and {flight.stats()}")
+    return failures
+
+async def check_leader_cancelled():
+    flight = SingleFlight(max_wait_seconds=5)
+    gate = threading.Event()
+    loader = GatedLoader([gate])
+    leader = asyncio.ensure_future(flight.run("slots", loader))
+    await asyncio.sleep(0.02)
+    followers = [asyncio.ensure_future(flight.run("slots", loader)) for _ in range(3)]
+    await asyncio.sleep(0.02)
+    # The leader's client disconnects while the followers are waiting
+    leader.cancel()
+    await asyncio.sleep(0.02)
+    gate.set()
+    results = await asyncio.gather(*followers, return_exceptions=True)
+
+    failures = []
+    if not leader.cancelled():
+        failures.append("expected the leader to be cancelled")
+    if results != [0, 0, 0]:
+        failures.append(f"expected every follower to get the shared result, got {results}")
+    if loader.calls != 1:
+        failures.append(f"expected one query, got {loader.calls}")
+    return failures
+
+async def run_checks():
+    failures = []
+    for check in (check_follower_timeout, check_error_propagation, check_forget_during_call, check_leader_cancelled):
+        for failure in await check():
+            failures.append(f"{check.__name__}: {failure}")
+    return failures
+
+def main():
+    """Main test function"""
+    logger.info("Starting read coalescing test")
+
+    failures = asyncio.run(run_checks())
+    if failures:
+        for failure in failures:
+            logger.error(f"Check failed: {failure}")
+        raise SystemExit(1)
+
+    logger.info("Read coalescing test: SUCCESS")
+
+if __name__ == "__main__":
+    main()
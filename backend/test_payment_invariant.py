@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Invariant check for the payment engine: under concurrent payments against
+one patient, the balance never goes negative, no bill is paid twice, and
+the money debited equals the sum of the bills marked paid.
+
+Requires a database configured like the API (see app/config.py).
+"""
+
+import logging
+from decimal import Decimal
+from app.database import execute_query
+from bench_payments import create_fixture, drop_fixture, get_balance, run_concurrent_payments
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("payment_invariant_test")
+
+BILLS = 200
+AMOUNT = Decimal("7.50")
+# Only enough money for a third of the bills, so most payments must be refused
+STARTING_BALANCE = AMOUNT * (BILLS // 3)
+
+def check_invariants(fixture, paid):
+    balance = get_balance(fixture)
+    paid_bills = execute_query(
+        """SELECT COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total
+           FROM Billing WHERE processID = ANY(%s) AND paymentStatus = 'Paid'""",
+        (fixture["process_ids"],)
+    )[0]
+
+    failures = []
+    if balance < 0:
+        failures.append(f"balance went negative: {balance}")
+    if paid_bills["count"] != paid:
+        failures.append(f"{paid} successful payments but {paid_bills['count']} bills marked paid")
+    if STARTING_BALANCE - balance != paid_bills["total"]:
+        failures.append(f"debited {STARTING_BALANCE - balance} but paid bills total {paid_bills['total']}")
+    if paid != BILLS // 3:
+        failures.append(f"expected exactly {BILLS // 3} payments to fit the balance, got {paid}")
+    return failures
+
+def main():
+    """Main test function"""
+    logger.info("Starting payment invariant test")
+
+    fixture = create_fixture(BILLS, AMOUNT, STARTING_BALANCE)
+    try:
+        # Every bill is attempted three times from 32 threads
+        paid, _, _ = run_concurrent_payments(fixture, threads=32, attempts_per_bill=3)
+        failures = check_invariants(fixture, paid)
+    finally:
+        drop_fixture(fixture)
+
+    if failures:
+        for failure in failures:
+            logger.error(f"Invariant violated: {failure}")
+        raise SystemExit(1)
+
+    logger.info(f"Payment invariant test: SUCCESS ({paid} bills paid, balance never negative)")
+
+if __name__ == "__main__":
+    main()
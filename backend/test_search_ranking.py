@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Checks for PrefixIndex typeahead ranking: matches come back in tier order
+(exact > prefix > word > substring > fuzzy) whatever the input order, and
+substring matches found through the trigram postings agree with a plain scan,
+including ones that span a word boundary.
+
+Needs no database; the index is built from an in-memory list of names.
+"""
+
+import logging
+import random
+from app.utils.search import PrefixIndex, normalize
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("search_ranking_test")
+
+# One name per tier for the query "para", plus names that must not match
+TIERED_NAMES = [
+    ("Para", "exact"),
+    ("Paracetamol", "prefix"),
+    ("Infant Paracetamol", "word"),
+    ("Separate", "substring"),
+    ("Parra", "fuzzy"),
+]
+UNRELATED_NAMES = ["Ibuprofen", "Amoxicillin", "Omeprazole"]
+
+def build_index(names, seed):
+    entries = [(name, {"name": name}) for name in names]
+    random.Random(seed).shuffle(entries)
+    return PrefixIndex(entries)
+
+def check_tier_order():
+    failures = []
+    names = [name for name, _ in TIERED_NAMES] + UNRELATED_NAMES
+    expected = [(name, match) for name, match in TIERED_NAMES]
+    for seed in range(5):
+        results = build_index(names, seed).search("para")
+        got = [(payload["name"], match) for payload, match, _ in results]
+        if got != expected:
+            failures.append(f"seed {seed}: expected {expected}, got {got}")
+    return failures
+
+def check_substring_candidates():
+    names = [name for name, _ in TIERED_NAMES] + UNRELATED_NAMES + ["Antacid Paste", "Nasal Spray"]
+    index = build_index(names, 0)
+    failures = []
+    for query in ("ara", "cill", "t para", "azol", "sal spr", "xyz"):
+        expected = {name for name in names if normalize(query) in normalize(name)}
+        got = {payload["name"] for payload, _, _ in index.search(query, limit=len(names))
+               if normalize(query) in normalize(payload["name"])}
+        if got != expected:
+            failures.append(f"query {query!r}: expected substring matches {sorted(expected)}, got {sorted(got)}")
+    return failures
+
+def run_checks():
+    failures = []
+    for check in (check_tier_order, check_substring_candidates):
+        for failure in check():
+            failures.append(f"{check.__name__}: {failure}")
+    return failures
+
+def main():
+    """Main test function"""
+    logger.info("Starting search ranking test")
+
+    failures = run_checks()
+    if failures:
+        for failure in failures:
+            logger.error(f"Check failed: {failure}")
+        raise SystemExit(1)
+
+    logger.info("Search ranking test: SUCCESS")
+
+if __name__ == "__main__":
+    main()
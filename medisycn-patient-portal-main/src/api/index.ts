@@ -131,6 +131,35 @@ const getAuthHeaders = (): HeadersInit => {
   return { Authorization: `Bearer ${token}` };
 };
 
+// The doctor's patient list is paged (at most 200 per page); fetch every page
+const DOCTOR_PATIENTS_PAGE_SIZE = 200;
+
+const fetchAllDoctorPatients = async (): Promise<any[]> => {
+  const patients: any[] = [];
+  for (let page = 1; ; page++) {
+    const response = await fetch(
+      `${BASE_URL}/doctors/patients?page=${page}&page_size=${DOCTOR_PATIENTS_PAGE_SIZE}`,
+      {
+        headers: {
+          Authorization: `Bearer ${localStorage.getItem("token")}`,
+          "Content-Type": "application/json",
+        },
+      }
+    );
+    if (!response.ok) {
+      throw new Error("Failed to fetch doctor patients");
+    }
+    const data = await response.json();
+    if (!Array.isArray(data)) {
+      return patients;
+    }
+    patients.push(...data);
+    if (data.length < DOCTOR_PATIENTS_PAGE_SIZE) {
+      return patients;
+    }
+  }
+};
+
 // Authentication API
 export const authApi = {
   register: async (userData: any): Promise<User> => {
@@ -724,18 +753,9 @@ export const doctorApi = {
 
   getPatients: async (): Promise<PatientProfile[]> => {
     try {
-      const response = await fetch(`${BASE_URL}/doctors/patients`, {
-        headers: {
-          Authorization: `Bearer ${localStorage.getItem("token")}`,
-          "Content-Type": "application/json",
-        },
-      });
-      if (!response.ok) {
-        throw new Error("Failed to fetch doctor patients");
-      }
-      const data = await response.json();
+      const data = await fetchAllDoctorPatients();
       // Transform each patient to match PatientProfile
-      return Array.isArray(data) ? data.map(transformPatientData) : [];
+      return data.map(transformPatientData);
     } catch (error) {
       console.error("Get patients error:", error);
       throw error;
@@ -751,10 +771,7 @@ export const doctorApi = {
   }> => {
     try {
       // Fetch all patients for this doctor
-      const patientsRes = await fetch(`${BASE_URL}/doctors/patients`, {
-        headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
-      });
-      const allPatients = await patientsRes.json();
+      const allPatients = await fetchAllDoctorPatients();
       const patient =
         allPatients.find(
           (p: any) => p.patientID === patientId || p.patientid === patientId
@@ -259,7 +259,7 @@ const DoctorDashboard = () => {
                   <CalendarDays className="h-5 w-5 text-medisync-purple" />
                 </div>
                 <span className="text-3xl font-bold text-medisync-dark-purple">
-                  {stats?.appointmentcount || 0}
+                  {stats?.appointmentCount ?? stats?.appointmentcount ?? 0}
                 </span>
               </div>
             </CardContent>